@@ -1,11 +1,26 @@
 import os
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from typing import List
 
 
 @dataclass
 class BotConfig:
     token: str
     target_chat_id: int
+    # chat administrator list cache; refreshed in the background after this many seconds
+    admin_cache_ttl_seconds: float = 300
+    # max concurrent get_chat_member calls when resolving winners missing from telegram_user
+    profile_lookup_concurrency: int = 5
+    # outbound queue: per-chat token bucket and global send rate
+    outbound_chat_rate_per_minute: float = 20
+    outbound_chat_burst: int = 3
+    outbound_global_rate_per_second: float = 30
+    # multi-chat mode: also serve every chat that has a lottery_settings row
+    multi_chat: bool = False
+    # extra chats served besides target_chat_id (TARGET_CHAT_IDS, comma separated)
+    extra_chat_ids: List[int] = field(default_factory=list)
+    # max chats processed at the same time by scheduled jobs / startup checks
+    chat_job_concurrency: int = 4
 
 
 @dataclass
@@ -15,6 +30,24 @@ class DbConfig:
     user: str
     password: str
     database: str
+    # "mysql" or "sqlite" (embedded, single node; the host/user/password fields are ignored)
+    backend: str = "mysql"
+    sqlite_path: str = "data/lotterybot.sqlite3"
+    # rows per multi-row INSERT when persisting round entries / winners
+    bulk_chunk_size: int = 500
+    # connection pool: the effective limit moves between min and max with measured acquire wait
+    pool_min_size: int = 2
+    pool_max_size: int = 10
+    # recycle connections before MySQL's wait_timeout closes them
+    pool_recycle_seconds: int = 1800
+    connect_timeout_seconds: int = 10
+    acquire_timeout_seconds: float = 10
+    pool_grow_wait_ms: float = 50
+    pool_tune_interval_seconds: float = 30
+    # statements slower than this are logged with an EXPLAIN plan (0 disables)
+    slow_query_ms: float = 200
+    slow_query_top_n: int = 20
+    slow_query_explain_interval_seconds: float = 60
 
 
 @dataclass
@@ -22,6 +55,68 @@ class SchedulerConfig:
     enabled: bool = True
     timezone: str = "Asia/Shanghai"
     weekly_draw_at: str = "00:00"
+    # multiple replicas: only the holder of a MySQL named lock runs jobs
+    leader_election: bool = False
+    lock_name: str = "lottery_bot_scheduler"
+    leader_check_seconds: float = 5.0
+
+
+@dataclass
+class CheckinConfig:
+    # write-behind: buffer check-ins in memory and flush them as multi-row upserts
+    write_behind: bool = False
+    flush_max_batch: int = 500
+    flush_interval_seconds: float = 5.0
+    # same-day dedupe: skip the DB for repeat messages of an already checked-in user
+    dedupe_enabled: bool = True
+    dedupe_max_entries: int = 50000
+    # retention: keep this many days of raw check-ins (0 = keep everything); deletes run in chunks
+    retention_days: int = 0
+    retention_run_at: str = "04:00"
+    retention_chunk_size: int = 5000
+    retention_pause_seconds: float = 0.2
+
+
+@dataclass
+class ConcurrencyConfig:
+    # updates processed at the same time (keep close to the DB pool size)
+    max_in_flight: int = 4
+    # slots only commands / callbacks / member updates may use
+    command_reserved: int = 1
+    # plain messages waiting beyond this are dropped (shed) instead of queued
+    max_queue: int = 5000
+
+
+@dataclass
+class WebhookConfig:
+    # "polling" (default) or "webhook"
+    mode: str = "polling"
+    # address the embedded aiohttp server binds to (behind a reverse proxy usually 127.0.0.1)
+    host: str = "0.0.0.0"
+    port: int = 8080
+    path: str = "/telegram/webhook"
+    # sent back by Telegram in X-Telegram-Bot-Api-Secret-Token; requests without it are rejected
+    secret_token: str = ""
+    # public https URL Telegram should call, e.g. https://bot.example.com; empty = don't call setWebhook
+    base_url: str = ""
+    drop_pending_updates: bool = False
+
+    @property
+    def enabled(self) -> bool:
+        return self.mode == "webhook"
+
+    @property
+    def url(self) -> str:
+        return self.base_url.rstrip("/") + self.path
+
+
+@dataclass
+class MetricsConfig:
+    # Prometheus text endpoint on its own port (keep it off the public webhook listener)
+    enabled: bool = False
+    host: str = "127.0.0.1"
+    port: int = 9100
+    path: str = "/metrics"
 
 
 @dataclass
@@ -29,8 +124,17 @@ class Config:
     bot: BotConfig
     db: DbConfig
     scheduler: SchedulerConfig
+    checkin: CheckinConfig
+    webhook: WebhookConfig
+    concurrency: ConcurrencyConfig
+    metrics: MetricsConfig
     target_chat_id: int
 
+    @property
+    def chat_ids(self) -> List[int]:
+        """Chats configured via env; lottery_settings may add more in multi-chat mode."""
+        return list(dict.fromkeys(c for c in [self.target_chat_id, *self.bot.extra_chat_ids] if c))
+
 
 def load_config() -> Config:
     token = os.getenv("BOT_TOKEN", "")
@@ -42,14 +146,85 @@ def load_config() -> Config:
         user=os.getenv("DB_USER", "root"),
         password=os.getenv("DB_PASSWORD", ""),
         database=os.getenv("DB_NAME", "LotteryBot"),
+        backend=os.getenv("DB_BACKEND", "mysql"),
+        sqlite_path=os.getenv("DB_SQLITE_PATH", "data/lotterybot.sqlite3"),
+        bulk_chunk_size=int(os.getenv("DB_BULK_CHUNK_SIZE", "500")),
+        pool_min_size=int(os.getenv("DB_POOL_MIN_SIZE", "2")),
+        pool_max_size=int(os.getenv("DB_POOL_MAX_SIZE", "10")),
+        pool_recycle_seconds=int(os.getenv("DB_POOL_RECYCLE_SECONDS", "1800")),
+        connect_timeout_seconds=int(os.getenv("DB_CONNECT_TIMEOUT_SECONDS", "10")),
+        acquire_timeout_seconds=float(os.getenv("DB_ACQUIRE_TIMEOUT_SECONDS", "10")),
+        pool_grow_wait_ms=float(os.getenv("DB_POOL_GROW_WAIT_MS", "50")),
+        pool_tune_interval_seconds=float(os.getenv("DB_POOL_TUNE_INTERVAL_SECONDS", "30")),
+        slow_query_ms=float(os.getenv("DB_SLOW_QUERY_MS", "200")),
+        slow_query_top_n=int(os.getenv("DB_SLOW_QUERY_TOP_N", "20")),
+        slow_query_explain_interval_seconds=float(os.getenv("DB_SLOW_QUERY_EXPLAIN_INTERVAL_SECONDS", "60")),
     )
 
     scheduler = SchedulerConfig(
         enabled=os.getenv("SCHEDULER_ENABLED", "true").lower() != "false",
         timezone=os.getenv("SCHEDULER_TZ", "Asia/Shanghai"),
         weekly_draw_at=os.getenv("WEEKLY_DRAW_AT", "00:00"),
+        leader_election=os.getenv("SCHEDULER_LEADER_ELECTION", "false").lower() == "true",
+        lock_name=os.getenv("SCHEDULER_LOCK_NAME", "lottery_bot_scheduler"),
+        leader_check_seconds=float(os.getenv("SCHEDULER_LEADER_CHECK_SECONDS", "5")),
+    )
+
+    checkin = CheckinConfig(
+        write_behind=os.getenv("CHECKIN_WRITE_BEHIND", "false").lower() == "true",
+        flush_max_batch=int(os.getenv("CHECKIN_FLUSH_MAX_BATCH", "500")),
+        flush_interval_seconds=float(os.getenv("CHECKIN_FLUSH_INTERVAL_SECONDS", "5")),
+        dedupe_enabled=os.getenv("CHECKIN_DEDUPE_ENABLED", "true").lower() != "false",
+        dedupe_max_entries=int(os.getenv("CHECKIN_DEDUPE_MAX_ENTRIES", "50000")),
+        retention_days=int(os.getenv("CHECKIN_RETENTION_DAYS", "0")),
+        retention_run_at=os.getenv("CHECKIN_RETENTION_RUN_AT", "04:00"),
+        retention_chunk_size=int(os.getenv("CHECKIN_RETENTION_CHUNK_SIZE", "5000")),
+        retention_pause_seconds=float(os.getenv("CHECKIN_RETENTION_PAUSE_SECONDS", "0.2")),
+    )
+
+    webhook = WebhookConfig(
+        mode=os.getenv("BOT_MODE", "polling").lower(),
+        host=os.getenv("WEBHOOK_HOST", "0.0.0.0"),
+        port=int(os.getenv("WEBHOOK_PORT", "8080")),
+        path=os.getenv("WEBHOOK_PATH", "/telegram/webhook"),
+        secret_token=os.getenv("WEBHOOK_SECRET", ""),
+        base_url=os.getenv("WEBHOOK_BASE_URL", ""),
+        drop_pending_updates=os.getenv("WEBHOOK_DROP_PENDING_UPDATES", "false").lower() == "true",
     )
 
-    bot_cfg = BotConfig(token=token, target_chat_id=target_chat_id)
+    concurrency = ConcurrencyConfig(
+        max_in_flight=int(os.getenv("UPDATE_MAX_IN_FLIGHT", "4")),
+        command_reserved=int(os.getenv("UPDATE_COMMAND_RESERVED", "1")),
+        max_queue=int(os.getenv("UPDATE_MAX_QUEUE", "5000")),
+    )
+
+    metrics = MetricsConfig(
+        enabled=os.getenv("METRICS_ENABLED", "false").lower() == "true",
+        host=os.getenv("METRICS_HOST", "127.0.0.1"),
+        port=int(os.getenv("METRICS_PORT", "9100")),
+        path=os.getenv("METRICS_PATH", "/metrics"),
+    )
 
-    return Config(bot=bot_cfg, db=db, scheduler=scheduler, target_chat_id=target_chat_id)
+    bot_cfg = BotConfig(
+        token=token,
+        target_chat_id=target_chat_id,
+        admin_cache_ttl_seconds=float(os.getenv("ADMIN_CACHE_TTL_SECONDS", "300")),
+        profile_lookup_concurrency=int(os.getenv("PROFILE_LOOKUP_CONCURRENCY", "5")),
+        outbound_chat_rate_per_minute=float(os.getenv("OUTBOUND_CHAT_RATE_PER_MINUTE", "20")),
+        outbound_chat_burst=int(os.getenv("OUTBOUND_CHAT_BURST", "3")),
+        outbound_global_rate_per_second=float(os.getenv("OUTBOUND_GLOBAL_RATE_PER_SECOND", "30")),
+        multi_chat=os.getenv("MULTI_CHAT", "false").lower() == "true",
+        extra_chat_ids=[int(c) for c in os.getenv("TARGET_CHAT_IDS", "").replace(" ", "").split(",") if c],
+        chat_job_concurrency=int(os.getenv("CHAT_JOB_CONCURRENCY", "4")),
+    )
+
+    return Config(
+        bot=bot_cfg,
+        db=db,
+        scheduler=scheduler,
+        checkin=checkin,
+        webhook=webhook,
+        concurrency=concurrency,
+        metrics=metrics,
+        target_chat_id=target_chat_id,
+    )
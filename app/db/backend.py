@@ -0,0 +1,88 @@
+"""
+Storage backend selection (DbConfig.backend / DB_BACKEND): MySQL via asyncmy, or embedded SQLite.
+
+Repositories import queries, db_session and in_transaction from here. The
+queries proxy resolves each attribute on the active backend's module, so
+repository code stays the same for both backends.
+"""
+
+import sqlite3
+from types import ModuleType
+from typing import Optional
+
+from asyncmy.errors import IntegrityError
+
+from app.config import DbConfig
+from app.db import connection, queries as mysql_queries, sqlite_connection, sqlite_queries
+
+BACKENDS = ("mysql", "sqlite")
+
+# MySQL ER_DUP_ENTRY
+_MYSQL_DUPLICATE_KEY = 1062
+_SQLITE_DUPLICATE_KEY = (sqlite3.SQLITE_CONSTRAINT_UNIQUE, sqlite3.SQLITE_CONSTRAINT_PRIMARYKEY)
+
+_backend = "mysql"
+
+
+class _QueriesProxy:
+    def __getattr__(self, name: str):
+        return getattr(_queries_module(), name)
+
+
+queries = _QueriesProxy()
+
+
+def _queries_module() -> ModuleType:
+    return sqlite_queries if _backend == "sqlite" else mysql_queries
+
+
+def current_backend() -> str:
+    return _backend
+
+
+def select_backend(name: str) -> None:
+    global _backend
+    name = (name or "mysql").strip().lower()
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown DB_BACKEND {name!r}, expected one of {', '.join(BACKENDS)}")
+    _backend = name
+
+
+async def init_db(db_config: DbConfig) -> None:
+    select_backend(db_config.backend)
+    if _backend == "sqlite":
+        await sqlite_connection.init_sqlite(db_config)
+    else:
+        await connection.init_db_pool(db_config)
+
+
+async def close_db() -> None:
+    if _backend == "sqlite":
+        await sqlite_connection.close_sqlite()
+    else:
+        await connection.close_db_pool()
+
+
+def db_session(transaction: bool = False):
+    if _backend == "sqlite":
+        return sqlite_connection.db_session(transaction=transaction)
+    return connection.db_session(transaction=transaction)
+
+
+def in_transaction() -> bool:
+    if _backend == "sqlite":
+        return sqlite_connection.in_transaction()
+    return connection.in_transaction()
+
+
+def pool_stats() -> Optional[dict]:
+    # SQLite 只有一个连接，没有连接池
+    return None if _backend == "sqlite" else connection.pool_stats()
+
+
+def is_duplicate_key(error: Exception) -> bool:
+    if isinstance(error, IntegrityError):
+        return bool(error.args) and error.args[0] == _MYSQL_DUPLICATE_KEY
+    if isinstance(error, sqlite3.IntegrityError):
+        return getattr(error, "sqlite_errorcode", None) in _SQLITE_DUPLICATE_KEY
+    return False
@@ -1,18 +1,179 @@
-from typing import Optional
+import asyncio
+import logging
+import time
+from collections import deque
+from contextlib import AsyncExitStack, asynccontextmanager
+from contextvars import ContextVar
+from typing import AsyncIterator, List, Optional
 
 import asyncmy
 
 from app.config import DbConfig
 
+logger = logging.getLogger(__name__)
+
+# acquire 等待时间环形缓冲区大小（用于分位数统计）
+WAIT_SAMPLES = 1024
+# 闸门的起始上限：沿用旧版固定连接池的大小，由 tune() 再按等待情况增减
+INITIAL_LIMIT = 5
+
 
 _pool: Optional[asyncmy.Pool] = None
+_gate: Optional["PoolGate"] = None
+_tuner: Optional[asyncio.Task] = None
+_acquire_timeout: float = 10.0
+
+
+class PoolGate:
+    """
+    Caps concurrent checkouts at an effective limit between the pool's min and max size.
+
+    Every acquire records how long it waited (gate + pool, including connection
+    setup) in a ring buffer; an acquire that timed out counts as a wait of the full
+    timeout. tune() raises the limit while recent p95 wait is above grow_wait_ms or
+    any acquire timed out, and lowers it again when the pool sits mostly idle.
+    """
+
+    def __init__(self, min_limit: int, max_limit: int, grow_wait_ms: float, initial_limit: int = INITIAL_LIMIT):
+        self.min_limit = max(1, min_limit)
+        self.max_limit = max(self.min_limit, max_limit)
+        self.grow_wait_ms = grow_wait_ms
+        self.limit = min(max(initial_limit, self.min_limit), self.max_limit)
+        self.in_use = 0
+        self.waiting = 0
+        self.acquired = 0
+        self.timeouts = 0
+        self.grown = 0
+        self.shrunk = 0
+        self._peak_in_use = 0
+        self._cond = asyncio.Condition()
+        self._waits: deque = deque(maxlen=WAIT_SAMPLES)  # (monotonic, wait_ms)
+        self._last_tune = time.monotonic()
+        self._timeouts_at_tune = 0
+
+    async def enter(self) -> None:
+        async with self._cond:
+            self.waiting += 1
+            try:
+                await self._cond.wait_for(lambda: self.in_use < self.limit)
+            finally:
+                self.waiting -= 1
+            self.in_use += 1
+            self._peak_in_use = max(self._peak_in_use, self.in_use)
+
+    async def leave(self) -> None:
+        async with self._cond:
+            self.in_use -= 1
+            self._cond.notify()
+
+    def record_wait(self, wait_ms: float) -> None:
+        self.acquired += 1
+        self._waits.append((time.monotonic(), wait_ms))
+
+    def record_timeout(self, wait_ms: float) -> None:
+        self.timeouts += 1
+        self._waits.append((time.monotonic(), wait_ms))
+
+    async def tune(self) -> None:
+        now = time.monotonic()
+        recent = sorted(ms for at, ms in self._waits if at >= self._last_tune)
+        peak, self._peak_in_use = self._peak_in_use, self.in_use
+        self._last_tune = now
+        timed_out, self._timeouts_at_tune = self.timeouts - self._timeouts_at_tune, self.timeouts
+
+        p95 = _percentile(recent, 0.95)
+        if (timed_out or (recent and p95 > self.grow_wait_ms)) and self.limit < self.max_limit:
+            async with self._cond:
+                self.limit += 1
+                self.grown += 1
+                self._cond.notify()
+            logger.info("DB pool limit raised to %s (p95 acquire wait %.0f ms, %s timeouts)", self.limit, p95, timed_out)
+        elif (
+            not timed_out
+            and not self.waiting
+            and p95 <= self.grow_wait_ms / 4
+            and peak < self.limit - 1
+            and self.limit > self.min_limit
+        ):
+            self.limit -= 1
+            self.shrunk += 1
+            logger.info("DB pool limit lowered to %s (peak in use %s)", self.limit, peak)
+            if _pool:
+                await _close_idle(_pool, _pool.size - self.limit)
+
+    def stats(self) -> dict:
+        waits = sorted(ms for _, ms in self._waits)
+        return {
+            "limit": self.limit,
+            "min_limit": self.min_limit,
+            "max_limit": self.max_limit,
+            "in_use": self.in_use,
+            "waiting": self.waiting,
+            "acquired": self.acquired,
+            "timeouts": self.timeouts,
+            "grown": self.grown,
+            "shrunk": self.shrunk,
+            "wait_p50_ms": _percentile(waits, 0.5),
+            "wait_p95_ms": _percentile(waits, 0.95),
+            "wait_p99_ms": _percentile(waits, 0.99),
+            "wait_max_ms": waits[-1] if waits else 0.0,
+        }
+
+
+async def _close_idle(pool: asyncmy.Pool, count: int) -> int:
+    """Close up to count idle connections; the rest of the warm pool stays open (pool.clear() would drop them all)."""
+    closed = 0
+    while closed < count and pool.freesize:
+        conn = await pool.acquire()
+        conn.close()
+        # 已关闭的连接归还时不会再放回空闲队列
+        pool.release(conn)
+        closed += 1
+    return closed
+
+
+def _percentile(sorted_values: List[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+class DbSession:
+    """One pooled connection pinned for a block of work, optionally inside a transaction."""
+
+    def __init__(self, conn, owner: Optional[asyncio.Task]):
+        self.conn = conn
+        self.owner = owner
+        self.in_transaction = False
+
+    @asynccontextmanager
+    async def transaction(self) -> AsyncIterator["DbSession"]:
+        if self.in_transaction:
+            yield self
+            return
+        await self.conn.begin()
+        self.in_transaction = True
+        try:
+            yield self
+        except BaseException:
+            await self.conn.rollback()
+            raise
+        else:
+            await self.conn.commit()
+        finally:
+            self.in_transaction = False
+
+
+_current_session: ContextVar[Optional[DbSession]] = ContextVar("db_session", default=None)
 
 
 async def init_db_pool(db_config: DbConfig) -> None:
-    global _pool
+    global _pool, _gate, _tuner, _acquire_timeout
     if _pool:
         return
 
+    min_size = max(1, db_config.pool_min_size)
+    max_size = max(min_size, db_config.pool_max_size)
     _pool = await asyncmy.create_pool(
         host=db_config.host,
         port=db_config.port,
@@ -20,9 +181,64 @@ async def init_db_pool(db_config: DbConfig) -> None:
         password=db_config.password,
         db=db_config.database,
         autocommit=True,
-        minsize=1,
-        maxsize=5,
+        minsize=min_size,
+        maxsize=max_size,
+        pool_recycle=db_config.pool_recycle_seconds,
+        connect_timeout=db_config.connect_timeout_seconds,
     )
+    _gate = PoolGate(min_size, max_size, grow_wait_ms=db_config.pool_grow_wait_ms)
+    _acquire_timeout = db_config.acquire_timeout_seconds
+    await warm_db_pool()
+    if max_size > min_size and db_config.pool_tune_interval_seconds > 0:
+        _tuner = asyncio.create_task(_tune_loop(db_config.pool_tune_interval_seconds))
+
+
+async def warm_db_pool() -> None:
+    """Open minsize connections up front and run a health check on each of them."""
+    pool = get_db_pool()
+    started = time.perf_counter()
+
+    async def ping() -> None:
+        async with checkout() as conn:
+            async with conn.cursor() as cur:
+                await cur.execute("SELECT 1")
+                await cur.fetchone()
+
+    await asyncio.gather(*(ping() for _ in range(pool.minsize)))
+    logger.info(
+        "DB pool warmed: %s connections healthy in %.0f ms (min=%s max=%s)",
+        pool.size,
+        (time.perf_counter() - started) * 1000,
+        pool.minsize,
+        pool.maxsize,
+    )
+
+
+async def _tune_loop(interval: float) -> None:
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await _gate.tune()
+        except Exception as e:
+            logger.exception("DB pool tuning failed: %s", e)
+
+
+@asynccontextmanager
+async def checkout() -> AsyncIterator[asyncmy.Connection]:
+    """Take a connection from the pool through the adaptive gate, bounded by the acquire timeout."""
+    pool = get_db_pool()
+    started = time.perf_counter()
+    async with AsyncExitStack() as stack:
+        try:
+            async with asyncio.timeout(_acquire_timeout):
+                await _gate.enter()
+                stack.push_async_callback(_gate.leave)
+                conn = await stack.enter_async_context(pool.acquire())
+        except TimeoutError:
+            _gate.record_timeout(_acquire_timeout * 1000)
+            raise TimeoutError(f"Timed out acquiring a DB connection after {_acquire_timeout}s") from None
+        _gate.record_wait((time.perf_counter() - started) * 1000)
+        yield conn
 
 
 def get_db_pool() -> asyncmy.Pool:
@@ -31,8 +247,85 @@ def get_db_pool() -> asyncmy.Pool:
     return _pool
 
 
+def pool_stats() -> Optional[dict]:
+    if not _pool:
+        return None
+    stats = {
+        "size": _pool.size,
+        "free": _pool.freesize,
+        "in_use": _pool.size - _pool.freesize,
+        "minsize": _pool.minsize,
+        "maxsize": _pool.maxsize,
+    }
+    if _gate:
+        stats["gate"] = _gate.stats()
+    return stats
+
+
+def _active_session() -> Optional[DbSession]:
+    session = _current_session.get()
+    # 子任务会继承 contextvar，但连接不能被并发使用，只有创建 session 的任务可以复用
+    if session and session.owner is asyncio.current_task():
+        return session
+    return None
+
+
+def in_transaction() -> bool:
+    session = _active_session()
+    return bool(session and session.in_transaction)
+
+
+@asynccontextmanager
+async def acquire_connection() -> AsyncIterator[asyncmy.Connection]:
+    """Yield the connection pinned by the current db_session, or a pooled one for a single statement."""
+    session = _active_session()
+    if session:
+        yield session.conn
+        return
+    async with checkout() as conn:
+        yield conn
+
+
+@asynccontextmanager
+async def db_session(transaction: bool = False) -> AsyncIterator[DbSession]:
+    """
+    Pin one connection for the block so every query inside reuses it.
+
+    With transaction=True the block is all-or-nothing: it commits on success
+    and rolls back on any exception. Nested sessions join the outer one.
+    """
+    session = _active_session()
+    if session:
+        if transaction:
+            async with session.transaction():
+                yield session
+        else:
+            yield session
+        return
+
+    async with checkout() as conn:
+        session = DbSession(conn, asyncio.current_task())
+        token = _current_session.set(session)
+        try:
+            if transaction:
+                async with session.transaction():
+                    yield session
+            else:
+                yield session
+        finally:
+            _current_session.reset(token)
+
+
 async def close_db_pool() -> None:
-    global _pool
+    global _pool, _gate, _tuner
+    if _tuner:
+        _tuner.cancel()
+        try:
+            await _tuner
+        except asyncio.CancelledError:
+            pass
+        _tuner = None
+    _gate = None
     if _pool:
         _pool.close()
         await _pool.wait_closed()
@@ -1,32 +1,89 @@
+import sys
+import time
 from datetime import date, datetime
-from typing import Any, Dict, List, Optional
+from typing import Any, AsyncIterator, Dict, List, Optional
 import asyncmy
 
-from app.db.connection import get_db_pool
+from app.db.connection import acquire_connection
+from app.db.slow_queries import slow_query_log
+from app.metrics import DB_QUERY_ERRORS, DB_QUERY_SECONDS
+
+
+class _Timed:
+    """Times one statement: feeds the query histogram and the slow-query log."""
+
+    __slots__ = ("name", "sql", "params", "rows", "started")
+
+    def __init__(self, name: str, sql: str, params: tuple | list):
+        self.name = name
+        self.sql = sql
+        self.params = params
+        self.rows: Optional[int] = None
+        self.started = 0.0
+
+    def __enter__(self) -> "_Timed":
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        elapsed = time.perf_counter() - self.started
+        DB_QUERY_SECONDS.observe(elapsed, self.name)
+        if exc_type is not None and issubclass(exc_type, Exception):
+            DB_QUERY_ERRORS.inc(self.name)
+        slow_query_log.observe(self.name, self.sql, self.params, elapsed, self.rows)
+        return False
+
+
+def _caller_name() -> str:
+    # 调用 _execute/_fetch* 的查询函数名，作为指标标签
+    return sys._getframe(2).f_code.co_name
 
 
 async def _execute(sql: str, params: tuple | list) -> int:
-    pool = get_db_pool()
-    async with pool.acquire() as conn:
+    name = _caller_name()
+    async with acquire_connection() as conn:
         async with conn.cursor(asyncmy.cursors.DictCursor) as cur:
-            await cur.execute(sql, params)
+            with _Timed(name, sql, params) as timed:
+                await cur.execute(sql, params)
+                timed.rows = cur.rowcount
             return cur.lastrowid
 
 
-async def _fetchone(sql: str, params: tuple | list) -> Optional[Dict[str, Any]]:
-    pool = get_db_pool()
-    async with pool.acquire() as conn:
+async def _execute_rowcount(sql: str, params: tuple | list) -> int:
+    name = _caller_name()
+    async with acquire_connection() as conn:
         async with conn.cursor(asyncmy.cursors.DictCursor) as cur:
-            await cur.execute(sql, params)
-            return await cur.fetchone()
+            with _Timed(name, sql, params) as timed:
+                await cur.execute(sql, params)
+                timed.rows = cur.rowcount
+            return cur.rowcount
 
 
-async def _fetchall(sql: str, params: tuple | list) -> List[Dict[str, Any]]:
-    pool = get_db_pool()
-    async with pool.acquire() as conn:
+async def _fetchone(sql: str, params: tuple | list = ()) -> Optional[Dict[str, Any]]:
+    name = _caller_name()
+    async with acquire_connection() as conn:
         async with conn.cursor(asyncmy.cursors.DictCursor) as cur:
-            await cur.execute(sql, params)
-            return await cur.fetchall()
+            with _Timed(name, sql, params) as timed:
+                await cur.execute(sql, params)
+                row = await cur.fetchone()
+                timed.rows = 1 if row else 0
+            return row
+
+
+async def _fetchall(sql: str, params: tuple | list = ()) -> List[Dict[str, Any]]:
+    name = _caller_name()
+    async with acquire_connection() as conn:
+        async with conn.cursor(asyncmy.cursors.DictCursor) as cur:
+            with _Timed(name, sql, params) as timed:
+                await cur.execute(sql, params)
+                rows = await cur.fetchall()
+                timed.rows = len(rows)
+            return rows
+
+
+def _values_placeholders(row_width: int, row_count: int) -> str:
+    row = "(" + ", ".join(["%s"] * row_width) + ")"
+    return ", ".join([row] * row_count)
 
 
 # telegram_user
@@ -45,6 +102,17 @@ async def upsert_telegram_user(chat_id: int, user_id: int, username: str | None,
     await _execute(sql, (chat_id, user_id, username, first_name, last_name, int(is_bot), language_code))
 
 
+async def get_telegram_users(chat_id: int, user_ids: List[int]) -> List[Dict[str, Any]]:
+    if not user_ids:
+        return []
+    placeholders = ", ".join(["%s"] * len(user_ids))
+    sql = f"""
+    SELECT user_id, username, first_name, last_name FROM telegram_user
+    WHERE chat_id = %s AND user_id IN ({placeholders})
+    """
+    return await _fetchall(sql, (chat_id, *user_ids))
+
+
 # daily_checkins
 async def insert_or_increment_daily_checkin(chat_id: int, user_id: int, checkin_date: date, message_id: int, message_time: datetime) -> None:
     sql = """
@@ -58,6 +126,22 @@ async def insert_or_increment_daily_checkin(chat_id: int, user_id: int, checkin_
     await _execute(sql, (chat_id, user_id, checkin_date, message_id, message_time))
 
 
+async def bulk_upsert_daily_checkins(rows: List[tuple]) -> None:
+    """rows: (chat_id, user_id, checkin_date, message_id, message_time)，一条多行 upsert。"""
+    if not rows:
+        return
+    placeholders = _values_placeholders(5, len(rows))
+    sql = f"""
+    INSERT INTO daily_checkins (chat_id, user_id, checkin_date, message_id, message_time)
+    VALUES {placeholders}
+    ON DUPLICATE KEY UPDATE
+        message_id = VALUES(message_id),
+        message_time = VALUES(message_time),
+        updated_at = CURRENT_TIMESTAMP
+    """
+    await _execute(sql, [value for row in rows for value in row])
+
+
 async def get_user_checkin_for_date(chat_id: int, user_id: int, checkin_date: date) -> Optional[Dict[str, Any]]:
     sql = """
     SELECT * FROM daily_checkins
@@ -85,13 +169,45 @@ async def count_distinct_users_for_date(chat_id: int, checkin_date: date) -> int
     return int(row["cnt"]) if row else 0
 
 
-async def delete_checkins_before_date(chat_id: int, cutoff_date: date) -> int:
-    sql = "DELETE FROM daily_checkins WHERE chat_id = %s AND checkin_date < %s"
-    pool = get_db_pool()
-    async with pool.acquire() as conn:
-        async with conn.cursor(asyncmy.cursors.DictCursor) as cur:
-            await cur.execute(sql, (chat_id, cutoff_date))
-            return cur.rowcount
+async def delete_checkins_before_date_chunk(chat_id: int, cutoff_date: date, limit: int) -> int:
+    """Delete at most `limit` of the oldest rows before cutoff; callers loop until fewer than limit are deleted."""
+    sql = """
+    DELETE FROM daily_checkins
+    WHERE chat_id = %s AND checkin_date < %s
+    ORDER BY checkin_date
+    LIMIT %s
+    """
+    return await _execute_rowcount(sql, (chat_id, cutoff_date, limit))
+
+
+async def list_checkin_partitions() -> List[Dict[str, Any]]:
+    """Partitions of daily_checkins in order; bound is the exclusive upper date ("'2025-02-01'" or "MAXVALUE")."""
+    sql = """
+    SELECT PARTITION_NAME AS name, PARTITION_DESCRIPTION AS bound
+    FROM information_schema.PARTITIONS
+    WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'daily_checkins' AND PARTITION_NAME IS NOT NULL
+    ORDER BY PARTITION_ORDINAL_POSITION
+    """
+    return await _fetchall(sql)
+
+
+async def drop_checkin_partitions(names: List[str]) -> None:
+    if not names:
+        return
+    await _execute(f"ALTER TABLE daily_checkins DROP PARTITION {', '.join(names)}", ())
+
+
+async def split_checkin_max_partition(max_name: str, partitions: List[tuple]) -> None:
+    """partitions: (name, exclusive upper date) carved out of the MAXVALUE partition, oldest first."""
+    if not partitions:
+        return
+    parts = ", ".join(f"PARTITION {name} VALUES LESS THAN ('{bound.isoformat()}')" for name, bound in partitions)
+    sql = f"""
+    ALTER TABLE daily_checkins REORGANIZE PARTITION {max_name} INTO (
+        {parts}, PARTITION {max_name} VALUES LESS THAN (MAXVALUE)
+    )
+    """
+    await _execute(sql, ())
 
 
 async def get_user_ids_for_date(chat_id: int, checkin_date: date) -> List[int]:
@@ -111,12 +227,226 @@ async def get_weekly_checkin_counts_for_all_users(chat_id: int, start_date: date
     return {int(r["user_id"]): int(r["cnt"]) for r in rows}
 
 
+async def get_existing_checkin_keys(chat_id: int, keys: List[tuple]) -> List[tuple]:
+    """keys: (user_id, checkin_date)；返回其中已存在于 daily_checkins 的部分。"""
+    if not keys:
+        return []
+    placeholders = ", ".join(["(%s, %s)"] * len(keys))
+    sql = f"""
+    SELECT user_id, checkin_date FROM daily_checkins
+    WHERE chat_id = %s AND (user_id, checkin_date) IN ({placeholders})
+    """
+    rows = await _fetchall(sql, (chat_id, *[value for key in keys for value in key]))
+    return [(int(r["user_id"]), r["checkin_date"]) for r in rows]
+
+
+async def get_first_checkin_dates(chat_id: int, user_ids: List[int]) -> Dict[int, date]:
+    if not user_ids:
+        return {}
+    placeholders = ", ".join(["%s"] * len(user_ids))
+    sql = f"""
+    SELECT user_id, first_date FROM user_first_checkins
+    WHERE chat_id = %s AND user_id IN ({placeholders})
+    """
+    rows = await _fetchall(sql, (chat_id, *user_ids))
+    return {int(r["user_id"]): r["first_date"] for r in rows}
+
+
+# user_first_checkins
+async def bulk_upsert_first_checkin_dates(rows: List[tuple]) -> None:
+    """rows: (chat_id, user_id, first_date); an existing earlier date is kept."""
+    if not rows:
+        return
+    sql = f"""
+    INSERT INTO user_first_checkins (chat_id, user_id, first_date)
+    VALUES {_values_placeholders(3, len(rows))}
+    ON DUPLICATE KEY UPDATE first_date = LEAST(first_date, VALUES(first_date))
+    """
+    await _execute(sql, [value for row in rows for value in row])
+
+
+async def sync_first_checkin_dates(chat_id: int) -> int:
+    """Lower first_date to MIN(checkin_date) of the remaining raw rows (backfills / imports)."""
+    sql = """
+    INSERT INTO user_first_checkins (chat_id, user_id, first_date)
+    SELECT chat_id, user_id, MIN(checkin_date) FROM daily_checkins
+    WHERE chat_id = %s
+    GROUP BY chat_id, user_id
+    ON DUPLICATE KEY UPDATE first_date = LEAST(first_date, VALUES(first_date))
+    """
+    return await _execute_rowcount(sql, (chat_id,))
+
+
+async def has_first_checkin_dates(chat_id: int) -> bool:
+    row = await _fetchone("SELECT 1 AS found FROM user_first_checkins WHERE chat_id = %s LIMIT 1", (chat_id,))
+    return bool(row)
+
+
+# daily_checkin_rollups
+async def bulk_increment_checkin_rollups(rows: List[tuple]) -> None:
+    """rows: (chat_id, checkin_date, user_delta, new_user_delta, message_delta)"""
+    if not rows:
+        return
+    sql = f"""
+    INSERT INTO daily_checkin_rollups (chat_id, checkin_date, user_count, new_user_count, message_count)
+    VALUES {_values_placeholders(5, len(rows))}
+    ON DUPLICATE KEY UPDATE
+        user_count = user_count + VALUES(user_count),
+        new_user_count = new_user_count + VALUES(new_user_count),
+        message_count = message_count + VALUES(message_count)
+    """
+    await _execute(sql, [value for row in rows for value in row])
+
+
+async def get_checkin_rollups(chat_id: int, start_date: date, end_date: date) -> List[Dict[str, Any]]:
+    sql = """
+    SELECT checkin_date, user_count, new_user_count, message_count
+    FROM daily_checkin_rollups
+    WHERE chat_id = %s AND checkin_date BETWEEN %s AND %s
+    ORDER BY checkin_date
+    """
+    return await _fetchall(sql, (chat_id, start_date, end_date))
+
+
+async def get_rollup_user_count(chat_id: int, checkin_date: date) -> int:
+    sql = "SELECT user_count FROM daily_checkin_rollups WHERE chat_id = %s AND checkin_date = %s"
+    row = await _fetchone(sql, (chat_id, checkin_date))
+    return int(row["user_count"]) if row else 0
+
+
+async def has_checkin_rollups(chat_id: int) -> bool:
+    row = await _fetchone("SELECT 1 AS found FROM daily_checkin_rollups WHERE chat_id = %s LIMIT 1", (chat_id,))
+    return bool(row)
+
+
+async def get_checkin_date_bounds(chat_id: int) -> Optional[Dict[str, Any]]:
+    sql = "SELECT MIN(checkin_date) AS first_date, MAX(checkin_date) AS last_date FROM daily_checkins WHERE chat_id = %s"
+    row = await _fetchone(sql, (chat_id,))
+    return row if row and row.get("first_date") else None
+
+
+async def count_distinct_users_between(chat_id: int, start_date: date, end_date: date) -> int:
+    sql = """
+    SELECT COUNT(DISTINCT user_id) AS cnt FROM daily_checkins
+    WHERE chat_id = %s AND checkin_date BETWEEN %s AND %s
+    """
+    row = await _fetchone(sql, (chat_id, start_date, end_date))
+    return int(row["cnt"]) if row else 0
+
+
+async def rebuild_checkin_rollups(chat_id: int, start_date: date, end_date: date) -> int:
+    """
+    Recompute rollups for a date range from daily_checkins; new users come from user_first_checkins.
+    Raw rows keep no per-message history, so message_count is only raised to at least user_count.
+    """
+    sql = """
+    INSERT INTO daily_checkin_rollups (chat_id, checkin_date, user_count, new_user_count, message_count)
+    SELECT d.chat_id, d.checkin_date, COUNT(*), COALESCE(SUM(f.first_date = d.checkin_date), 0), COUNT(*)
+    FROM daily_checkins d
+    LEFT JOIN user_first_checkins f ON f.chat_id = d.chat_id AND f.user_id = d.user_id
+    WHERE d.chat_id = %s AND d.checkin_date BETWEEN %s AND %s
+    GROUP BY d.chat_id, d.checkin_date
+    ON DUPLICATE KEY UPDATE
+        user_count = VALUES(user_count),
+        new_user_count = VALUES(new_user_count),
+        message_count = GREATEST(message_count, VALUES(message_count))
+    """
+    return await _execute_rowcount(sql, (chat_id, start_date, end_date))
+
+
+# user_week_attendance
+async def bulk_increment_week_attendance(rows: List[tuple]) -> None:
+    """
+    rows: (chat_id, user_id, week_start, checkin_date), only for check-ins that did not exist yet.
+    Rows of one user must be sorted by checkin_date: MySQL applies them in order and evaluates the
+    UPDATE assignments left to right, so current_streak is computed against the previous last_date.
+    """
+    if not rows:
+        return
+    sql = f"""
+    INSERT INTO user_week_attendance (chat_id, user_id, week_start, days, last_date, current_streak)
+    VALUES {_values_placeholders(6, len(rows))}
+    ON DUPLICATE KEY UPDATE
+        current_streak = IF(
+            VALUES(last_date) = last_date + INTERVAL 1 DAY,
+            current_streak + 1,
+            IF(VALUES(last_date) > last_date, 1, current_streak)
+        ),
+        days = days + 1,
+        last_date = GREATEST(last_date, VALUES(last_date))
+    """
+    params = []
+    for chat_id, user_id, week_start, checkin_date in rows:
+        params.extend((chat_id, user_id, week_start, 1, checkin_date, 1))
+    await _execute(sql, params)
+
+
+async def get_user_week_attendance(chat_id: int, user_id: int, week_start: date) -> Optional[Dict[str, Any]]:
+    sql = """
+    SELECT days, last_date, current_streak FROM user_week_attendance
+    WHERE chat_id = %s AND user_id = %s AND week_start = %s
+    """
+    return await _fetchone(sql, (chat_id, user_id, week_start))
+
+
+async def count_week_attendance_users(chat_id: int, week_start: date) -> int:
+    sql = "SELECT COUNT(*) AS cnt FROM user_week_attendance WHERE chat_id = %s AND week_start = %s"
+    row = await _fetchone(sql, (chat_id, week_start))
+    return int(row["cnt"]) if row else 0
+
+
+async def get_week_attendance_counts(chat_id: int, week_start: date) -> Dict[int, int]:
+    sql = "SELECT user_id, days FROM user_week_attendance WHERE chat_id = %s AND week_start = %s"
+    rows = await _fetchall(sql, (chat_id, week_start))
+    return {int(r["user_id"]): int(r["days"]) for r in rows}
+
+
+async def has_week_attendance(chat_id: int) -> bool:
+    row = await _fetchone("SELECT 1 AS found FROM user_week_attendance WHERE chat_id = %s LIMIT 1", (chat_id,))
+    return bool(row)
+
+
+async def rebuild_week_attendance(chat_id: int, start_date: date, end_date: date) -> int:
+    """
+    Recompute attendance for whole weeks; start_date must be a Monday and end_date a Sunday.
+    Streak = size of the last run of consecutive dates (gaps-and-islands: date - row_number is constant within a run).
+    """
+    sql = """
+    INSERT INTO user_week_attendance (chat_id, user_id, week_start, days, last_date, current_streak)
+    SELECT chat_id, user_id, week_start, COUNT(*), MAX(checkin_date), SUM(island = last_island)
+    FROM (
+        SELECT chat_id, user_id, week_start, checkin_date, island,
+               MAX(island) OVER (PARTITION BY user_id, week_start) AS last_island
+        FROM (
+            SELECT chat_id, user_id, checkin_date,
+                   checkin_date - INTERVAL WEEKDAY(checkin_date) DAY AS week_start,
+                   checkin_date - INTERVAL ROW_NUMBER() OVER (
+                       PARTITION BY user_id, checkin_date - INTERVAL WEEKDAY(checkin_date) DAY
+                       ORDER BY checkin_date
+                   ) DAY AS island
+            FROM daily_checkins
+            WHERE chat_id = %s AND checkin_date BETWEEN %s AND %s
+        ) numbered
+    ) runs
+    GROUP BY chat_id, user_id, week_start
+    ON DUPLICATE KEY UPDATE
+        days = VALUES(days),
+        last_date = VALUES(last_date),
+        current_streak = VALUES(current_streak)
+    """
+    return await _execute_rowcount(sql, (chat_id, start_date, end_date))
+
+
 # lottery_settings
 async def get_lottery_settings(chat_id: int) -> Optional[Dict[str, Any]]:
     sql = "SELECT * FROM lottery_settings WHERE chat_id = %s LIMIT 1"
     return await _fetchone(sql, (chat_id,))
 
 
+async def list_lottery_settings() -> List[Dict[str, Any]]:
+    return await _fetchall("SELECT * FROM lottery_settings ORDER BY chat_id")
+
+
 async def insert_default_lottery_settings(chat_id: int, timezone: str) -> None:
     sql = """
     INSERT INTO lottery_settings (chat_id, weekly_enabled, weekly_draw_at, full_attendance_factor, timezone)
@@ -244,6 +574,23 @@ async def insert_lottery_round_entry(round_id: int, chat_id: int, user_id: int,
     await _execute(sql, (round_id, chat_id, user_id, checkin_days, weight, int(is_full_attendance), extra_info_json))
 
 
+async def bulk_insert_lottery_round_entries(rows: List[tuple]) -> None:
+    """rows: (round_id, chat_id, user_id, checkin_days, weight, is_full_attendance, extra_info_json)"""
+    if not rows:
+        return
+    sql = f"""
+    INSERT INTO lottery_round_entries (round_id, chat_id, user_id, checkin_days, weight, is_full_attendance, extra_info_json)
+    VALUES {_values_placeholders(7, len(rows))}
+    ON DUPLICATE KEY UPDATE
+        checkin_days = VALUES(checkin_days),
+        weight = VALUES(weight),
+        is_full_attendance = VALUES(is_full_attendance),
+        extra_info_json = VALUES(extra_info_json),
+        created_at = created_at
+    """
+    await _execute(sql, [value for row in rows for value in row])
+
+
 async def get_entries_for_round(round_id: int) -> List[Dict[str, Any]]:
     sql = "SELECT * FROM lottery_round_entries WHERE round_id = %s"
     return await _fetchall(sql, (round_id,))
@@ -263,6 +610,22 @@ async def insert_lottery_winner(round_id: int, chat_id: int, user_id: int, prize
     await _execute(sql, (round_id, chat_id, user_id, prize_set_id, prize_name, prize_description, prize_rank))
 
 
+async def bulk_insert_lottery_winners(rows: List[tuple]) -> None:
+    """rows: (round_id, chat_id, user_id, prize_set_id, prize_name, prize_description, prize_rank)"""
+    if not rows:
+        return
+    sql = f"""
+    INSERT INTO lottery_winners (round_id, chat_id, user_id, prize_set_id, prize_name, prize_description, prize_rank)
+    VALUES {_values_placeholders(7, len(rows))}
+    ON DUPLICATE KEY UPDATE
+        prize_name = VALUES(prize_name),
+        prize_description = VALUES(prize_description),
+        prize_rank = VALUES(prize_rank),
+        updated_at = CURRENT_TIMESTAMP
+    """
+    await _execute(sql, [value for row in rows for value in row])
+
+
 async def get_winners_for_round(round_id: int) -> List[Dict[str, Any]]:
     sql = "SELECT * FROM lottery_winners WHERE round_id = %s ORDER BY prize_rank ASC, id ASC"
     return await _fetchall(sql, (round_id,))
@@ -280,3 +643,61 @@ async def insert_admin_action(chat_id: int, admin_user_id: int, action_type: str
     VALUES (%s, %s, %s, %s)
     """
     await _execute(sql, (chat_id, admin_user_id, action_type, payload_json))
+
+
+# cold-storage archive: rows whose archive_date is before a cutoff
+# (daily_checkins by checkin_date, round entries / winners by the round's period_end_date)
+_ARCHIVE_SOURCES = {
+    "daily_checkins": (
+        "SELECT t.*, t.checkin_date AS archive_date FROM daily_checkins t",
+        "t.checkin_date < %s",
+    ),
+    "lottery_round_entries": (
+        "SELECT t.*, r.period_end_date AS archive_date FROM lottery_round_entries t JOIN lottery_rounds r ON r.id = t.round_id",
+        "r.period_end_date < %s",
+    ),
+    "lottery_winners": (
+        "SELECT t.*, r.period_end_date AS archive_date FROM lottery_winners t JOIN lottery_rounds r ON r.id = t.round_id",
+        "r.period_end_date < %s",
+    ),
+}
+_ARCHIVE_DELETE_FILTERS = {
+    "daily_checkins": "checkin_date < %s",
+    "lottery_round_entries": "round_id IN (SELECT id FROM lottery_rounds WHERE period_end_date < %s)",
+    "lottery_winners": "round_id IN (SELECT id FROM lottery_rounds WHERE period_end_date < %s)",
+}
+
+
+async def stream_archive_rows(table: str, cutoff_date: date, batch_size: int = 1000) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Yield the table's rows before cutoff ordered by (archive_date, id) through a server-side
+    cursor, so only batch_size rows are held in memory. Pins one pooled connection until exhausted.
+    """
+    select, where = _ARCHIVE_SOURCES[table]
+    sql = f"{select} WHERE {where} ORDER BY archive_date, t.id"
+    async with acquire_connection() as conn:
+        async with conn.cursor(asyncmy.cursors.SSDictCursor) as cur:
+            # 客户端写文件期间服务端会等待，放宽写超时避免长时间导出被断开
+            await cur.execute("SET SESSION net_write_timeout = 600")
+            with _Timed("stream_archive_rows", sql, (cutoff_date,)):
+                await cur.execute(sql, (cutoff_date,))
+            while True:
+                rows = await cur.fetchmany(batch_size)
+                if not rows:
+                    break
+                for row in rows:
+                    yield row
+
+
+async def count_archive_rows(table: str, cutoff_date: date, max_id: int) -> int:
+    select, where = _ARCHIVE_SOURCES[table]
+    from_clause = select.split(" FROM ", 1)[1]
+    sql = f"SELECT COUNT(*) AS cnt FROM {from_clause} WHERE {where} AND t.id <= %s"
+    row = await _fetchone(sql, (cutoff_date, max_id))
+    return int(row["cnt"]) if row else 0
+
+
+async def delete_archived_rows_chunk(table: str, cutoff_date: date, max_id: int, limit: int) -> int:
+    """Delete at most `limit` archived rows (id <= max_id, so rows written after the export are kept)."""
+    sql = f"DELETE FROM {table} WHERE {_ARCHIVE_DELETE_FILTERS[table]} AND id <= %s ORDER BY id LIMIT %s"
+    return await _execute_rowcount(sql, (cutoff_date, max_id, limit))
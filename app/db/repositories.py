@@ -4,14 +4,94 @@ Repository layer built on top of queries.py.
 
 import json
 from datetime import date, datetime
-from typing import Dict, List, Optional
-
-from app.db import queries
-
-
-class CheckinRepository:
-    async def mark_checkin(self, chat_id: int, user_id: int, checkin_date: date, message_id: int, message_time: datetime) -> None:
-        await queries.insert_or_increment_daily_checkin(chat_id, user_id, checkin_date, message_id, message_time)
+from typing import AsyncIterator, Dict, Iterator, List, Optional
+
+from app.db.backend import db_session, in_transaction, is_duplicate_key, queries
+from app.utils import time_utils
+
+
+def _chunks(rows: List, size: int) -> Iterator[List]:
+    for i in range(0, len(rows), size):
+        yield rows[i : i + size]
+
+
+class BaseRepository:
+    def session(self, transaction: bool = False):
+        """Pin one connection for a block; every repository call inside it reuses that connection."""
+        return db_session(transaction=transaction)
+
+    def in_transaction(self) -> bool:
+        return in_transaction()
+
+
+class TelegramUserRepository(BaseRepository):
+    async def upsert_user(self, chat_id: int, user_id: int, username: str | None, first_name: str | None, last_name: str | None, is_bot: bool, language_code: str | None) -> None:
+        await queries.upsert_telegram_user(chat_id, user_id, username, first_name, last_name, is_bot, language_code)
+
+    async def get_users(self, chat_id: int, user_ids: List[int]) -> Dict[int, Dict]:
+        rows = await queries.get_telegram_users(chat_id, list(user_ids))
+        return {int(r["user_id"]): r for r in rows}
+
+
+class CheckinRepository(BaseRepository):
+    async def mark_checkin(self, chat_id: int, user_id: int, checkin_date: date, message_id: int, message_time: datetime) -> bool:
+        new_keys = await self.record_checkins([(chat_id, user_id, checkin_date, message_id, message_time)])
+        return bool(new_keys)
+
+    async def mark_checkins_bulk(self, rows: List[tuple]) -> None:
+        """Raw upsert without rollup maintenance (imports / backfills; rebuild rollups afterwards)."""
+        await queries.bulk_upsert_daily_checkins(rows)
+
+    async def record_checkins(self, rows: List[tuple]) -> List[tuple]:
+        """
+        Upsert check-ins and bump daily_checkin_rollups / user_week_attendance for every
+        (chat, user, date) seen for the first time.
+        rows: (chat_id, user_id, checkin_date, message_id, message_time). Returns the newly created keys.
+        """
+        if not rows:
+            return []
+        by_chat: Dict[int, List[tuple]] = {}
+        for row in rows:
+            by_chat.setdefault(row[0], []).append(row)
+
+        new_keys: List[tuple] = []
+        async with self.session(transaction=True):
+            for chat_id, chat_rows in by_chat.items():
+                keys = list(dict.fromkeys((r[1], r[2]) for r in chat_rows))
+                existing = set(await queries.get_existing_checkin_keys(chat_id, keys))
+                fresh = sorted((k for k in keys if k not in existing), key=lambda k: k[1])
+                first_dates = await queries.get_first_checkin_dates(chat_id, list({uid for uid, _ in fresh})) if fresh else {}
+
+                await queries.bulk_upsert_daily_checkins(chat_rows)
+
+                increments: Dict[date, List[int]] = {}
+                first_updates: Dict[int, date] = {}
+                for user_id, checkin_date in fresh:
+                    first = first_dates.get(user_id)
+                    is_new_user = first is None or checkin_date < first
+                    if is_new_user:
+                        if first is not None:
+                            # 迟到的更早记录（如重试的写回批次）：原首次打卡日不再算新用户
+                            increments.setdefault(first, [0, 0])[1] -= 1
+                        first_dates[user_id] = checkin_date
+                        first_updates[user_id] = checkin_date
+                    counts = increments.setdefault(checkin_date, [0, 0])
+                    counts[0] += 1
+                    counts[1] += int(is_new_user)
+                    new_keys.append((chat_id, user_id, checkin_date))
+                await queries.bulk_increment_checkin_rollups(
+                    [(chat_id, d, users, new_users, 0) for d, (users, new_users) in increments.items()]
+                )
+                await queries.bulk_upsert_first_checkin_dates([(chat_id, uid, d) for uid, d in first_updates.items()])
+                # fresh 已按日期排序，同一用户跨天的多行按顺序累加连续打卡
+                await queries.bulk_increment_week_attendance(
+                    [(chat_id, user_id, time_utils.get_week_start_end(d)[0], d) for user_id, d in fresh]
+                )
+        return new_keys
+
+    async def add_message_counts(self, counts: Dict[tuple, int]) -> None:
+        """counts: (chat_id, checkin_date) -> messages seen since the last flush."""
+        await queries.bulk_increment_checkin_rollups([(chat_id, d, 0, 0, n) for (chat_id, d), n in counts.items()])
 
     async def get_today_checkin(self, chat_id: int, user_id: int, checkin_date: date) -> Optional[Dict]:
         return await queries.get_user_checkin_for_date(chat_id, user_id, checkin_date)
@@ -19,20 +99,65 @@ class CheckinRepository:
     async def get_week_checkin_count(self, chat_id: int, user_id: int, week_start: date, week_end: date) -> int:
         return await queries.count_user_checkins_between(chat_id, user_id, week_start, week_end)
 
+    async def get_week_attendance(self, chat_id: int, user_id: int, week_start: date) -> Optional[Dict]:
+        return await queries.get_user_week_attendance(chat_id, user_id, week_start)
+
+    async def count_week_participants(self, chat_id: int, week_start: date) -> int:
+        return await queries.count_week_attendance_users(chat_id, week_start)
+
+    async def get_week_attendance_counts(self, chat_id: int, week_start: date) -> Dict[int, int]:
+        return await queries.get_week_attendance_counts(chat_id, week_start)
+
+    async def has_week_attendance(self, chat_id: int) -> bool:
+        return await queries.has_week_attendance(chat_id)
+
+    async def rebuild_week_attendance(self, chat_id: int, start_date: date, end_date: date) -> int:
+        return await queries.rebuild_week_attendance(chat_id, start_date, end_date)
+
     async def count_yesterday_checkins(self, chat_id: int, target_date: date) -> int:
-        return await queries.count_distinct_users_for_date(chat_id, target_date)
+        return await queries.get_rollup_user_count(chat_id, target_date)
 
     async def get_weekly_checkin_counts_for_all_users(self, chat_id: int, week_start: date, week_end: date) -> Dict[int, int]:
         return await queries.get_weekly_checkin_counts_for_all_users(chat_id, week_start, week_end)
 
-    async def delete_before(self, chat_id: int, cutoff_date: date) -> int:
-        return await queries.delete_checkins_before_date(chat_id, cutoff_date)
+    async def delete_before_chunk(self, chat_id: int, cutoff_date: date, limit: int) -> int:
+        return await queries.delete_checkins_before_date_chunk(chat_id, cutoff_date, limit)
+
+    async def list_partitions(self) -> List[Dict]:
+        return await queries.list_checkin_partitions()
+
+    async def drop_partitions(self, names: List[str]) -> None:
+        await queries.drop_checkin_partitions(names)
+
+    async def add_partitions(self, max_name: str, partitions: List[tuple]) -> None:
+        await queries.split_checkin_max_partition(max_name, partitions)
 
     async def get_user_ids_for_date(self, chat_id: int, checkin_date: date) -> List[int]:
         return await queries.get_user_ids_for_date(chat_id, checkin_date)
 
+    async def get_rollups(self, chat_id: int, start_date: date, end_date: date) -> List[Dict]:
+        return await queries.get_checkin_rollups(chat_id, start_date, end_date)
+
+    async def count_distinct_users_between(self, chat_id: int, start_date: date, end_date: date) -> int:
+        return await queries.count_distinct_users_between(chat_id, start_date, end_date)
+
+    async def has_rollups(self, chat_id: int) -> bool:
+        return await queries.has_checkin_rollups(chat_id)
+
+    async def get_date_bounds(self, chat_id: int) -> Optional[Dict]:
+        return await queries.get_checkin_date_bounds(chat_id)
 
-class SettingsRepository:
+    async def rebuild_rollups(self, chat_id: int, start_date: date, end_date: date) -> int:
+        return await queries.rebuild_checkin_rollups(chat_id, start_date, end_date)
+
+    async def has_first_checkin_dates(self, chat_id: int) -> bool:
+        return await queries.has_first_checkin_dates(chat_id)
+
+    async def sync_first_checkin_dates(self, chat_id: int) -> int:
+        return await queries.sync_first_checkin_dates(chat_id)
+
+
+class SettingsRepository(BaseRepository):
     async def get_or_create_settings(self, chat_id: int, timezone: str) -> Dict:
         row = await queries.get_lottery_settings(chat_id)
         if not row:
@@ -52,8 +177,11 @@ class SettingsRepository:
     async def get_settings(self, chat_id: int) -> Optional[Dict]:
         return await queries.get_lottery_settings(chat_id)
 
+    async def list_settings(self) -> List[Dict]:
+        return await queries.list_lottery_settings()
 
-class PrizeRepository:
+
+class PrizeRepository(BaseRepository):
     async def get_prize_set_for_period(self, chat_id: int, set_type: str, period_start: date, period_end: date) -> Optional[Dict]:
         return await queries.get_prize_set_for_period(chat_id, set_type, period_start, period_end)
 
@@ -73,13 +201,25 @@ class PrizeRepository:
         await queries.update_prize_item_enabled(item_id, enabled)
 
 
-class LotteryRepository:
+class LotteryRepository(BaseRepository):
+    def __init__(self, bulk_chunk_size: int = 500):
+        self.bulk_chunk_size = max(1, bulk_chunk_size)
+
     async def get_round_by_period(self, chat_id: int, round_type: str, period_start: date, period_end: date) -> Optional[Dict]:
         return await queries.get_round_by_period(chat_id, round_type, period_start, period_end)
 
     async def create_round(self, chat_id: int, round_type: str, period_start_date: date, period_end_date: date, note: str | None, prize_set_id: int | None) -> int:
         return await queries.create_lottery_round(chat_id, round_type, period_start_date, period_end_date, note, prize_set_id)
 
+    async def claim_round(self, chat_id: int, round_type: str, period_start_date: date, period_end_date: date, note: str | None, prize_set_id: int | None) -> Optional[int]:
+        """Create the round; returns None if another worker already created the same period (unique key)."""
+        try:
+            return await self.create_round(chat_id, round_type, period_start_date, period_end_date, note, prize_set_id)
+        except Exception as e:
+            if is_duplicate_key(e):
+                return None
+            raise
+
     async def complete_round(self, round_id: int, total_participants: int, total_tickets: int) -> None:
         await queries.mark_lottery_round_completed(round_id, total_participants, total_tickets)
 
@@ -87,20 +227,24 @@ class LotteryRepository:
         await queries.update_lottery_round_status(round_id, status)
 
     async def add_entries(self, round_id: int, entries: List[Dict]) -> None:
-        for e in entries:
-            await queries.insert_lottery_round_entry(
+        rows = [
+            (
                 round_id,
                 e["chat_id"],
                 e["user_id"],
                 e["checkin_days"],
                 e["weight"],
-                e.get("is_full_attendance", False),
+                int(e.get("is_full_attendance", False)),
                 json.dumps(e.get("extra_info")) if e.get("extra_info") else None,
             )
+            for e in entries
+        ]
+        for chunk in _chunks(rows, self.bulk_chunk_size):
+            await queries.bulk_insert_lottery_round_entries(chunk)
 
     async def add_winners(self, round_id: int, winners: List[Dict]) -> None:
-        for w in winners:
-            await queries.insert_lottery_winner(
+        rows = [
+            (
                 round_id,
                 w["chat_id"],
                 w["user_id"],
@@ -109,6 +253,10 @@ class LotteryRepository:
                 w.get("prize_description"),
                 w.get("prize_rank", 1),
             )
+            for w in winners
+        ]
+        for chunk in _chunks(rows, self.bulk_chunk_size):
+            await queries.bulk_insert_lottery_winners(chunk)
 
     async def get_entries(self, round_id: int) -> List[Dict]:
         return await queries.get_entries_for_round(round_id)
@@ -117,7 +265,22 @@ class LotteryRepository:
         return await queries.get_winners_for_round(round_id)
 
 
-class AdminActionRepository:
+
+class ArchiveRepository(BaseRepository):
+    TABLES = ("daily_checkins", "lottery_round_entries", "lottery_winners")
+
+    def stream_rows(self, table: str, cutoff: date, batch_size: int = 1000) -> AsyncIterator[Dict]:
+        """Rows before cutoff ordered by (archive_date, id); each row carries an extra archive_date column."""
+        return queries.stream_archive_rows(table, cutoff, batch_size)
+
+    async def count_rows(self, table: str, cutoff: date, max_id: int) -> int:
+        return await queries.count_archive_rows(table, cutoff, max_id)
+
+    async def delete_chunk(self, table: str, cutoff: date, max_id: int, limit: int) -> int:
+        return await queries.delete_archived_rows_chunk(table, cutoff, max_id, limit)
+
+
+class AdminActionRepository(BaseRepository):
     async def log_action(self, chat_id: int, admin_user_id: int, action_type: str, payload: dict) -> None:
         payload_json = json.dumps(payload, ensure_ascii=False) if payload else None
         await queries.insert_admin_action(chat_id, admin_user_id, action_type, payload_json)
@@ -0,0 +1,153 @@
+"""
+Slow-query log for the helpers in app/db/queries.py.
+
+Statements over the threshold are logged with the query function name, the
+shape of their parameters (types and counts only, never values) and the row
+count, and kept in a top-N list for /admin_slow_queries. An EXPLAIN plan is
+captured in the background on a separate connection, at most once per query
+name per interval and one at a time, so a slow period cannot amplify load.
+"""
+
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from collections import Counter
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import asyncmy
+
+from app.config import DbConfig
+
+logger = logging.getLogger(__name__)
+
+# 参数超过该数量时只汇总类型计数（批量写入动辄上千个参数）
+MAX_LISTED_PARAMS = 8
+
+
+def describe_params(params) -> str:
+    if not params:
+        return "()"
+    names = [type(p).__name__ for p in params]
+    if len(names) <= MAX_LISTED_PARAMS:
+        return "(" + ", ".join(names) + ")"
+    counts = ", ".join(f"{name}×{n}" for name, n in Counter(names).most_common())
+    return f"[{len(names)}: {counts}]"
+
+
+def _explainable(sql: str) -> bool:
+    head = sql.lstrip().split(None, 1)[0].upper() if sql.strip() else ""
+    return head in ("SELECT", "UPDATE", "DELETE") or (head == "INSERT" and "SELECT" in sql.upper())
+
+
+class SlowQueryLog:
+    def __init__(self, threshold_ms: float = 200, top_n: int = 20, explain_interval_seconds: float = 60):
+        self.threshold_ms = threshold_ms
+        self.top_n = max(1, top_n)
+        self.explain_interval_seconds = explain_interval_seconds
+        self.db_config: Optional[DbConfig] = None
+        self.total = 0
+        self._top: List[tuple] = []  # min-heap of (elapsed_ms, seq, entry)
+        self._seq = itertools.count()
+        self._last_explain: Dict[str, float] = {}
+        self._explain_task: Optional[asyncio.Task] = None
+        self._conn: Optional[asyncmy.Connection] = None
+
+    def configure(self, db_config: Optional[DbConfig], threshold_ms: float, top_n: int, explain_interval_seconds: float) -> None:
+        self.db_config = db_config
+        self.threshold_ms = threshold_ms
+        self.top_n = max(1, top_n)
+        self.explain_interval_seconds = explain_interval_seconds
+
+    def observe(self, name: str, sql: str, params, elapsed: float, rows: Optional[int]) -> None:
+        elapsed_ms = elapsed * 1000
+        if self.threshold_ms <= 0 or elapsed_ms < self.threshold_ms:
+            return
+        self.total += 1
+        entry = {
+            "name": name,
+            "elapsed_ms": elapsed_ms,
+            "params": describe_params(params),
+            "rows": rows,
+            "at": datetime.now(),
+            "plan": None,
+        }
+        logger.warning("Slow query %s took %.0f ms params=%s rows=%s", name, elapsed_ms, entry["params"], rows)
+        item = (elapsed_ms, next(self._seq), entry)
+        if len(self._top) < self.top_n:
+            heapq.heappush(self._top, item)
+        elif elapsed_ms > self._top[0][0]:
+            heapq.heapreplace(self._top, item)
+        self._maybe_explain(entry, sql, params)
+
+    def top(self, n: Optional[int] = None) -> List[dict]:
+        entries = [e for _, _, e in sorted(self._top, key=lambda item: item[0], reverse=True)]
+        return entries[:n] if n else entries
+
+    async def close(self) -> None:
+        if self._explain_task and not self._explain_task.done():
+            self._explain_task.cancel()
+            try:
+                await self._explain_task
+            except asyncio.CancelledError:
+                pass
+        self._close_conn()
+
+    def _maybe_explain(self, entry: dict, sql: str, params) -> None:
+        if self.db_config is None or not _explainable(sql):
+            return
+        if self._explain_task and not self._explain_task.done():
+            return
+        now = time.monotonic()
+        last = self._last_explain.get(entry["name"])
+        if last is not None and now - last < self.explain_interval_seconds:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        self._last_explain[entry["name"]] = now
+        self._explain_task = loop.create_task(self._explain(entry, sql, params))
+
+    async def _explain(self, entry: dict, sql: str, params) -> None:
+        try:
+            if self._conn is None:
+                cfg = self.db_config
+                self._conn = await asyncmy.connect(
+                    host=cfg.host,
+                    port=cfg.port,
+                    user=cfg.user,
+                    password=cfg.password,
+                    db=cfg.database,
+                    autocommit=True,
+                    connect_timeout=cfg.connect_timeout_seconds,
+                )
+            async with self._conn.cursor(asyncmy.cursors.DictCursor) as cur:
+                await cur.execute("EXPLAIN " + sql, params)
+                plan = await cur.fetchall()
+        except Exception as e:
+            logger.warning("EXPLAIN for slow query %s failed: %s", entry["name"], e)
+            self._close_conn()
+            return
+        entry["plan"] = plan
+        logger.warning("EXPLAIN %s: %s", entry["name"], "; ".join(format_plan_row(row) for row in plan))
+
+    def _close_conn(self) -> None:
+        if self._conn:
+            try:
+                self._conn.close()
+            except Exception:
+                pass
+            self._conn = None
+
+
+def format_plan_row(row: dict) -> str:
+    return (
+        f"{row.get('table')} type={row.get('type')} key={row.get('key')} "
+        f"rows={row.get('rows')} extra={row.get('Extra') or '-'}"
+    )
+
+
+slow_query_log = SlowQueryLog()
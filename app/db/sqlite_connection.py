@@ -0,0 +1,175 @@
+"""
+Embedded SQLite storage for single-node deployments (DB_BACKEND=sqlite).
+
+One connection in WAL mode is driven by a single-thread executor. An asyncio
+lock serializes statements and sessions, and db_session pins the lock for a
+block the same way the MySQL db_session pins a pooled connection.
+"""
+
+import asyncio
+import logging
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Any, AsyncIterator, Callable, Optional
+
+from app.config import DbConfig
+from app.db.sqlite_schema import load_sqlite_schema
+
+logger = logging.getLogger(__name__)
+
+
+def _adapt_datetime(value: datetime) -> str:
+    # 与 asyncmy 一致：直接写入墙上时间，丢弃时区信息
+    return value.replace(tzinfo=None).isoformat(" ")
+
+
+def _convert_time(value: bytes) -> timedelta:
+    # MySQL TIME 列经 asyncmy 返回 timedelta，这里保持一致
+    hours, minutes, seconds = (int(float(part)) for part in value.decode().split(":"))
+    return timedelta(hours=hours, minutes=minutes, seconds=seconds)
+
+
+sqlite3.register_adapter(date, lambda value: value.isoformat())
+sqlite3.register_adapter(datetime, _adapt_datetime)
+sqlite3.register_converter("DATE", lambda value: date.fromisoformat(value.decode()))
+sqlite3.register_converter("DATETIME", lambda value: datetime.fromisoformat(value.decode()))
+sqlite3.register_converter("TIME", _convert_time)
+
+
+_conn: Optional[sqlite3.Connection] = None
+_executor: Optional[ThreadPoolExecutor] = None
+_lock: Optional[asyncio.Lock] = None
+
+
+class SqliteSession:
+    """The shared connection pinned to one task for a block of work, optionally inside a transaction."""
+
+    def __init__(self, conn: sqlite3.Connection, owner: Optional[asyncio.Task]):
+        self.conn = conn
+        self.owner = owner
+        self.in_transaction = False
+
+    @asynccontextmanager
+    async def transaction(self) -> AsyncIterator["SqliteSession"]:
+        if self.in_transaction:
+            yield self
+            return
+        await run(self.conn.execute, "BEGIN IMMEDIATE")
+        self.in_transaction = True
+        try:
+            yield self
+        except BaseException:
+            await run(self.conn.rollback)
+            raise
+        else:
+            await run(self.conn.commit)
+        finally:
+            self.in_transaction = False
+
+
+_current_session: ContextVar[Optional[SqliteSession]] = ContextVar("sqlite_session", default=None)
+
+
+async def run(func: Callable, *args: Any) -> Any:
+    """Run a blocking sqlite3 call on the dedicated database thread."""
+    if not _executor:
+        raise RuntimeError("SQLite database not initialized")
+    return await asyncio.get_running_loop().run_in_executor(_executor, func, *args)
+
+
+def _open(path: str) -> sqlite3.Connection:
+    if path != ":memory:":
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(
+        path,
+        detect_types=sqlite3.PARSE_DECLTYPES | sqlite3.PARSE_COLNAMES,
+        isolation_level=None,
+        check_same_thread=False,
+    )
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA foreign_keys=ON")
+    conn.execute("PRAGMA busy_timeout=5000")
+    for statement in load_sqlite_schema():
+        conn.execute(statement)
+    return conn
+
+
+async def init_sqlite(db_config: DbConfig) -> None:
+    global _conn, _executor, _lock
+    if _conn:
+        return
+    started = time.perf_counter()
+    _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sqlite")
+    _lock = asyncio.Lock()
+    _conn = await run(_open, db_config.sqlite_path)
+    logger.info("SQLite database %s ready in %.0f ms", db_config.sqlite_path, (time.perf_counter() - started) * 1000)
+
+
+def _active_session() -> Optional[SqliteSession]:
+    session = _current_session.get()
+    if session and session.owner is asyncio.current_task():
+        return session
+    return None
+
+
+def in_transaction() -> bool:
+    session = _active_session()
+    return bool(session and session.in_transaction)
+
+
+@asynccontextmanager
+async def acquire_connection() -> AsyncIterator[sqlite3.Connection]:
+    """Yield the connection, holding the lock unless the current task already owns a session."""
+    if not _conn:
+        raise RuntimeError("SQLite database not initialized")
+    if _active_session():
+        yield _conn
+        return
+    async with _lock:
+        yield _conn
+
+
+@asynccontextmanager
+async def db_session(transaction: bool = False) -> AsyncIterator[SqliteSession]:
+    """Hold the connection for the block; with transaction=True it commits on success and rolls back on error."""
+    session = _active_session()
+    if session:
+        if transaction:
+            async with session.transaction():
+                yield session
+        else:
+            yield session
+        return
+
+    if not _conn:
+        raise RuntimeError("SQLite database not initialized")
+    async with _lock:
+        session = SqliteSession(_conn, asyncio.current_task())
+        token = _current_session.set(session)
+        try:
+            if transaction:
+                async with session.transaction():
+                    yield session
+            else:
+                yield session
+        finally:
+            _current_session.reset(token)
+
+
+async def close_sqlite() -> None:
+    global _conn, _executor, _lock
+    if _conn:
+        async with _lock:
+            await run(_conn.close)
+        _conn = None
+    if _executor:
+        _executor.shutdown(wait=True)
+        _executor = None
+    _lock = None
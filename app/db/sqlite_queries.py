@@ -0,0 +1,684 @@
+"""
+SQLite implementation of the query surface in app/db/queries.py (DB_BACKEND=sqlite).
+
+Every public function here has the same name, arguments and return shape as its
+MySQL counterpart. ON DUPLICATE KEY UPDATE becomes ON CONFLICT ... DO UPDATE
+and date arithmetic uses date().
+Aggregates over DATE columns carry a [DATE] column type so they come back as
+date objects.
+"""
+
+from datetime import date, datetime
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from app.db.queries import _caller_name, _Timed
+from app.db.sqlite_connection import acquire_connection, run
+
+
+def _run_statement(conn, sql: str, params, fetch: Optional[str]):
+    cur = conn.execute(sql, params)
+    try:
+        if fetch == "one":
+            row = cur.fetchone()
+            return dict(row) if row else None
+        if fetch == "all":
+            return [dict(row) for row in cur.fetchall()]
+        return cur.lastrowid, cur.rowcount
+    finally:
+        cur.close()
+
+
+async def _execute(sql: str, params: tuple | list) -> int:
+    name = _caller_name()
+    async with acquire_connection() as conn:
+        with _Timed(name, sql, params) as timed:
+            lastrowid, rowcount = await run(_run_statement, conn, sql, params, None)
+            timed.rows = rowcount
+        return lastrowid
+
+
+async def _execute_rowcount(sql: str, params: tuple | list) -> int:
+    name = _caller_name()
+    async with acquire_connection() as conn:
+        with _Timed(name, sql, params) as timed:
+            _, rowcount = await run(_run_statement, conn, sql, params, None)
+            timed.rows = rowcount
+        return rowcount
+
+
+async def _fetchone(sql: str, params: tuple | list = ()) -> Optional[Dict[str, Any]]:
+    name = _caller_name()
+    async with acquire_connection() as conn:
+        with _Timed(name, sql, params) as timed:
+            row = await run(_run_statement, conn, sql, params, "one")
+            timed.rows = 1 if row else 0
+        return row
+
+
+async def _fetchall(sql: str, params: tuple | list = ()) -> List[Dict[str, Any]]:
+    name = _caller_name()
+    async with acquire_connection() as conn:
+        with _Timed(name, sql, params) as timed:
+            rows = await run(_run_statement, conn, sql, params, "all")
+            timed.rows = len(rows)
+        return rows
+
+
+def _values_placeholders(row_width: int, row_count: int) -> str:
+    row = "(" + ", ".join(["?"] * row_width) + ")"
+    return ", ".join([row] * row_count)
+
+
+# Monday of the ISO week for a DATE expression (strftime %w: Sunday = 0)
+def _week_start(expr: str) -> str:
+    return f"date({expr}, '-' || ((CAST(strftime('%w', {expr}) AS INTEGER) + 6) % 7) || ' days')"
+
+
+# telegram_user
+async def upsert_telegram_user(chat_id: int, user_id: int, username: str | None, first_name: str | None, last_name: str | None, is_bot: bool, language_code: str | None) -> None:
+    sql = """
+    INSERT INTO telegram_user (chat_id, user_id, username, first_name, last_name, is_bot, language_code)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT (chat_id, user_id) DO UPDATE SET
+        username = excluded.username,
+        first_name = excluded.first_name,
+        last_name = excluded.last_name,
+        is_bot = excluded.is_bot,
+        language_code = excluded.language_code,
+        updated_at = CURRENT_TIMESTAMP
+    """
+    await _execute(sql, (chat_id, user_id, username, first_name, last_name, int(is_bot), language_code))
+
+
+async def get_telegram_users(chat_id: int, user_ids: List[int]) -> List[Dict[str, Any]]:
+    if not user_ids:
+        return []
+    placeholders = ", ".join(["?"] * len(user_ids))
+    sql = f"""
+    SELECT user_id, username, first_name, last_name FROM telegram_user
+    WHERE chat_id = ? AND user_id IN ({placeholders})
+    """
+    return await _fetchall(sql, (chat_id, *user_ids))
+
+
+# daily_checkins
+_UPSERT_CHECKIN = """
+    ON CONFLICT (chat_id, user_id, checkin_date) DO UPDATE SET
+        message_id = excluded.message_id,
+        message_time = excluded.message_time,
+        updated_at = CURRENT_TIMESTAMP
+"""
+
+
+async def insert_or_increment_daily_checkin(chat_id: int, user_id: int, checkin_date: date, message_id: int, message_time: datetime) -> None:
+    sql = f"""
+    INSERT INTO daily_checkins (chat_id, user_id, checkin_date, message_id, message_time)
+    VALUES (?, ?, ?, ?, ?)
+    {_UPSERT_CHECKIN}
+    """
+    await _execute(sql, (chat_id, user_id, checkin_date, message_id, message_time))
+
+
+async def bulk_upsert_daily_checkins(rows: List[tuple]) -> None:
+    """rows: (chat_id, user_id, checkin_date, message_id, message_time)，一条多行 upsert。"""
+    if not rows:
+        return
+    sql = f"""
+    INSERT INTO daily_checkins (chat_id, user_id, checkin_date, message_id, message_time)
+    VALUES {_values_placeholders(5, len(rows))}
+    {_UPSERT_CHECKIN}
+    """
+    await _execute(sql, [value for row in rows for value in row])
+
+
+async def get_user_checkin_for_date(chat_id: int, user_id: int, checkin_date: date) -> Optional[Dict[str, Any]]:
+    sql = """
+    SELECT * FROM daily_checkins
+    WHERE chat_id = ? AND user_id = ? AND checkin_date = ?
+    LIMIT 1
+    """
+    return await _fetchone(sql, (chat_id, user_id, checkin_date))
+
+
+async def count_user_checkins_between(chat_id: int, user_id: int, start_date: date, end_date: date) -> int:
+    sql = """
+    SELECT COUNT(*) AS cnt FROM daily_checkins
+    WHERE chat_id = ? AND user_id = ? AND checkin_date BETWEEN ? AND ?
+    """
+    row = await _fetchone(sql, (chat_id, user_id, start_date, end_date))
+    return int(row["cnt"]) if row else 0
+
+
+async def count_distinct_users_for_date(chat_id: int, checkin_date: date) -> int:
+    sql = """
+    SELECT COUNT(DISTINCT user_id) AS cnt FROM daily_checkins
+    WHERE chat_id = ? AND checkin_date = ?
+    """
+    row = await _fetchone(sql, (chat_id, checkin_date))
+    return int(row["cnt"]) if row else 0
+
+
+async def delete_checkins_before_date_chunk(chat_id: int, cutoff_date: date, limit: int) -> int:
+    """Delete at most `limit` of the oldest rows before cutoff; callers loop until fewer than limit are deleted."""
+    sql = """
+    DELETE FROM daily_checkins WHERE id IN (
+        SELECT id FROM daily_checkins
+        WHERE chat_id = ? AND checkin_date < ?
+        ORDER BY checkin_date
+        LIMIT ?
+    )
+    """
+    return await _execute_rowcount(sql, (chat_id, cutoff_date, limit))
+
+
+# SQLite 没有分区：保留策略只走分批删除
+async def list_checkin_partitions() -> List[Dict[str, Any]]:
+    return []
+
+
+async def drop_checkin_partitions(names: List[str]) -> None:
+    return None
+
+
+async def split_checkin_max_partition(max_name: str, partitions: List[tuple]) -> None:
+    return None
+
+
+async def get_user_ids_for_date(chat_id: int, checkin_date: date) -> List[int]:
+    sql = "SELECT DISTINCT user_id FROM daily_checkins WHERE chat_id = ? AND checkin_date = ?"
+    rows = await _fetchall(sql, (chat_id, checkin_date))
+    return [int(r["user_id"]) for r in rows]
+
+
+async def get_weekly_checkin_counts_for_all_users(chat_id: int, start_date: date, end_date: date) -> Dict[int, int]:
+    sql = """
+    SELECT user_id, COUNT(*) AS cnt
+    FROM daily_checkins
+    WHERE chat_id = ? AND checkin_date BETWEEN ? AND ?
+    GROUP BY user_id
+    """
+    rows = await _fetchall(sql, (chat_id, start_date, end_date))
+    return {int(r["user_id"]): int(r["cnt"]) for r in rows}
+
+
+async def get_existing_checkin_keys(chat_id: int, keys: List[tuple]) -> List[tuple]:
+    """keys: (user_id, checkin_date)；返回其中已存在于 daily_checkins 的部分。"""
+    if not keys:
+        return []
+    placeholders = ", ".join(["(?, ?)"] * len(keys))
+    sql = f"""
+    SELECT user_id, checkin_date FROM daily_checkins
+    WHERE chat_id = ? AND (user_id, checkin_date) IN (VALUES {placeholders})
+    """
+    rows = await _fetchall(sql, (chat_id, *[value for key in keys for value in key]))
+    return [(int(r["user_id"]), r["checkin_date"]) for r in rows]
+
+
+async def get_first_checkin_dates(chat_id: int, user_ids: List[int]) -> Dict[int, date]:
+    if not user_ids:
+        return {}
+    placeholders = ", ".join(["?"] * len(user_ids))
+    sql = f"""
+    SELECT user_id, first_date FROM user_first_checkins
+    WHERE chat_id = ? AND user_id IN ({placeholders})
+    """
+    rows = await _fetchall(sql, (chat_id, *user_ids))
+    return {int(r["user_id"]): r["first_date"] for r in rows}
+
+
+# user_first_checkins
+async def bulk_upsert_first_checkin_dates(rows: List[tuple]) -> None:
+    """rows: (chat_id, user_id, first_date); an existing earlier date is kept."""
+    if not rows:
+        return
+    sql = f"""
+    INSERT INTO user_first_checkins (chat_id, user_id, first_date)
+    VALUES {_values_placeholders(3, len(rows))}
+    ON CONFLICT (chat_id, user_id) DO UPDATE SET first_date = MIN(first_date, excluded.first_date)
+    """
+    await _execute(sql, [value for row in rows for value in row])
+
+
+async def sync_first_checkin_dates(chat_id: int) -> int:
+    sql = """
+    INSERT INTO user_first_checkins (chat_id, user_id, first_date)
+    SELECT chat_id, user_id, MIN(checkin_date) FROM daily_checkins
+    WHERE chat_id = ?
+    GROUP BY chat_id, user_id
+    ON CONFLICT (chat_id, user_id) DO UPDATE SET first_date = MIN(first_date, excluded.first_date)
+    """
+    return await _execute_rowcount(sql, (chat_id,))
+
+
+async def has_first_checkin_dates(chat_id: int) -> bool:
+    row = await _fetchone("SELECT 1 AS found FROM user_first_checkins WHERE chat_id = ? LIMIT 1", (chat_id,))
+    return bool(row)
+
+
+# daily_checkin_rollups
+async def bulk_increment_checkin_rollups(rows: List[tuple]) -> None:
+    """rows: (chat_id, checkin_date, user_delta, new_user_delta, message_delta)"""
+    if not rows:
+        return
+    sql = f"""
+    INSERT INTO daily_checkin_rollups (chat_id, checkin_date, user_count, new_user_count, message_count)
+    VALUES {_values_placeholders(5, len(rows))}
+    ON CONFLICT (chat_id, checkin_date) DO UPDATE SET
+        user_count = user_count + excluded.user_count,
+        new_user_count = new_user_count + excluded.new_user_count,
+        message_count = message_count + excluded.message_count,
+        updated_at = CURRENT_TIMESTAMP
+    """
+    await _execute(sql, [value for row in rows for value in row])
+
+
+async def get_checkin_rollups(chat_id: int, start_date: date, end_date: date) -> List[Dict[str, Any]]:
+    sql = """
+    SELECT checkin_date, user_count, new_user_count, message_count
+    FROM daily_checkin_rollups
+    WHERE chat_id = ? AND checkin_date BETWEEN ? AND ?
+    ORDER BY checkin_date
+    """
+    return await _fetchall(sql, (chat_id, start_date, end_date))
+
+
+async def get_rollup_user_count(chat_id: int, checkin_date: date) -> int:
+    sql = "SELECT user_count FROM daily_checkin_rollups WHERE chat_id = ? AND checkin_date = ?"
+    row = await _fetchone(sql, (chat_id, checkin_date))
+    return int(row["user_count"]) if row else 0
+
+
+async def has_checkin_rollups(chat_id: int) -> bool:
+    row = await _fetchone("SELECT 1 AS found FROM daily_checkin_rollups WHERE chat_id = ? LIMIT 1", (chat_id,))
+    return bool(row)
+
+
+async def get_checkin_date_bounds(chat_id: int) -> Optional[Dict[str, Any]]:
+    sql = 'SELECT MIN(checkin_date) AS "first_date [DATE]", MAX(checkin_date) AS "last_date [DATE]" FROM daily_checkins WHERE chat_id = ?'
+    row = await _fetchone(sql, (chat_id,))
+    return row if row and row.get("first_date") else None
+
+
+async def count_distinct_users_between(chat_id: int, start_date: date, end_date: date) -> int:
+    sql = """
+    SELECT COUNT(DISTINCT user_id) AS cnt FROM daily_checkins
+    WHERE chat_id = ? AND checkin_date BETWEEN ? AND ?
+    """
+    row = await _fetchone(sql, (chat_id, start_date, end_date))
+    return int(row["cnt"]) if row else 0
+
+
+async def rebuild_checkin_rollups(chat_id: int, start_date: date, end_date: date) -> int:
+    """
+    Recompute rollups for a date range from daily_checkins; new users come from user_first_checkins.
+    Raw rows keep no per-message history, so message_count is only raised to at least user_count.
+    """
+    sql = """
+    INSERT INTO daily_checkin_rollups (chat_id, checkin_date, user_count, new_user_count, message_count)
+    SELECT d.chat_id, d.checkin_date, COUNT(*), COALESCE(SUM(f.first_date = d.checkin_date), 0), COUNT(*)
+    FROM daily_checkins d
+    LEFT JOIN user_first_checkins f ON f.chat_id = d.chat_id AND f.user_id = d.user_id
+    WHERE d.chat_id = ? AND d.checkin_date BETWEEN ? AND ?
+    GROUP BY d.chat_id, d.checkin_date
+    ON CONFLICT (chat_id, checkin_date) DO UPDATE SET
+        user_count = excluded.user_count,
+        new_user_count = excluded.new_user_count,
+        message_count = MAX(message_count, excluded.message_count),
+        updated_at = CURRENT_TIMESTAMP
+    """
+    return await _execute_rowcount(sql, (chat_id, start_date, end_date))
+
+
+# user_week_attendance
+async def bulk_increment_week_attendance(rows: List[tuple]) -> None:
+    """
+    rows: (chat_id, user_id, week_start, checkin_date), only for check-ins that did not exist yet.
+    SQLite applies the rows in order and every SET expression sees the row before the update,
+    so rows of one user must still be sorted by checkin_date.
+    """
+    if not rows:
+        return
+    sql = f"""
+    INSERT INTO user_week_attendance (chat_id, user_id, week_start, days, last_date, current_streak)
+    VALUES {_values_placeholders(6, len(rows))}
+    ON CONFLICT (chat_id, user_id, week_start) DO UPDATE SET
+        current_streak = CASE
+            WHEN excluded.last_date = date(last_date, '+1 day') THEN current_streak + 1
+            WHEN excluded.last_date > last_date THEN 1
+            ELSE current_streak
+        END,
+        days = days + 1,
+        last_date = MAX(last_date, excluded.last_date),
+        updated_at = CURRENT_TIMESTAMP
+    """
+    params = []
+    for chat_id, user_id, week_start, checkin_date in rows:
+        params.extend((chat_id, user_id, week_start, 1, checkin_date, 1))
+    await _execute(sql, params)
+
+
+async def get_user_week_attendance(chat_id: int, user_id: int, week_start: date) -> Optional[Dict[str, Any]]:
+    sql = """
+    SELECT days, last_date, current_streak FROM user_week_attendance
+    WHERE chat_id = ? AND user_id = ? AND week_start = ?
+    """
+    return await _fetchone(sql, (chat_id, user_id, week_start))
+
+
+async def count_week_attendance_users(chat_id: int, week_start: date) -> int:
+    sql = "SELECT COUNT(*) AS cnt FROM user_week_attendance WHERE chat_id = ? AND week_start = ?"
+    row = await _fetchone(sql, (chat_id, week_start))
+    return int(row["cnt"]) if row else 0
+
+
+async def get_week_attendance_counts(chat_id: int, week_start: date) -> Dict[int, int]:
+    sql = "SELECT user_id, days FROM user_week_attendance WHERE chat_id = ? AND week_start = ?"
+    rows = await _fetchall(sql, (chat_id, week_start))
+    return {int(r["user_id"]): int(r["days"]) for r in rows}
+
+
+async def has_week_attendance(chat_id: int) -> bool:
+    row = await _fetchone("SELECT 1 AS found FROM user_week_attendance WHERE chat_id = ? LIMIT 1", (chat_id,))
+    return bool(row)
+
+
+async def rebuild_week_attendance(chat_id: int, start_date: date, end_date: date) -> int:
+    """
+    Recompute attendance for whole weeks; start_date must be a Monday and end_date a Sunday.
+    Streak = size of the last run of consecutive dates (gaps-and-islands: date - row_number is constant within a run).
+    """
+    sql = f"""
+    INSERT INTO user_week_attendance (chat_id, user_id, week_start, days, last_date, current_streak)
+    SELECT chat_id, user_id, week_start, COUNT(*), MAX(checkin_date), SUM(island = last_island)
+    FROM (
+        SELECT chat_id, user_id, week_start, checkin_date, island,
+               MAX(island) OVER (PARTITION BY user_id, week_start) AS last_island
+        FROM (
+            SELECT chat_id, user_id, checkin_date, week_start,
+                   date(checkin_date, '-' || ROW_NUMBER() OVER (
+                       PARTITION BY user_id, week_start ORDER BY checkin_date
+                   ) || ' days') AS island
+            FROM (
+                SELECT chat_id, user_id, checkin_date, {_week_start("checkin_date")} AS week_start
+                FROM daily_checkins
+                WHERE chat_id = ? AND checkin_date BETWEEN ? AND ?
+            ) weeks
+        ) numbered
+    ) runs
+    WHERE true
+    GROUP BY chat_id, user_id, week_start
+    ON CONFLICT (chat_id, user_id, week_start) DO UPDATE SET
+        days = excluded.days,
+        last_date = excluded.last_date,
+        current_streak = excluded.current_streak,
+        updated_at = CURRENT_TIMESTAMP
+    """
+    return await _execute_rowcount(sql, (chat_id, start_date, end_date))
+
+
+# lottery_settings
+async def get_lottery_settings(chat_id: int) -> Optional[Dict[str, Any]]:
+    sql = "SELECT * FROM lottery_settings WHERE chat_id = ? LIMIT 1"
+    return await _fetchone(sql, (chat_id,))
+
+
+async def list_lottery_settings() -> List[Dict[str, Any]]:
+    return await _fetchall("SELECT * FROM lottery_settings ORDER BY chat_id")
+
+
+async def insert_default_lottery_settings(chat_id: int, timezone: str) -> None:
+    sql = """
+    INSERT INTO lottery_settings (chat_id, weekly_enabled, weekly_draw_at, full_attendance_factor, timezone)
+    VALUES (?, 1, '00:00:00', 2, ?)
+    ON CONFLICT (chat_id) DO NOTHING
+    """
+    await _execute(sql, (chat_id, timezone))
+
+
+async def update_weekly_enabled(chat_id: int, enabled: bool) -> None:
+    sql = "UPDATE lottery_settings SET weekly_enabled = ?, updated_at = CURRENT_TIMESTAMP WHERE chat_id = ?"
+    await _execute(sql, (int(enabled), chat_id))
+
+
+async def update_draw_times(chat_id: int, weekly_time: str) -> None:
+    sql = "UPDATE lottery_settings SET weekly_draw_at = ?, updated_at = CURRENT_TIMESTAMP WHERE chat_id = ?"
+    await _execute(sql, (weekly_time, chat_id))
+
+
+async def update_full_attendance_factor(chat_id: int, factor: int) -> None:
+    sql = "UPDATE lottery_settings SET full_attendance_factor = ?, updated_at = CURRENT_TIMESTAMP WHERE chat_id = ?"
+    await _execute(sql, (factor, chat_id))
+
+
+# prize_sets / prize_items
+async def get_prize_set_for_period(chat_id: int, set_type: str, period_start: date, period_end: date) -> Optional[Dict[str, Any]]:
+    sql = """
+    SELECT * FROM prize_sets
+    WHERE chat_id = ?
+      AND set_type = ?
+      AND valid_from <= ?
+      AND (valid_to IS NULL OR valid_to >= ?)
+    ORDER BY valid_from DESC, id DESC
+    LIMIT 1
+    """
+    return await _fetchone(sql, (chat_id, set_type, period_start, period_end))
+
+
+async def get_latest_prize_set_before(chat_id: int, set_type: str, ref_date: date) -> Optional[Dict[str, Any]]:
+    sql = """
+    SELECT * FROM prize_sets
+    WHERE chat_id = ?
+      AND set_type = ?
+      AND valid_from <= ?
+    ORDER BY valid_from DESC, id DESC
+    LIMIT 1
+    """
+    return await _fetchone(sql, (chat_id, set_type, ref_date))
+
+
+async def insert_prize_set(chat_id: int, set_type: str, valid_from: date | None, valid_to: date | None) -> int:
+    sql = """
+    INSERT INTO prize_sets (chat_id, set_type, valid_from, valid_to)
+    VALUES (?, ?, ?, ?)
+    """
+    return await _execute(sql, (chat_id, set_type, valid_from, valid_to))
+
+
+async def get_prize_items_for_set(set_id: int) -> List[Dict[str, Any]]:
+    sql = """
+    SELECT * FROM prize_items
+    WHERE set_id = ? AND enabled = 1
+    ORDER BY prize_rank ASC, id ASC
+    """
+    return await _fetchall(sql, (set_id,))
+
+
+async def insert_prize_item(set_id: int, name: str, description: str | None, quantity: int, enabled: bool, prize_rank: int) -> None:
+    sql = """
+    INSERT INTO prize_items (set_id, name, description, quantity, enabled, prize_rank)
+    VALUES (?, ?, ?, ?, ?, ?)
+    """
+    await _execute(sql, (set_id, name, description, quantity, int(enabled), prize_rank))
+
+
+async def update_prize_item_enabled(item_id: int, enabled: bool) -> None:
+    sql = "UPDATE prize_items SET enabled = ?, updated_at = CURRENT_TIMESTAMP WHERE id = ?"
+    await _execute(sql, (int(enabled), item_id))
+
+
+# lottery_rounds
+async def create_lottery_round(chat_id: int, round_type: str, period_start_date: date, period_end_date: date, note: str | None, prize_set_id: int | None) -> int:
+    sql = """
+    INSERT INTO lottery_rounds (chat_id, round_type, period_start_date, period_end_date, status, note, prize_set_id)
+    VALUES (?, ?, ?, ?, 'running', ?, ?)
+    """
+    return await _execute(sql, (chat_id, round_type, period_start_date, period_end_date, note, prize_set_id))
+
+
+async def mark_lottery_round_completed(round_id: int, total_participants: int, total_tickets: int) -> None:
+    sql = """
+    UPDATE lottery_rounds
+    SET status = 'done', total_participants = ?, total_tickets = ?, completed_at = CURRENT_TIMESTAMP, updated_at = CURRENT_TIMESTAMP
+    WHERE id = ?
+    """
+    await _execute(sql, (total_participants, total_tickets, round_id))
+
+
+async def update_lottery_round_status(round_id: int, status: str) -> None:
+    sql = "UPDATE lottery_rounds SET status = ?, updated_at = CURRENT_TIMESTAMP WHERE id = ?"
+    await _execute(sql, (status, round_id))
+
+
+async def get_round_by_period(chat_id: int, round_type: str, period_start: date, period_end: date) -> Optional[Dict[str, Any]]:
+    sql = """
+    SELECT * FROM lottery_rounds
+    WHERE chat_id = ? AND round_type = ? AND period_start_date = ? AND period_end_date = ?
+    LIMIT 1
+    """
+    return await _fetchone(sql, (chat_id, round_type, period_start, period_end))
+
+
+# lottery_round_entries
+_UPSERT_ENTRY = """
+    ON CONFLICT (round_id, user_id) DO UPDATE SET
+        checkin_days = excluded.checkin_days,
+        weight = excluded.weight,
+        is_full_attendance = excluded.is_full_attendance,
+        extra_info_json = excluded.extra_info_json
+"""
+
+
+async def insert_lottery_round_entry(round_id: int, chat_id: int, user_id: int, checkin_days: int, weight: int, is_full_attendance: bool, extra_info_json: str | None) -> None:
+    sql = f"""
+    INSERT INTO lottery_round_entries (round_id, chat_id, user_id, checkin_days, weight, is_full_attendance, extra_info_json)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+    {_UPSERT_ENTRY}
+    """
+    await _execute(sql, (round_id, chat_id, user_id, checkin_days, weight, int(is_full_attendance), extra_info_json))
+
+
+async def bulk_insert_lottery_round_entries(rows: List[tuple]) -> None:
+    """rows: (round_id, chat_id, user_id, checkin_days, weight, is_full_attendance, extra_info_json)"""
+    if not rows:
+        return
+    sql = f"""
+    INSERT INTO lottery_round_entries (round_id, chat_id, user_id, checkin_days, weight, is_full_attendance, extra_info_json)
+    VALUES {_values_placeholders(7, len(rows))}
+    {_UPSERT_ENTRY}
+    """
+    await _execute(sql, [value for row in rows for value in row])
+
+
+async def get_entries_for_round(round_id: int) -> List[Dict[str, Any]]:
+    sql = "SELECT * FROM lottery_round_entries WHERE round_id = ?"
+    return await _fetchall(sql, (round_id,))
+
+
+# lottery_winners
+_UPSERT_WINNER = """
+    ON CONFLICT (round_id, user_id) DO UPDATE SET
+        prize_name = excluded.prize_name,
+        prize_description = excluded.prize_description,
+        prize_rank = excluded.prize_rank,
+        updated_at = CURRENT_TIMESTAMP
+"""
+
+
+async def insert_lottery_winner(round_id: int, chat_id: int, user_id: int, prize_set_id: int | None, prize_name: str, prize_description: str | None, prize_rank: int) -> None:
+    sql = f"""
+    INSERT INTO lottery_winners (round_id, chat_id, user_id, prize_set_id, prize_name, prize_description, prize_rank)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+    {_UPSERT_WINNER}
+    """
+    await _execute(sql, (round_id, chat_id, user_id, prize_set_id, prize_name, prize_description, prize_rank))
+
+
+async def bulk_insert_lottery_winners(rows: List[tuple]) -> None:
+    """rows: (round_id, chat_id, user_id, prize_set_id, prize_name, prize_description, prize_rank)"""
+    if not rows:
+        return
+    sql = f"""
+    INSERT INTO lottery_winners (round_id, chat_id, user_id, prize_set_id, prize_name, prize_description, prize_rank)
+    VALUES {_values_placeholders(7, len(rows))}
+    {_UPSERT_WINNER}
+    """
+    await _execute(sql, [value for row in rows for value in row])
+
+
+async def get_winners_for_round(round_id: int) -> List[Dict[str, Any]]:
+    sql = "SELECT * FROM lottery_winners WHERE round_id = ? ORDER BY prize_rank ASC, id ASC"
+    return await _fetchall(sql, (round_id,))
+
+
+async def update_winner_claim_status(winner_id: int, status: str) -> None:
+    sql = "UPDATE lottery_winners SET claimed_status = ?, claimed_at = CASE WHEN ? = 'claimed' THEN CURRENT_TIMESTAMP ELSE claimed_at END WHERE id = ?"
+    await _execute(sql, (status, status, winner_id))
+
+
+# admin_actions
+async def insert_admin_action(chat_id: int, admin_user_id: int, action_type: str, payload_json: str | None) -> None:
+    sql = """
+    INSERT INTO admin_actions (chat_id, admin_user_id, action_type, payload_json)
+    VALUES (?, ?, ?, ?)
+    """
+    await _execute(sql, (chat_id, admin_user_id, action_type, payload_json))
+
+
+# cold-storage archive（与 MySQL 版相同的筛选条件）
+_ARCHIVE_SOURCES = {
+    "daily_checkins": (
+        'SELECT t.*, t.checkin_date AS "archive_date [DATE]" FROM daily_checkins t',
+        "t.checkin_date",
+    ),
+    "lottery_round_entries": (
+        'SELECT t.*, r.period_end_date AS "archive_date [DATE]" FROM lottery_round_entries t JOIN lottery_rounds r ON r.id = t.round_id',
+        "r.period_end_date",
+    ),
+    "lottery_winners": (
+        'SELECT t.*, r.period_end_date AS "archive_date [DATE]" FROM lottery_winners t JOIN lottery_rounds r ON r.id = t.round_id',
+        "r.period_end_date",
+    ),
+}
+_ARCHIVE_DELETE_FILTERS = {
+    "daily_checkins": "checkin_date < ?",
+    "lottery_round_entries": "round_id IN (SELECT id FROM lottery_rounds WHERE period_end_date < ?)",
+    "lottery_winners": "round_id IN (SELECT id FROM lottery_rounds WHERE period_end_date < ?)",
+}
+
+
+async def stream_archive_rows(table: str, cutoff_date: date, batch_size: int = 1000) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Same contract as the MySQL version. A cursor left open across awaits would pin the
+    single connection, so this pages by keyset on (archive_date, id) instead, one batch per statement.
+    """
+    select, date_expr = _ARCHIVE_SOURCES[table]
+    first = f"{select} WHERE {date_expr} < ? ORDER BY {date_expr}, t.id LIMIT ?"
+    after = f"{select} WHERE {date_expr} < ? AND ({date_expr}, t.id) > (?, ?) ORDER BY {date_expr}, t.id LIMIT ?"
+    last = None
+    while True:
+        if last is None:
+            rows = await _fetchall(first, (cutoff_date, batch_size))
+        else:
+            rows = await _fetchall(after, (cutoff_date, *last, batch_size))
+        for row in rows:
+            yield row
+        if len(rows) < batch_size:
+            break
+        last = (rows[-1]["archive_date"], rows[-1]["id"])
+
+
+async def count_archive_rows(table: str, cutoff_date: date, max_id: int) -> int:
+    select, date_expr = _ARCHIVE_SOURCES[table]
+    from_clause = select.split(" FROM ", 1)[1]
+    sql = f"SELECT COUNT(*) AS cnt FROM {from_clause} WHERE {date_expr} < ? AND t.id <= ?"
+    row = await _fetchone(sql, (cutoff_date, max_id))
+    return int(row["cnt"]) if row else 0
+
+
+async def delete_archived_rows_chunk(table: str, cutoff_date: date, max_id: int, limit: int) -> int:
+    sql = f"""
+    DELETE FROM {table} WHERE id IN (
+        SELECT id FROM {table} WHERE {_ARCHIVE_DELETE_FILTERS[table]} AND id <= ? ORDER BY id LIMIT ?
+    )
+    """
+    return await _execute_rowcount(sql, (cutoff_date, max_id, limit))
@@ -0,0 +1,101 @@
+"""
+Translate sql/ddl.sql (MySQL) into SQLite statements, so the embedded backend never drifts from the real schema.
+
+Only the constructs used in our DDL are handled:
+- AUTO_INCREMENT ids become INTEGER PRIMARY KEY AUTOINCREMENT;
+- ENUM becomes TEXT with a CHECK constraint;
+- KEY lines become CREATE INDEX statements;
+- table options and any PARTITION clause are dropped, and a composite primary
+  key that includes the AUTO_INCREMENT id (required by partitioning) reduces to the id.
+
+ON UPDATE CURRENT_TIMESTAMP has no SQLite equivalent. The upserts that care
+set updated_at explicitly.
+"""
+
+import re
+from pathlib import Path
+from typing import List
+
+DDL_PATH = Path(__file__).resolve().parents[2] / "sql" / "ddl.sql"
+
+_TABLE_RE = re.compile(r"CREATE TABLE IF NOT EXISTS `(\w+)` \((.*?)\n\)[^;]*;", re.S)
+_KEY_RE = re.compile(r"^(UNIQUE )?KEY `(\w+)` \((.+)\)$")
+_PRIMARY_RE = re.compile(r"^PRIMARY KEY \((.+)\)$")
+_COLUMN_RE = re.compile(r"^`(\w+)` (\w+)(\([^)]*\))?(.*)$")
+_ENUM_RE = re.compile(r"^ENUM\((.*)\)$")
+
+# MySQL 列类型 -> SQLite 声明类型；DATE/DATETIME/TIME 保留原名，供 sqlite3 的类型转换器识别
+_TYPE_MAP = {
+    "BIGINT": "INTEGER",
+    "INT": "INTEGER",
+    "TINYINT": "INTEGER",
+    "VARCHAR": "TEXT",
+    "TEXT": "TEXT",
+    "JSON": "TEXT",
+    "ENUM": "TEXT",
+    "DATE": "DATE",
+    "DATETIME": "DATETIME",
+    "TIME": "TIME",
+}
+
+
+def load_sqlite_schema(path: Path = DDL_PATH) -> List[str]:
+    return translate_ddl(path.read_text(encoding="utf-8-sig"))
+
+
+def translate_ddl(ddl: str) -> List[str]:
+    statements: List[str] = []
+    for table, body in _TABLE_RE.findall(ddl):
+        columns: List[str] = []
+        constraints: List[str] = []
+        indexes: List[str] = []
+        auto_increment = None
+        primary = None
+        for line in body.splitlines():
+            line = re.sub(r"\s--.*$", "", line).strip().rstrip(",")
+            if not line:
+                continue
+            key = _KEY_RE.match(line)
+            if key:
+                unique, name, cols = key.groups()
+                if unique:
+                    constraints.append(f"CONSTRAINT `{name}` UNIQUE ({cols})")
+                else:
+                    indexes.append(f"CREATE INDEX IF NOT EXISTS `{name}` ON `{table}` ({cols})")
+                continue
+            pk = _PRIMARY_RE.match(line)
+            if pk:
+                primary = pk.group(1)
+                continue
+            if line.startswith("CONSTRAINT"):
+                constraints.append(line)
+                continue
+            column, definition = _translate_column(line)
+            if "AUTO_INCREMENT" in line:
+                auto_increment = column
+                definition = f"`{column}` INTEGER PRIMARY KEY AUTOINCREMENT"
+            columns.append(definition)
+        # 分区表的主键是 (id, 分区列)；SQLite 中自增 id 本身已唯一，沿用 rowid 主键
+        if primary and not auto_increment:
+            constraints.insert(0, f"PRIMARY KEY ({primary})")
+        body_sql = ",\n  ".join(columns + constraints)
+        statements.append(f"CREATE TABLE IF NOT EXISTS `{table}` (\n  {body_sql}\n)")
+        statements.extend(indexes)
+    return statements
+
+
+def _translate_column(line: str) -> tuple[str, str]:
+    match = _COLUMN_RE.match(line)
+    if not match:
+        raise ValueError(f"Unsupported column definition in DDL: {line}")
+    name, mysql_type, args, rest = match.groups()
+    sqlite_type = _TYPE_MAP.get(mysql_type.upper())
+    if not sqlite_type:
+        raise ValueError(f"Unsupported column type in DDL: {mysql_type}")
+    rest = rest.replace("UNSIGNED", "").replace("ON UPDATE CURRENT_TIMESTAMP", "")
+    rest = re.sub(r"COMMENT '[^']*'", "", rest)
+    rest = " ".join(rest.split())
+    check = ""
+    if mysql_type.upper() == "ENUM":
+        check = f" CHECK (`{name}` IN {args})"
+    return name, f"`{name}` {sqlite_type}{' ' + rest if rest else ''}{check}"
@@ -1,6 +1,6 @@
 from aiogram import Dispatcher
 
-from app.handlers import user_message, user_common, admin_lottery, admin_prize, admin_maintenance, errors
+from app.handlers import user_message, user_common, admin_lottery, admin_prize, admin_maintenance, chat_members, errors
 from app.config import Config
 
 
@@ -10,4 +10,5 @@ def register_handlers(dp: Dispatcher, config: Config) -> None:
     admin_lottery.register_admin_lottery_handlers(dp, config)
     admin_prize.register_admin_prize_handlers(dp, config)
     admin_maintenance.register_admin_maintenance_handlers(dp, config)
+    chat_members.register_chat_member_handlers(dp, config)
     errors.register_error_handlers(dp)
@@ -1,4 +1,4 @@
-from aiogram import Dispatcher, F
+from aiogram import Dispatcher
 from aiogram.filters import Command
 from aiogram.types import Message
 
@@ -9,32 +9,21 @@ from app.services.announce_service import AnnounceService
 from app.db.repositories import AdminActionRepository
 from app.texts import zh_cn
 from app.utils.commands import update_admin_bot_commands
-from app.utils.permissions import is_chat_admin
+from app.utils.chat_registry import registered_chat
+from app.utils.permissions import ensure_admin
 import logging
 
 logger = logging.getLogger(__name__)
 
 
 def register_admin_lottery_handlers(dp: Dispatcher, config: Config) -> None:
-    dp.message.register(cmd_weekly_lottery_pause, Command("weekly_lottery_pause", ignore_mention=False), F.chat.id == config.target_chat_id)
-    dp.message.register(cmd_weekly_lottery_resume, Command("weekly_lottery_resume", ignore_mention=False), F.chat.id == config.target_chat_id)
-    dp.message.register(cmd_draw_now_weekly, Command("draw_now_weekly", ignore_mention=False), F.chat.id == config.target_chat_id)
-
-
-async def _ensure_admin(message: Message) -> bool:
-    # Allow anonymous admin mode (sender_chat == current chat) to pass
-    if getattr(message, "sender_chat", None) and message.sender_chat.id == message.chat.id:
-        return True
-    is_admin = await is_chat_admin(message.bot, message.chat.id, message.from_user.id)
-    logger.info("Admin check chat_id=%s user_id=%s is_admin=%s", message.chat.id, message.from_user.id, is_admin)
-    if not is_admin:
-        await message.answer(zh_cn.TEXT_NOT_ADMIN)
-        return False
-    return True
+    dp.message.register(cmd_weekly_lottery_pause, Command("weekly_lottery_pause", ignore_mention=False), registered_chat)
+    dp.message.register(cmd_weekly_lottery_resume, Command("weekly_lottery_resume", ignore_mention=False), registered_chat)
+    dp.message.register(cmd_draw_now_weekly, Command("draw_now_weekly", ignore_mention=False), registered_chat)
 
 
 async def cmd_weekly_lottery_pause(message: Message, settings_service: SettingsService, admin_repo: AdminActionRepository):
-    if not await _ensure_admin(message):
+    if not await ensure_admin(message):
         return
     await settings_service.set_weekly_enabled(message.chat.id, False)
     await admin_repo.log_action(message.chat.id, message.from_user.id, "weekly_lottery_pause", {})
@@ -48,7 +37,7 @@ async def cmd_weekly_lottery_pause(message: Message, settings_service: SettingsS
 
 
 async def cmd_weekly_lottery_resume(message: Message, settings_service: SettingsService, admin_repo: AdminActionRepository):
-    if not await _ensure_admin(message):
+    if not await ensure_admin(message):
         return
     await settings_service.set_weekly_enabled(message.chat.id, True)
     await admin_repo.log_action(message.chat.id, message.from_user.id, "weekly_lottery_resume", {})
@@ -62,7 +51,7 @@ async def cmd_weekly_lottery_resume(message: Message, settings_service: Settings
 
 
 async def cmd_draw_now_weekly(message: Message, lottery_service: LotteryService, announce_service: AnnounceService, settings_service: SettingsService):
-    if not await _ensure_admin(message):
+    if not await ensure_admin(message):
         return
     settings = await settings_service.get_settings(message.chat.id)
     if not settings.get("weekly_enabled"):
@@ -1,38 +1,55 @@
 from datetime import datetime
+import asyncio
 import logging
+import time
 
-from aiogram import Dispatcher, F
+from aiogram import Dispatcher
 from aiogram.filters import Command
 from aiogram.types import Message
 
 from app.config import Config
-from app.db.repositories import CheckinRepository, AdminActionRepository
+from app.middlewares.concurrency import ConcurrencyGovernor
+from app.services.outbound_queue import OutboundQueue, split_text
+from app.db.repositories import AdminActionRepository
+from app.db.backend import current_backend, pool_stats
+from app.db.slow_queries import format_plan_row, slow_query_log
+from app.models.dto import RangeStatsDTO
+from app.services.retention_service import RetentionService
 from app.services.stats_service import StatsService
-from app.texts import zh_cn
-from app.utils.permissions import is_chat_admin
+from app.utils.permissions import admin_cache, ensure_admin
 from app.utils import time_utils
+from app.utils.chat_registry import registered_chat
 
 logger = logging.getLogger(__name__)
 
+# /admin_slow_queries 默认展示条数
+DEFAULT_SLOW_QUERIES_LISTED = 5
 
-def register_admin_maintenance_handlers(dp: Dispatcher, config: Config) -> None:
-    dp.message.register(cmd_cleanup_checkins, Command("cleanup_checkins", ignore_mention=False), F.chat.id == config.target_chat_id)
-    dp.message.register(cmd_stats_today, Command("stats_today", ignore_mention=False), F.chat.id == config.target_chat_id)
-    dp.message.register(cmd_stats_week, Command("stats_week", ignore_mention=False), F.chat.id == config.target_chat_id)
-    dp.message.register(cmd_admin_ping, Command("admin_ping", ignore_mention=False), F.chat.id == config.target_chat_id)
+# /cleanup_checkins 进度消息的最小编辑间隔（秒），避免触发 Telegram 限流
+CLEANUP_PROGRESS_INTERVAL_SECONDS = 3.0
+
+# 后台清理任务的引用，防止任务被垃圾回收
+_cleanup_tasks: set[asyncio.Task] = set()
+
+# 超过该天数的区间只输出汇总，避免消息超长
+MAX_STATS_DAYS_LISTED = 31
+MAX_STATS_RANGE_DAYS = 366
 
 
-async def _ensure_admin(message: Message) -> bool:
-    if getattr(message, "sender_chat", None) and message.sender_chat.id == message.chat.id:
-        return True
-    if not await is_chat_admin(message.bot, message.chat.id, message.from_user.id):
-        await message.answer(zh_cn.TEXT_NOT_ADMIN)
-        return False
-    return True
+def register_admin_maintenance_handlers(dp: Dispatcher, config: Config) -> None:
+    dp.message.register(cmd_cleanup_checkins, Command("cleanup_checkins", ignore_mention=False), registered_chat)
+    dp.message.register(cmd_stats_today, Command("stats_today", ignore_mention=False), registered_chat)
+    dp.message.register(cmd_stats_week, Command("stats_week", ignore_mention=False), registered_chat)
+    dp.message.register(cmd_stats_range, Command("stats_range", ignore_mention=False), registered_chat)
+    dp.message.register(cmd_stats_month, Command("stats_month", ignore_mention=False), registered_chat)
+    dp.message.register(cmd_rebuild_stats, Command("rebuild_stats", ignore_mention=False), registered_chat)
+    dp.message.register(cmd_admin_ping, Command("admin_ping", ignore_mention=False), registered_chat)
+    dp.message.register(cmd_admin_db_stats, Command("admin_db_stats", ignore_mention=False), registered_chat)
+    dp.message.register(cmd_admin_slow_queries, Command("admin_slow_queries", ignore_mention=False), registered_chat)
 
 
-async def cmd_cleanup_checkins(message: Message, checkin_repo: CheckinRepository, admin_repo: AdminActionRepository):
-    if not await _ensure_admin(message):
+async def cmd_cleanup_checkins(message: Message, retention_service: RetentionService, admin_repo: AdminActionRepository):
+    if not await ensure_admin(message):
         return
     logger.info("cmd_cleanup_checkins invoked chat_id=%s user_id=%s text=%s", message.chat.id, message.from_user.id, message.text)
     parts = (message.text or "").split()
@@ -44,13 +61,48 @@ async def cmd_cleanup_checkins(message: Message, checkin_repo: CheckinRepository
     except ValueError:
         await message.answer("日期格式错误，应为 YYYY-MM-DD")
         return
-    deleted = await checkin_repo.delete_before(message.chat.id, cutoff)
-    await admin_repo.log_action(message.chat.id, message.from_user.id, "cleanup_checkins", {"cutoff": parts[1], "deleted": deleted})
+    if retention_service.is_running(message.chat.id):
+        await message.answer("本群已有清理任务在进行中，请稍后再试。")
+        return
+    progress = await message.answer(f"开始清理 {cutoff} 之前的打卡记录…")
+    # 分批删除可能持续较久，放到后台执行，不占用 handler 并发名额
+    task = asyncio.create_task(_run_cleanup(message, progress, cutoff, retention_service, admin_repo))
+    _cleanup_tasks.add(task)
+    task.add_done_callback(_cleanup_tasks.discard)
+
+
+async def _run_cleanup(
+    message: Message,
+    progress: Message,
+    cutoff,
+    retention_service: RetentionService,
+    admin_repo: AdminActionRepository,
+) -> None:
+    chat_id = message.chat.id
+    last_edit = time.monotonic()
+
+    async def on_progress(deleted: int) -> None:
+        nonlocal last_edit
+        if time.monotonic() - last_edit < CLEANUP_PROGRESS_INTERVAL_SECONDS:
+            return
+        last_edit = time.monotonic()
+        try:
+            await progress.edit_text(f"正在清理 {cutoff} 之前的打卡记录，已删除 {deleted} 条…")
+        except Exception as e:
+            logger.warning("Failed to update cleanup progress chat_id=%s: %s", chat_id, e)
+
+    try:
+        deleted = await retention_service.purge_before(chat_id, cutoff, on_progress)
+    except Exception as e:
+        logger.exception("Cleanup failed chat_id=%s cutoff=%s: %s", chat_id, cutoff, e)
+        await message.answer("清理打卡记录失败，请查看日志。")
+        return
+    await admin_repo.log_action(chat_id, message.from_user.id, "cleanup_checkins", {"cutoff": str(cutoff), "deleted": deleted})
     await message.answer(f"已删除 {cutoff} 之前的打卡记录，共 {deleted} 条。")
 
 
 async def cmd_stats_today(message: Message, stats_service: StatsService):
-    if not await _ensure_admin(message):
+    if not await ensure_admin(message):
         return
     today = time_utils.get_today_beijing(message.date)
     logger.info("cmd_stats_today chat_id=%s user_id=%s today=%s", message.chat.id, message.from_user.id, today)
@@ -59,22 +111,179 @@ async def cmd_stats_today(message: Message, stats_service: StatsService):
 
 
 async def cmd_stats_week(message: Message, stats_service: StatsService):
-    if not await _ensure_admin(message):
+    if not await ensure_admin(message):
         return
     today = time_utils.get_today_beijing(message.date)
     start, end = time_utils.get_week_start_end(today)
     logger.info("cmd_stats_week chat_id=%s user_id=%s start=%s end=%s", message.chat.id, message.from_user.id, start, end)
     data = await stats_service.get_week_stats(message.chat.id, start, end)
-    lines = [f"本周统计 {start} ~ {end}"]
-    for d in data["days"]:
-        lines.append(f"{d['date']}: {d['user_count']} 人")
-    await message.answer("\n".join(lines))
+    await message.answer(_render_range_stats(f"本周统计 {start} ~ {end}", data))
+
+
+async def cmd_stats_range(message: Message, stats_service: StatsService):
+    if not await ensure_admin(message):
+        return
+    parts = (message.text or "").split()
+    if len(parts) < 3:
+        await message.answer("用法：/stats_range YYYY-MM-DD YYYY-MM-DD")
+        return
+    try:
+        start = datetime.strptime(parts[1], "%Y-%m-%d").date()
+        end = datetime.strptime(parts[2], "%Y-%m-%d").date()
+    except ValueError:
+        await message.answer("日期格式错误，应为 YYYY-MM-DD")
+        return
+    if end < start or (end - start).days + 1 > MAX_STATS_RANGE_DAYS:
+        await message.answer(f"日期区间无效（结束日期不能早于开始日期，且不超过 {MAX_STATS_RANGE_DAYS} 天）")
+        return
+    logger.info("cmd_stats_range chat_id=%s user_id=%s start=%s end=%s", message.chat.id, message.from_user.id, start, end)
+    data = await stats_service.get_range_stats(message.chat.id, start, end)
+    await message.answer(_render_range_stats(f"区间统计 {start} ~ {end}", data))
+
+
+async def cmd_stats_month(message: Message, stats_service: StatsService):
+    if not await ensure_admin(message):
+        return
+    parts = (message.text or "").split()
+    if len(parts) >= 2:
+        try:
+            month_start = datetime.strptime(parts[1], "%Y-%m").date()
+        except ValueError:
+            await message.answer("月份格式错误，应为 YYYY-MM")
+            return
+    else:
+        month_start = time_utils.get_today_beijing(message.date).replace(day=1)
+    logger.info("cmd_stats_month chat_id=%s user_id=%s month=%s", message.chat.id, message.from_user.id, month_start)
+    data = await stats_service.get_month_stats(message.chat.id, month_start.year, month_start.month)
+    await message.answer(_render_range_stats(f"月度统计 {month_start:%Y-%m}", data))
+
+
+def _render_range_stats(title: str, data: RangeStatsDTO) -> str:
+    lines = [title]
+    if len(data.days) <= MAX_STATS_DAYS_LISTED:
+        for d in data.days:
+            lines.append(f"{d.date}: {d.user_count} 人（新 {d.new_users} / 老 {d.returning_users}）")
+    else:
+        busiest = max(data.days, key=lambda d: d.user_count)
+        lines.append(f"共 {len(data.days)} 天，单日最多 {busiest.user_count} 人（{busiest.date}）")
+    lines.append("------")
+    lines.append(f"去重人数：{data.unique_users} 人（新 {data.new_users} / 老 {data.returning_users}）")
+    lines.append(f"打卡人次：{data.total_checkins}")
+    lines.append(f"消息总数：{data.total_messages}")
+    return "\n".join(lines)
+
+
+async def cmd_rebuild_stats(message: Message, stats_service: StatsService, admin_repo: AdminActionRepository):
+    if not await ensure_admin(message):
+        return
+    parts = (message.text or "").split()
+    start = end = None
+    if len(parts) >= 3:
+        try:
+            start = datetime.strptime(parts[1], "%Y-%m-%d").date()
+            end = datetime.strptime(parts[2], "%Y-%m-%d").date()
+        except ValueError:
+            await message.answer("日期格式错误，应为 YYYY-MM-DD")
+            return
+        if end < start:
+            await message.answer("结束日期不能早于开始日期")
+            return
+    elif len(parts) == 2:
+        await message.answer("用法：/rebuild_stats [YYYY-MM-DD YYYY-MM-DD]，不带参数则重建全部历史")
+        return
+    logger.info("cmd_rebuild_stats chat_id=%s user_id=%s start=%s end=%s", message.chat.id, message.from_user.id, start, end)
+    days = await stats_service.rebuild_rollups(message.chat.id, start, end)
+    await admin_repo.log_action(
+        message.chat.id,
+        message.from_user.id,
+        "rebuild_stats",
+        {"start": str(start) if start else None, "end": str(end) if end else None, "days": days},
+    )
+    await message.answer(f"统计汇总已重建，共 {days} 天。")
 
 
-async def cmd_admin_ping(message: Message):
-    if not await _ensure_admin(message):
+async def cmd_admin_ping(
+    message: Message,
+    concurrency_governor: ConcurrencyGovernor | None = None,
+    outbound_queue: OutboundQueue | None = None,
+):
+    if not await ensure_admin(message):
         return
+    lines = ["admin pong"]
+    cache_info = admin_cache.stats().get(message.chat.id)
+    if cache_info:
+        lines.append(
+            f"管理员缓存：{cache_info['admins']} 人，{cache_info['age_seconds']:.0f} 秒前刷新，"
+            f"刷新耗时 {cache_info['refresh_ms']:.0f} ms"
+        )
+    if concurrency_governor:
+        gov = concurrency_governor.stats()
+        lines.append(f"处理中：{gov['in_flight']}/{gov['max_in_flight']}")
+        for lane, label in (("command", "命令"), ("message", "消息")):
+            info = gov[lane]
+            lines.append(
+                f"{label}队列：{info['queue_depth']}（峰值 {info['max_queue_depth']}），"
+                f"平均等待 {info['avg_wait_ms']:.0f} ms，最长 {info['max_wait_ms']:.0f} ms，丢弃 {info['shed']}"
+            )
+    if outbound_queue:
+        out = outbound_queue.stats()
+        lines.append(
+            f"发送队列：待发 {out['queue_depth']}，已发 {out['sent']}，失败 {out['failed']}，限流 {out['retry_after']} 次，"
+            f"延迟 p50 {out['latency_p50_ms']:.0f} ms / p95 {out['latency_p95_ms']:.0f} ms"
+        )
     try:
-        await message.answer("admin pong")
+        await message.answer("\n".join(lines))
     except Exception as e:
         logger.exception("Failed to reply admin ping: %s", e)
+
+
+async def cmd_admin_slow_queries(message: Message):
+    if not await ensure_admin(message):
+        return
+    parts = (message.text or "").split()
+    limit = DEFAULT_SLOW_QUERIES_LISTED
+    if len(parts) >= 2:
+        try:
+            limit = min(max(1, int(parts[1])), slow_query_log.top_n)
+        except ValueError:
+            await message.answer("用法：/admin_slow_queries [条数]")
+            return
+    entries = slow_query_log.top(limit)
+    if not entries:
+        await message.answer(f"暂无超过 {slow_query_log.threshold_ms:.0f} ms 的慢查询。")
+        return
+    lines = [f"慢查询（阈值 {slow_query_log.threshold_ms:.0f} ms，累计 {slow_query_log.total} 次），最慢 {len(entries)} 条："]
+    for i, entry in enumerate(entries, start=1):
+        lines.append(
+            f"{i}. {entry['name']} {entry['elapsed_ms']:.0f} ms，行数 {entry['rows']}，"
+            f"参数 {entry['params']}，{entry['at']:%m-%d %H:%M:%S}"
+        )
+        for row in entry["plan"] or []:
+            lines.append(f"   └ {format_plan_row(row)}")
+    # 执行计划行数不定，超过 Telegram 单条消息上限时分条发送
+    for part in split_text("\n".join(lines)):
+        await message.answer(part)
+
+
+async def cmd_admin_db_stats(message: Message):
+    if not await ensure_admin(message):
+        return
+    stats = pool_stats()
+    if not stats:
+        await message.answer("SQLite 后端没有连接池。" if current_backend() == "sqlite" else "数据库连接池未初始化。")
+        return
+    lines = [
+        f"连接池：{stats['size']} 个连接（使用中 {stats['in_use']}，空闲 {stats['free']}），"
+        f"min {stats['minsize']} / max {stats['maxsize']}"
+    ]
+    gate = stats.get("gate")
+    if gate:
+        lines.append(
+            f"当前上限 {gate['limit']}（{gate['min_limit']}~{gate['max_limit']}），借出 {gate['in_use']}，等待 {gate['waiting']}，"
+            f"扩容 {gate['grown']} 次 / 收缩 {gate['shrunk']} 次"
+        )
+        lines.append(
+            f"获取连接 {gate['acquired']} 次，超时 {gate['timeouts']} 次，等待 p50 {gate['wait_p50_ms']:.1f} ms / "
+            f"p95 {gate['wait_p95_ms']:.1f} ms / p99 {gate['wait_p99_ms']:.1f} ms / 最长 {gate['wait_max_ms']:.1f} ms"
+        )
+    await message.answer("\n".join(lines))
@@ -1,4 +1,4 @@
-from aiogram import Dispatcher, F
+from aiogram import Dispatcher
 from aiogram.filters import Command
 from aiogram.types import Message
 
@@ -6,7 +6,8 @@ from app.config import Config
 from app.services.prize_service import PrizeService
 from app.services.settings_service import SettingsService
 from app.texts import zh_cn
-from app.utils.permissions import is_chat_admin
+from app.utils.chat_registry import registered_chat
+from app.utils.permissions import ensure_admin
 import logging
 
 logger = logging.getLogger(__name__)
@@ -16,23 +17,12 @@ def register_admin_prize_handlers(dp: Dispatcher, config: Config) -> None:
     dp.message.register(
         cmd_show_weekly_prizes,
         Command("show_weekly_prizes", ignore_mention=False),
-        F.chat.id == config.target_chat_id,
+        registered_chat,
     )
 
 
-async def _ensure_admin(message: Message) -> bool:
-    if getattr(message, "sender_chat", None) and message.sender_chat.id == message.chat.id:
-        return True
-    is_admin = await is_chat_admin(message.bot, message.chat.id, message.from_user.id)
-    logger.info("Admin check chat_id=%s user_id=%s is_admin=%s", message.chat.id, message.from_user.id, is_admin)
-    if not is_admin:
-        await message.answer(zh_cn.TEXT_NOT_ADMIN)
-        return False
-    return True
-
-
 async def cmd_show_weekly_prizes(message: Message, prize_service: PrizeService, settings_service: SettingsService):
-    if not await _ensure_admin(message):
+    if not await ensure_admin(message):
         return
     settings = await settings_service.get_settings(message.chat.id)
     weekly_enabled = bool(settings.get("weekly_enabled", 0))
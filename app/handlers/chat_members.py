@@ -0,0 +1,47 @@
+import logging
+
+from aiogram import Bot, Dispatcher
+from aiogram.types import ChatMemberUpdated
+
+from app.config import Config
+from app.services.settings_service import SettingsService
+from app.utils.commands import update_admin_bot_commands
+from app.utils.permissions import admin_cache
+from app.utils.chat_registry import chat_registry, registered_chat
+
+logger = logging.getLogger(__name__)
+
+
+def register_chat_member_handlers(dp: Dispatcher, config: Config) -> None:
+    dp.chat_member.register(on_chat_member_updated, registered_chat)
+    # 不加 registered_chat：机器人被拉进新群或重新加入时，需要在这里把群登记进来
+    dp.my_chat_member.register(on_my_chat_member_updated)
+
+
+async def on_chat_member_updated(event: ChatMemberUpdated):
+    # 成员被提升/降级时直接修正管理员缓存，无需再请求 Telegram
+    admin_cache.apply_member_status(event.chat.id, event.new_chat_member.user.id, event.new_chat_member.status)
+
+
+async def on_my_chat_member_updated(event: ChatMemberUpdated, bot: Bot, config: Config, settings_service: SettingsService):
+    chat_id = event.chat.id
+    status = event.new_chat_member.status
+    logger.info("Bot membership changed chat_id=%s status=%s", chat_id, status)
+    admin_cache.invalidate(chat_id)
+    if status in ("left", "kicked"):
+        # 机器人被移出群组：停止为该群执行定时任务，重新加入后自动恢复
+        chat_registry.discard(chat_id)
+        return
+    if status not in ("member", "administrator") or chat_id in chat_registry:
+        return
+    if chat_id not in config.chat_ids and not config.bot.multi_chat:
+        logger.info("Ignoring chat_id=%s: not configured and MULTI_CHAT is off", chat_id)
+        return
+    # 创建默认 lottery_settings，多群模式下重启后也会被加载
+    settings = await settings_service.get_settings(chat_id)
+    chat_registry.add(chat_id)
+    logger.info("Chat registered chat_id=%s (%s chats served)", chat_id, len(chat_registry))
+    try:
+        await update_admin_bot_commands(bot, chat_id, weekly_enabled=bool(settings.get("weekly_enabled", 0)))
+    except Exception as e:
+        logger.warning("Failed to set admin commands for new chat_id=%s: %s", chat_id, e)
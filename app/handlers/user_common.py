@@ -1,4 +1,4 @@
-from aiogram import Dispatcher, F
+from aiogram import Dispatcher
 from aiogram.filters import Command
 from aiogram.types import Message
 
@@ -10,6 +10,7 @@ from app.services.lottery_service import LotteryService
 from app.services.announce_service import AnnounceService
 from app.texts import zh_cn
 from app.utils import time_utils
+from app.utils.chat_registry import registered_chat
 
 ADMIN_COMMAND_PREFIXES = (
     "/weekly_lottery_pause",
@@ -18,18 +19,23 @@ ADMIN_COMMAND_PREFIXES = (
     "/cleanup_checkins",
     "/stats_today",
     "/stats_week",
+    "/stats_range",
+    "/stats_month",
+    "/rebuild_stats",
     "/show_weekly_prizes",
     "/admin_ping",
+    "/admin_db_stats",
+    "/admin_slow_queries",
 )
 
 
 def register_user_common_handlers(dp: Dispatcher, config: Config) -> None:
-    dp.message.register(cmd_ping, Command("ping", ignore_mention=False), F.chat.id == config.target_chat_id)
-    dp.message.register(cmd_checkin_status, Command("checkin_status", ignore_mention=False), F.chat.id == config.target_chat_id)
-    dp.message.register(cmd_lottery_info, Command("lottery_info", ignore_mention=False), F.chat.id == config.target_chat_id)
-    dp.message.register(cmd_last_weekly_lottery_result, Command("last_weekly_lottery_result", ignore_mention=False), F.chat.id == config.target_chat_id)
-    dp.message.register(cmd_help, Command("help", ignore_mention=False), F.chat.id == config.target_chat_id)
-    dp.message.register(cmd_start, Command("start", ignore_mention=False), F.chat.id == config.target_chat_id)
+    dp.message.register(cmd_ping, Command("ping", ignore_mention=False), registered_chat)
+    dp.message.register(cmd_checkin_status, Command("checkin_status", ignore_mention=False), registered_chat)
+    dp.message.register(cmd_lottery_info, Command("lottery_info", ignore_mention=False), registered_chat)
+    dp.message.register(cmd_last_weekly_lottery_result, Command("last_weekly_lottery_result", ignore_mention=False), registered_chat)
+    dp.message.register(cmd_help, Command("help", ignore_mention=False), registered_chat)
+    dp.message.register(cmd_start, Command("start", ignore_mention=False), registered_chat)
 
 
 async def cmd_checkin_status(message: Message, checkin_service: CheckinService):
@@ -64,9 +70,8 @@ async def cmd_lottery_info(
         return
 
     today = time_utils.get_today_beijing(message.date)
-    week_start, week_end = time_utils.get_week_start_end(today)
-    checkin_map = await checkin_service.get_weekly_checkin_map(message.chat.id, week_start, week_end)
-    qualified_count = len(checkin_map or {})
+    week_start, _ = time_utils.get_week_start_end(today)
+    qualified_count = await checkin_service.count_week_participants(message.chat.id, week_start)
 
     weekly_prizes = await prize_service.get_current_prizes(message.chat.id, "weekly")
     prize_lines = zh_cn.render_prize_list("", weekly_prizes)
@@ -1,9 +1,15 @@
+import logging
+
 from aiogram import Dispatcher, F
 from aiogram.types import Message
 
 from app.config import Config
 from app.services.checkin_service import CheckinService
+from app.services.user_profile_service import UserProfileService
 from app.utils.aiogram_helpers import is_command_message
+from app.utils.chat_registry import registered_chat
+
+logger = logging.getLogger(__name__)
 
 
 def register_user_message_handlers(dp: Dispatcher, config: Config) -> None:
@@ -12,11 +18,11 @@ def register_user_message_handlers(dp: Dispatcher, config: Config) -> None:
         on_group_message,
         ~F.from_user.is_bot,
         ~F.text.startswith("/"),
-        F.chat.id == config.target_chat_id,
+        registered_chat,
     )
 
 
-async def on_group_message(message: Message, checkin_service: CheckinService):
+async def on_group_message(message: Message, checkin_service: CheckinService, user_profile_service: UserProfileService):
     if is_command_message(message):
         return
     await checkin_service.process_message_for_checkin(
@@ -25,3 +31,8 @@ async def on_group_message(message: Message, checkin_service: CheckinService):
         message_id=message.message_id,
         message_time=message.date,
     )
+    # 被动记录用户名/昵称，仅在资料变化时写库，供开奖公告批量解析；失败不影响打卡
+    try:
+        await user_profile_service.observe_user(message.chat.id, message.from_user)
+    except Exception as e:
+        logger.warning("Failed to store profile for user_id=%s: %s", message.from_user.id, e)
@@ -0,0 +1,258 @@
+"""
+Minimal Prometheus text-format metrics (no client library needed).
+
+Metrics are plain in-process counters / histograms guarded by nothing but the
+event loop, so recording costs a dict lookup and a bisect. Gauges that mirror
+other components (pool, queues, caches) are read lazily by collectors only
+when /metrics is scraped.
+"""
+
+import bisect
+import logging
+import time
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from aiohttp import web
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+# label combinations beyond this collapse into "other" so a typo'd command cannot blow up cardinality
+MAX_SERIES = 200
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(str(v))}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+
+    def _key(self, labels: Sequence[str]) -> LabelValues:
+        key = tuple(str(v) for v in labels)
+        if len(key) != len(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}")
+        return key
+
+    def _admit(self, series: dict, key: LabelValues) -> LabelValues:
+        if key in series or len(series) < MAX_SERIES:
+            return key
+        return tuple("other" for _ in key)
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, help_text, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        key = self._admit(self._values, self._key(labels))
+        self._values[key] = self._values.get(key, 0.0) + amount
+
+    def render(self) -> List[str]:
+        lines = self.header()
+        for key, value in self._values.items():
+            lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {value}")
+        return lines
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, help_text, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def set(self, value: float, *labels: str) -> None:
+        self._values[self._admit(self._values, self._key(labels))] = value
+
+    def clear(self) -> None:
+        self._values.clear()
+
+    def render(self) -> List[str]:
+        lines = self.header()
+        for key, value in self._values.items():
+            lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {value}")
+        return lines
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # key -> [bucket counts..., sum, count]
+        self._series: Dict[LabelValues, List[float]] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        key = self._admit(self._series, self._key(labels))
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = [0] * len(self.buckets) + [0.0, 0]
+        idx = bisect.bisect_left(self.buckets, value)
+        if idx < len(self.buckets):
+            series[idx] += 1
+        series[-2] += value
+        series[-1] += 1
+
+    def time(self, *labels: str) -> "_Timer":
+        return _Timer(self, labels)
+
+    def render(self) -> List[str]:
+        lines = self.header()
+        n = len(self.buckets)
+        for key, series in self._series.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets, series[:n]):
+                cumulative += count
+                le = f'le="{bound}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+            le_inf = 'le="+Inf"'
+            lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le_inf)} {series[-1]}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {series[-2]}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {series[-1]}")
+        return lines
+
+
+class _Timer:
+    def __init__(self, histogram: Histogram, labels: Sequence[str]):
+        self.histogram = histogram
+        self.labels = labels
+        self.started = 0.0
+
+    def __enter__(self) -> "_Timer":
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.histogram.observe(time.perf_counter() - self.started, *self.labels)
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._collectors: List[Callable[[], None]] = []
+
+    def counter(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, help_text, labelnames))
+
+    def gauge(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, help_text, labelnames))
+
+    def histogram(self, name: str, help_text: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, help_text, labelnames, buckets))
+
+    def add_collector(self, collector: Callable[[], None]) -> None:
+        """collector() runs on every scrape and refreshes gauges from live objects."""
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        for collector in self._collectors:
+            try:
+                collector()
+            except Exception as e:
+                logger.warning("Metrics collector %s failed: %s", getattr(collector, "__name__", collector), e)
+        lines: List[str] = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def _register(self, metric):
+        existing = self._metrics.get(metric.name)
+        if existing is not None:
+            return existing
+        self._metrics[metric.name] = metric
+        return metric
+
+
+registry = MetricsRegistry()
+
+HANDLER_SECONDS = registry.histogram("lotterybot_handler_seconds", "Update handling latency by command / update kind", ("handler",))
+HANDLER_ERRORS = registry.counter("lotterybot_handler_errors_total", "Updates whose handler raised", ("handler",))
+CHECKIN_MESSAGES = registry.counter("lotterybot_checkin_messages_total", "Group messages processed for check-in")
+CHECKIN_RECORDED = registry.counter("lotterybot_checkins_recorded_total", "First check-ins of a day written to the database")
+DB_QUERY_SECONDS = registry.histogram("lotterybot_db_query_seconds", "Statement latency by query function", ("query",))
+DB_QUERY_ERRORS = registry.counter("lotterybot_db_query_errors_total", "Failed statements by query function", ("query",))
+DB_POOL_CONNECTIONS = registry.gauge("lotterybot_db_pool_connections", "asyncmy pool connections by state", ("state",))
+TELEGRAM_SECONDS = registry.histogram("lotterybot_telegram_request_seconds", "Bot API call latency by method", ("method",))
+TELEGRAM_ERRORS = registry.counter("lotterybot_telegram_request_errors_total", "Failed Bot API calls by method and error", ("method", "error"))
+JOB_SECONDS = registry.histogram("lotterybot_job_seconds", "Scheduled job duration", ("job",), buckets=(0.1, 0.5, 1, 5, 15, 60, 300, 900))
+JOB_FAILURES = registry.counter("lotterybot_job_failures_total", "Scheduled jobs that raised", ("job",))
+COMPONENT_STATS = registry.gauge("lotterybot_component_stat", "Internal component stats (caches, queues, governor)", ("component", "stat"))
+
+
+async def _metrics_handler(request: web.Request) -> web.Response:
+    return web.Response(text=registry.render(), content_type="text/plain", charset="utf-8")
+
+
+def add_metrics_route(app: web.Application, path: str = "/metrics") -> None:
+    app.router.add_get(path, _metrics_handler)
+
+
+async def start_metrics_server(host: str, port: int, path: str = "/metrics") -> web.AppRunner:
+    app = web.Application()
+    add_metrics_route(app, path)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, host=host, port=port).start()
+    logger.info("Metrics endpoint listening on %s:%s%s", host, port, path)
+    return runner
+
+
+def _flatten(stats: dict, prefix: str = "") -> Iterator[Tuple[str, float]]:
+    for key, value in stats.items():
+        # 统计名必须是固定的字段名；按 chat_id 等 id 展开会让序列数无限增长
+        if not isinstance(key, str) or key.lstrip("-").isdigit():
+            continue
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            yield from _flatten(value, f"{name}_")
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            yield name, float(value)
+
+
+def register_component(name: str, stats: Callable[[], Optional[dict]]) -> None:
+    """
+    Export the numeric fields of a component's stats() dict (nested dicts are flattened) on every scrape.
+    Pass aggregates, not per-chat dicts: id-like keys are skipped to keep the stat label bounded.
+    """
+
+    def collect() -> None:
+        values = stats() or {}
+        for stat, value in _flatten(values):
+            COMPONENT_STATS.set(value, name, stat)
+
+    registry.add_collector(collect)
+
+
+def register_pool_metrics(pool_stats: Callable[[], Optional[dict]]) -> None:
+    def collect() -> None:
+        stats = pool_stats()
+        if stats:
+            DB_POOL_CONNECTIONS.set(stats["in_use"], "in_use")
+            DB_POOL_CONNECTIONS.set(stats["free"], "idle")
+            DB_POOL_CONNECTIONS.set(stats["maxsize"], "max")
+            if "gate" in stats:
+                DB_POOL_CONNECTIONS.set(stats["gate"]["limit"], "limit")
+
+    registry.add_collector(collect)
@@ -0,0 +1,150 @@
+"""
+Dispatch-level concurrency governor.
+
+Every update passes through one gate with a fixed number of in-flight slots
+(roughly the DB pool size). Commands, callbacks and membership updates use a
+priority lane: they are woken before plain messages, and `command_reserved`
+slots are never handed to plain messages, so admin commands do not queue
+behind a burst of check-ins. Plain messages beyond `max_queue` waiters are
+shed instead of piling up as tasks.
+"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Deque
+
+from aiogram import BaseMiddleware
+from aiogram.types import Update
+
+logger = logging.getLogger(__name__)
+
+LANE_COMMAND = "command"
+LANE_MESSAGE = "message"
+
+
+class _Lane:
+    def __init__(self, name: str):
+        self.name = name
+        self.waiters: Deque[asyncio.Future] = deque()
+        self.in_flight = 0
+        self.admitted = 0
+        self.shed = 0
+        self.max_depth = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def stats(self) -> dict:
+        return {
+            "in_flight": self.in_flight,
+            "queue_depth": len(self.waiters),
+            "max_queue_depth": self.max_depth,
+            "admitted": self.admitted,
+            "shed": self.shed,
+            "avg_wait_ms": (self.wait_total / self.admitted * 1000) if self.admitted else 0.0,
+            "max_wait_ms": self.wait_max * 1000,
+        }
+
+
+class ConcurrencyGovernor:
+    def __init__(self, max_in_flight: int = 4, command_reserved: int = 1, max_queue: int = 5000):
+        self.max_in_flight = max(1, max_in_flight)
+        self.command_reserved = max(0, min(command_reserved, self.max_in_flight - 1))
+        self.max_queue = max(0, max_queue)
+        self.lanes = {LANE_COMMAND: _Lane(LANE_COMMAND), LANE_MESSAGE: _Lane(LANE_MESSAGE)}
+        self.in_flight = 0
+
+    @staticmethod
+    def classify(update: Update) -> str:
+        message = update.message
+        if message is not None:
+            text = message.text or message.caption or ""
+            return LANE_COMMAND if text.startswith("/") else LANE_MESSAGE
+        if update.edited_message is not None:
+            return LANE_MESSAGE
+        return LANE_COMMAND
+
+    async def acquire(self, lane_name: str) -> bool:
+        """Wait for a slot; returns False if the update was shed."""
+        lane = self.lanes[lane_name]
+        if not lane.waiters and self._has_slot(lane_name):
+            self._grant(lane)
+            return True
+        if lane_name == LANE_MESSAGE and len(lane.waiters) >= self.max_queue:
+            lane.shed += 1
+            if lane.shed == 1 or lane.shed % 100 == 0:
+                logger.warning("Update queue full (%s waiting), shed %s messages so far", len(lane.waiters), lane.shed)
+            return False
+
+        fut = asyncio.get_running_loop().create_future()
+        lane.waiters.append(fut)
+        lane.max_depth = max(lane.max_depth, len(lane.waiters))
+        started = time.monotonic()
+        try:
+            await fut
+        except asyncio.CancelledError:
+            if fut.done() and not fut.cancelled():
+                # slot was granted right before cancellation: hand it back
+                self.release(lane_name)
+            else:
+                try:
+                    lane.waiters.remove(fut)
+                except ValueError:
+                    pass
+            raise
+        waited = time.monotonic() - started
+        lane.wait_total += waited
+        lane.wait_max = max(lane.wait_max, waited)
+        return True
+
+    def release(self, lane_name: str) -> None:
+        self.lanes[lane_name].in_flight -= 1
+        self.in_flight -= 1
+        self._wake()
+
+    def stats(self) -> dict:
+        return {
+            "max_in_flight": self.max_in_flight,
+            "in_flight": self.in_flight,
+            **{name: lane.stats() for name, lane in self.lanes.items()},
+        }
+
+    def _has_slot(self, lane_name: str) -> bool:
+        if lane_name == LANE_COMMAND:
+            return self.in_flight < self.max_in_flight
+        if self.lanes[LANE_COMMAND].waiters:
+            return False
+        return self.in_flight < self.max_in_flight - self.command_reserved
+
+    def _grant(self, lane: _Lane) -> None:
+        lane.in_flight += 1
+        lane.admitted += 1
+        self.in_flight += 1
+
+    def _wake(self) -> None:
+        for lane_name in (LANE_COMMAND, LANE_MESSAGE):
+            lane = self.lanes[lane_name]
+            while lane.waiters and self._has_slot(lane_name):
+                fut = lane.waiters.popleft()
+                if fut.done():
+                    continue
+                self._grant(lane)
+                fut.set_result(None)
+
+
+class ConcurrencyMiddleware(BaseMiddleware):
+    """Outer update middleware: dp.update.outer_middleware(ConcurrencyMiddleware(governor))."""
+
+    def __init__(self, governor: ConcurrencyGovernor):
+        super().__init__()
+        self.governor = governor
+
+    async def __call__(self, handler, event: Update, data):
+        lane = self.governor.classify(event)
+        if not await self.governor.acquire(lane):
+            return None
+        try:
+            return await handler(event, data)
+        finally:
+            self.governor.release(lane)
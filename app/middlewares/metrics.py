@@ -0,0 +1,48 @@
+import time
+
+from aiogram import BaseMiddleware
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware
+from aiogram.types import Update
+
+from app.metrics import HANDLER_ERRORS, HANDLER_SECONDS, TELEGRAM_ERRORS, TELEGRAM_SECONDS
+
+
+def _handler_label(update: Update) -> str:
+    message = update.message
+    if message is not None:
+        text = message.text or ""
+        if text.startswith("/"):
+            # "/stats_week@SomeBot 2024-01-01" -> "/stats_week"
+            return text.split(maxsplit=1)[0].split("@", 1)[0].lower()
+        return "message"
+    return update.event_type
+
+
+class UpdateMetricsMiddleware(BaseMiddleware):
+    """Outer update middleware; register after the concurrency governor so queue wait is not counted."""
+
+    async def __call__(self, handler, event: Update, data):
+        label = _handler_label(event)
+        started = time.perf_counter()
+        try:
+            return await handler(event, data)
+        except Exception:
+            HANDLER_ERRORS.inc(label)
+            raise
+        finally:
+            HANDLER_SECONDS.observe(time.perf_counter() - started, label)
+
+
+class TelegramMetricsMiddleware(BaseRequestMiddleware):
+    """Bot API latency / errors per method: bot.session.middleware(TelegramMetricsMiddleware())."""
+
+    async def __call__(self, make_request, bot, method):
+        name = type(method).__name__
+        started = time.perf_counter()
+        try:
+            return await make_request(bot, method)
+        except Exception as e:
+            TELEGRAM_ERRORS.inc(name, type(e).__name__)
+            raise
+        finally:
+            TELEGRAM_SECONDS.observe(time.perf_counter() - started, name)
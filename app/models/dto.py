@@ -37,3 +37,31 @@ class LotteryResultDTO:
     total_participants: int
     total_tickets: int
     winners: List[LotteryWinnerDTO]
+
+
+@dataclass
+class DailyCheckinStatsDTO:
+    date: date
+    user_count: int
+    new_users: int
+    checkins: int
+    messages: int = 0
+
+    @property
+    def returning_users(self) -> int:
+        return self.user_count - self.new_users
+
+
+@dataclass
+class RangeStatsDTO:
+    start_date: date
+    end_date: date
+    days: List[DailyCheckinStatsDTO]
+    unique_users: int
+    new_users: int
+    total_checkins: int
+    total_messages: int = 0
+
+    @property
+    def returning_users(self) -> int:
+        return self.unique_users - self.new_users
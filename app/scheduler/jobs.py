@@ -1,4 +1,6 @@
+import logging
 from datetime import datetime, timedelta
+from typing import Optional
 
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from aiogram import Bot
@@ -7,9 +9,15 @@ from app.services.checkin_service import CheckinService
 from app.services.lottery_service import LotteryService
 from app.services.announce_service import AnnounceService
 from app.services.settings_service import SettingsService
+from app.services.retention_service import RetentionService
 from app.utils import time_utils
+from app.utils.chat_registry import chat_registry, run_for_chats
+from app.scheduler.leader import LeaderElector
+from app.metrics import JOB_FAILURES, JOB_SECONDS
 from app.config import Config
 
+logger = logging.getLogger(__name__)
+
 
 def register_jobs(
     scheduler: AsyncIOScheduler,
@@ -20,17 +28,21 @@ def register_jobs(
     lottery_service: LotteryService,
     announce_service: AnnounceService,
     settings_service: SettingsService,
+    retention_service: Optional[RetentionService] = None,
+    leader: Optional[LeaderElector] = None,
 ) -> None:
-    chat_id = config.target_chat_id
+    concurrency = config.bot.chat_job_concurrency
 
     # daily stats at 00:00 Beijing
     scheduler.add_job(
-        job_daily_stats,
+        run_if_leader,
         "cron",
         hour="00",
         minute="00",
         kwargs={
-            "chat_id": chat_id,
+            "job": job_daily_stats_all_chats,
+            "leader": leader,
+            "concurrency": concurrency,
             "bot": bot,
             "checkin_service": checkin_service,
             "announce_service": announce_service,
@@ -41,13 +53,15 @@ def register_jobs(
 
     # weekly lottery Monday 00:00 Beijing
     scheduler.add_job(
-        job_weekly_lottery,
+        run_if_leader,
         "cron",
         day_of_week="mon",
         hour=config.scheduler.weekly_draw_at.split(":")[0],
         minute=config.scheduler.weekly_draw_at.split(":")[1],
         kwargs={
-            "chat_id": chat_id,
+            "job": job_weekly_lottery_all_chats,
+            "leader": leader,
+            "concurrency": concurrency,
             "bot": bot,
             "lottery_service": lottery_service,
             "announce_service": announce_service,
@@ -57,6 +71,57 @@ def register_jobs(
         replace_existing=True,
     )
 
+    # check-in retention and partition maintenance, daily at the configured Beijing time
+    if retention_service:
+        scheduler.add_job(
+            run_if_leader,
+            "cron",
+            hour=config.checkin.retention_run_at.split(":")[0],
+            minute=config.checkin.retention_run_at.split(":")[1],
+            kwargs={
+                "job": job_checkin_retention,
+                "leader": leader,
+                "concurrency": concurrency,
+                "retention_service": retention_service,
+                "retention_days": config.checkin.retention_days,
+            },
+            id="checkin_retention",
+            replace_existing=True,
+        )
+
+
+async def run_if_leader(job, leader: Optional[LeaderElector], **kwargs):
+    """Run a scheduled job only on the replica holding the scheduler lock (always, if election is off)."""
+    if leader is not None:
+        # 备用副本在宽限期内继续争锁：主副本恰好在触发前宕机时也能接手本次任务
+        if not await leader.wait_for_leadership(timeout=leader.check_interval * 2):
+            logger.info("Skipping job %s: not the scheduler leader", job.__name__)
+            return
+    try:
+        with JOB_SECONDS.time(job.__name__):
+            await job(**kwargs)
+    except Exception:
+        JOB_FAILURES.inc(job.__name__)
+        raise
+
+
+async def job_daily_stats_all_chats(concurrency: int, bot: Bot, checkin_service: CheckinService, announce_service: AnnounceService):
+    await run_for_chats(
+        chat_registry,
+        lambda chat_id: job_daily_stats(chat_id, bot, checkin_service, announce_service),
+        concurrency,
+    )
+    dedupe_stats = checkin_service.get_dedupe_stats()
+    if dedupe_stats:
+        logger.info(
+            "Check-in dedupe cache: hits=%s misses=%s hit_ratio=%.2f size=%s evictions=%s",
+            dedupe_stats["hits"],
+            dedupe_stats["misses"],
+            dedupe_stats["hit_ratio"],
+            dedupe_stats["size"],
+            dedupe_stats["evictions"],
+        )
+
 
 async def job_daily_stats(chat_id: int, bot: Bot, checkin_service: CheckinService, announce_service: AnnounceService):
     yesterday = time_utils.get_yesterday_beijing(datetime.utcnow())
@@ -64,6 +129,20 @@ async def job_daily_stats(chat_id: int, bot: Bot, checkin_service: CheckinServic
     await announce_service.send_daily_stats(chat_id, yesterday, count)
 
 
+async def job_weekly_lottery_all_chats(
+    concurrency: int,
+    bot: Bot,
+    lottery_service: LotteryService,
+    announce_service: AnnounceService,
+    settings_service: SettingsService,
+):
+    await run_for_chats(
+        chat_registry,
+        lambda chat_id: job_weekly_lottery(chat_id, bot, lottery_service, announce_service, settings_service),
+        concurrency,
+    )
+
+
 async def job_weekly_lottery(
     chat_id: int,
     bot: Bot,
@@ -75,3 +154,21 @@ async def job_weekly_lottery(
         return
     result = await lottery_service.run_weekly_lottery(chat_id, datetime.utcnow())
     await announce_service.send_weekly_lottery_result(chat_id, result)
+
+
+async def job_checkin_retention(concurrency: int, retention_service: RetentionService, retention_days: int):
+    today = time_utils.get_today_beijing(datetime.utcnow())
+    # 即使未开启保留期限，也要提前建好后续月份的分区，避免数据全部落入 pmax
+    await retention_service.ensure_future_partitions(today)
+    if retention_days <= 0:
+        return
+    cutoff = today - timedelta(days=retention_days)
+    # 整月过期的分区直接删除（秒级），剩余部分按群分批删除
+    await retention_service.drop_expired_partitions(cutoff)
+    results = await run_for_chats(
+        chat_registry,
+        lambda chat_id: retention_service.purge_before(chat_id, cutoff),
+        concurrency,
+    )
+    deleted = sum(v for v in results.values() if isinstance(v, int))
+    logger.info("Check-in retention before %s finished: %s rows deleted in %s chats", cutoff, deleted, len(results))
@@ -0,0 +1,114 @@
+"""
+Scheduler leader election for running several bot replicas.
+
+Every replica runs the scheduler, but jobs only execute on the replica that
+holds a MySQL named lock (GET_LOCK) on a dedicated connection. The lock is
+tied to that connection: if the leader process dies or loses its DB link,
+MySQL releases it and a standby takes over on its next check.
+"""
+
+import asyncio
+import logging
+from typing import Optional
+
+import asyncmy
+
+from app.config import DbConfig
+
+logger = logging.getLogger(__name__)
+
+
+class LeaderElector:
+    def __init__(self, db_config: DbConfig, lock_name: str = "lottery_bot_scheduler", check_interval: float = 5.0):
+        self.db_config = db_config
+        self.lock_name = lock_name
+        self.check_interval = max(0.5, check_interval)
+        self.is_leader = False
+        self._conn: Optional[asyncmy.Connection] = None
+        self._conn_lock = asyncio.Lock()
+        self._loop_task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        if self._loop_task is None:
+            self._loop_task = asyncio.create_task(self._loop())
+
+    async def stop(self) -> None:
+        if self._loop_task:
+            self._loop_task.cancel()
+            try:
+                await self._loop_task
+            except asyncio.CancelledError:
+                pass
+            self._loop_task = None
+        async with self._conn_lock:
+            if self._conn and self.is_leader:
+                try:
+                    await self._scalar("SELECT RELEASE_LOCK(%s)", (self.lock_name,))
+                except Exception as e:
+                    logger.warning("Failed to release scheduler lock: %s", e)
+            self._close()
+
+    async def ensure_leader(self) -> bool:
+        """Re-check ownership on the lock connection right before a job runs."""
+        async with self._conn_lock:
+            await self._check()
+        return self.is_leader
+
+    async def wait_for_leadership(self, timeout: float) -> bool:
+        """Used by standbys at job time: if the leader just died we may win the lock within the grace period."""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while True:
+            if await self.ensure_leader():
+                return True
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                return False
+            await asyncio.sleep(min(self.check_interval, remaining))
+
+    async def _loop(self) -> None:
+        while True:
+            async with self._conn_lock:
+                await self._check()
+            await asyncio.sleep(self.check_interval)
+
+    async def _check(self) -> None:
+        was_leader = self.is_leader
+        try:
+            if self._conn is None:
+                self._conn = await asyncmy.connect(
+                    host=self.db_config.host,
+                    port=self.db_config.port,
+                    user=self.db_config.user,
+                    password=self.db_config.password,
+                    db=self.db_config.database,
+                    autocommit=True,
+                    connect_timeout=self.db_config.connect_timeout_seconds,
+                )
+            if self.is_leader:
+                # 锁随连接存在；确认仍由本连接持有（同时充当 keepalive）
+                owned = await self._scalar("SELECT IS_USED_LOCK(%s) = CONNECTION_ID()", (self.lock_name,))
+                self.is_leader = bool(owned)
+            else:
+                acquired = await self._scalar("SELECT GET_LOCK(%s, 0)", (self.lock_name,))
+                self.is_leader = acquired == 1
+        except Exception as e:
+            logger.warning("Scheduler lock check failed, stepping down: %s", e)
+            self.is_leader = False
+            self._close()
+        if self.is_leader != was_leader:
+            logger.info("Scheduler leadership %s (lock=%s)", "acquired" if self.is_leader else "lost", self.lock_name)
+
+    async def _scalar(self, sql: str, params: tuple):
+        async with self._conn.cursor() as cur:
+            await cur.execute(sql, params)
+            row = await cur.fetchone()
+        return row[0] if row else None
+
+    def _close(self) -> None:
+        if self._conn:
+            try:
+                self._conn.close()
+            except Exception:
+                pass
+            self._conn = None
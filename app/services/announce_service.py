@@ -1,16 +1,21 @@
 import logging
+from typing import Dict, List, Optional
 
 from app.models.dto import LotteryResultDTO
+from app.services.outbound_queue import OutboundQueue, PRIORITY_NOTICE, PRIORITY_RESULT, PRIORITY_STATS
+from app.services.user_profile_service import UserProfileService, format_display_name
 from app.texts import zh_cn
 
 
 class AnnounceService:
-    def __init__(self, bot):
+    def __init__(self, bot, profile_service: Optional[UserProfileService] = None, outbound: Optional[OutboundQueue] = None):
         self.bot = bot
+        self.profile_service = profile_service
+        self.outbound = outbound
 
     async def send_daily_stats(self, chat_id: int, date, user_count: int) -> None:
         text = zh_cn.TEXT_DAILY_STATS.format(date=date, user_count=user_count)
-        await self.bot.send_message(chat_id=chat_id, text=text)
+        await self._send(chat_id, text, PRIORITY_STATS)
 
     async def send_weekly_lottery_result(self, chat_id: int, result: LotteryResultDTO) -> None:
         lines = [
@@ -25,8 +30,9 @@ class AnnounceService:
         if not result.winners:
             lines.append("😔 本期无人中奖")
         else:
+            user_tags = await self._resolve_user_tags(chat_id, [w.user_id for w in result.winners])
             for w in result.winners:
-                user_tag = await self._format_user(chat_id, w.user_id)
+                user_tag = user_tags[w.user_id]
                 lines.append(f"{self._medal_for_rank(w.prize_rank)} #{w.prize_rank} {user_tag} - {w.prize_name}")
 
         lines.extend(
@@ -38,23 +44,36 @@ class AnnounceService:
             ]
         )
 
-        await self.bot.send_message(chat_id=chat_id, text="\n".join(lines))
+        await self._send(chat_id, "\n".join(lines), PRIORITY_RESULT)
 
     async def send_new_member_welcome(self, chat_id: int, user_id: int) -> None:
         text = zh_cn.TEXT_NEW_MEMBER_WELCOME
-        await self.bot.send_message(chat_id=chat_id, text=text)
+        await self._send(chat_id, text, PRIORITY_NOTICE)
+
+    async def send_notice(self, chat_id: int, text: str) -> None:
+        await self._send(chat_id, text, PRIORITY_NOTICE)
+
+    async def _send(self, chat_id: int, text: str, priority: int) -> None:
+        # 统一经过发送队列：限速、RetryAfter 重试、超长拆分
+        if self.outbound:
+            await self.outbound.send(chat_id, text, priority=priority)
+        else:
+            await self.bot.send_message(chat_id=chat_id, text=text)
+
+    async def _resolve_user_tags(self, chat_id: int, user_ids: List[int]) -> Dict[int, str]:
+        if self.profile_service:
+            try:
+                return await self.profile_service.resolve_display_names(chat_id, user_ids)
+            except Exception as e:
+                logging.getLogger(__name__).warning("Bulk profile lookup failed, falling back to Bot API: %s", e)
+        return {uid: await self._format_user(chat_id, uid) for uid in dict.fromkeys(user_ids)}
 
     async def _format_user(self, chat_id: int, user_id: int) -> str:
         try:
             member = await self.bot.get_chat_member(chat_id, user_id)
             user = getattr(member, "user", None)
-            if user and user.username:
-                return f"@{user.username}"
             if user:
-                name_parts = [user.first_name or "", user.last_name or ""]
-                name = " ".join(part for part in name_parts if part).strip()
-                if name:
-                    return name
+                return format_display_name(user_id, user.username, user.first_name, user.last_name)
         except Exception as e:
             logging.getLogger(__name__).warning("Failed to resolve username for user_id=%s: %s", user_id, e)
         return f"用户 {user_id}"
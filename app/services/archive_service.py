@@ -0,0 +1,164 @@
+import asyncio
+import csv
+import gzip
+import hashlib
+import json
+import logging
+import os
+from datetime import date, datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from app.db.repositories import ArchiveRepository
+
+logger = logging.getLogger(__name__)
+
+
+def _csv_value(value: Any) -> Any:
+    if value is None:
+        return ""
+    if isinstance(value, datetime):
+        return value.isoformat(" ")
+    if isinstance(value, date):
+        return value.isoformat()
+    return value
+
+
+class _MonthWriter:
+    """One gzip'd CSV per table and month, written to a .tmp file and renamed once closed."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.tmp_path = path.with_name(path.name + ".tmp")
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = gzip.open(self.tmp_path, "wt", encoding="utf-8", newline="")
+        self._writer = csv.writer(self._file)
+        self.columns: Optional[List[str]] = None
+        self.rows = 0
+
+    def write(self, row: Dict[str, Any]) -> None:
+        if self.columns is None:
+            self.columns = [k for k in row if k != "archive_date"]
+            self._writer.writerow(self.columns)
+        self._writer.writerow([_csv_value(row[k]) for k in self.columns])
+        self.rows += 1
+
+    def close(self) -> None:
+        self._file.close()
+        os.replace(self.tmp_path, self.path)
+
+    def abort(self) -> None:
+        # 未完成的 .tmp 留在原处，不会被当作归档结果
+        self._file.close()
+
+
+def _verify_file(path: Path) -> tuple[int, str]:
+    """Re-read a finished file: (data rows, sha256 of the compressed bytes)."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    with gzip.open(path, "rt", encoding="utf-8", newline="") as f:
+        rows = sum(1 for _ in csv.reader(f)) - 1
+    return rows, digest.hexdigest()
+
+
+class ArchiveService:
+    """
+    Moves cold rows out of the hot tables into gzip'd CSV files, one per table and month.
+
+    Rows are streamed (server-side cursor on MySQL), so memory stays flat however many
+    rows are archived. The purge only runs after the files were re-read and their row
+    counts match both the export and a COUNT(*) over the same rows, and it deletes in
+    chunks like RetentionService.
+    """
+
+    def __init__(
+        self,
+        repo: ArchiveRepository,
+        output_dir: str,
+        chunk_size: int = 5000,
+        pause_seconds: float = 0.2,
+        batch_size: int = 1000,
+    ):
+        self.repo = repo
+        self.output_dir = Path(output_dir)
+        self.chunk_size = max(1, chunk_size)
+        self.pause_seconds = max(0.0, pause_seconds)
+        self.batch_size = max(1, batch_size)
+
+    async def archive(self, cutoff: date, tables: Optional[List[str]] = None, purge: bool = True) -> dict:
+        run_id = datetime.utcnow().strftime("%Y%m%dT%H%M%SZ")
+        results = []
+        for table in tables or ArchiveRepository.TABLES:
+            results.append(await self.archive_table(table, cutoff, run_id, purge=purge))
+        manifest = {"run_id": run_id, "cutoff": cutoff.isoformat(), "tables": results}
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        manifest_path = self.output_dir / f"manifest_{run_id}.json"
+        manifest_path.write_text(json.dumps(manifest, ensure_ascii=False, indent=2), encoding="utf-8")
+        logger.info("Archive run %s written to %s", run_id, manifest_path)
+        return manifest
+
+    async def archive_table(self, table: str, cutoff: date, run_id: str, purge: bool = True) -> dict:
+        if table not in ArchiveRepository.TABLES:
+            raise ValueError(f"Unsupported archive table {table!r}")
+        files: List[dict] = []
+        writer: Optional[_MonthWriter] = None
+        month = None
+        exported = 0
+        max_id = 0
+        try:
+            async for row in self.repo.stream_rows(table, cutoff, self.batch_size):
+                row_month = row["archive_date"].strftime("%Y-%m")
+                if row_month != month:
+                    if writer:
+                        writer.close()
+                        files.append({"month": month, "path": str(writer.path), "rows": writer.rows})
+                    month = row_month
+                    writer = _MonthWriter(self.output_dir / table / f"{table}_{month}_{run_id}.csv.gz")
+                writer.write(row)
+                exported += 1
+                max_id = max(max_id, int(row["id"]))
+        except BaseException:
+            if writer:
+                writer.abort()
+            raise
+        if writer:
+            writer.close()
+            files.append({"month": month, "path": str(writer.path), "rows": writer.rows})
+
+        result = {"table": table, "exported": exported, "max_id": max_id, "files": files, "verified": False, "purged": 0}
+        if not exported:
+            result["verified"] = True
+            logger.info("Archive %s: nothing before %s", table, cutoff)
+            return result
+
+        file_rows = 0
+        for f in files:
+            rows, sha256 = _verify_file(Path(f["path"]))
+            f["sha256"] = sha256
+            file_rows += rows
+        db_rows = await self.repo.count_rows(table, cutoff, max_id)
+        if not (file_rows == exported == db_rows):
+            logger.error(
+                "Archive %s verification failed: exported=%s files=%s db=%s; nothing purged",
+                table, exported, file_rows, db_rows,
+            )
+            return result
+        result["verified"] = True
+        logger.info("Archive %s: %s rows before %s in %s files", table, exported, cutoff, len(files))
+
+        if purge:
+            result["purged"] = await self._purge(table, cutoff, max_id)
+        return result
+
+    async def _purge(self, table: str, cutoff: date, max_id: int) -> int:
+        deleted = 0
+        while True:
+            n = await self.repo.delete_chunk(table, cutoff, max_id, self.chunk_size)
+            deleted += n
+            if n < self.chunk_size:
+                break
+            await asyncio.sleep(self.pause_seconds)
+        logger.info("Archive %s: purged %s rows", table, deleted)
+        return deleted
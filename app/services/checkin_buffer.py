@@ -0,0 +1,78 @@
+"""
+Write-behind buffer for daily check-ins.
+
+Messages are coalesced per (chat_id, user_id, checkin_date) in memory and flushed
+as one multi-row upsert when the batch is full or when CheckinService's
+periodic flush runs. Rollups are bumped in the same transaction (record_checkins).
+"""
+
+import asyncio
+import logging
+from datetime import date, datetime
+from typing import Dict, Optional, Tuple
+
+from app.db.repositories import CheckinRepository
+from app.metrics import CHECKIN_RECORDED
+
+logger = logging.getLogger(__name__)
+
+CheckinKey = Tuple[int, int, date]
+
+
+class CheckinBuffer:
+    def __init__(self, repo: CheckinRepository, max_batch: int = 500):
+        self.repo = repo
+        self.max_batch = max(1, max_batch)
+        # key -> (message_id, message_time)，同一天只保留最后一条消息
+        self._pending: Dict[CheckinKey, Tuple[int, datetime]] = {}
+        self._flush_lock = asyncio.Lock()
+        self._size_flush_task: Optional[asyncio.Task] = None
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def add(self, chat_id: int, user_id: int, checkin_date: date, message_id: int, message_time: datetime) -> None:
+        self._merge((chat_id, user_id, checkin_date), message_id, message_time)
+        if len(self._pending) >= self.max_batch and not self._size_flush_running():
+            self._size_flush_task = asyncio.create_task(self._flush_logged())
+
+    async def flush(self) -> int:
+        """Write all pending check-ins; returns the number of rows sent."""
+        async with self._flush_lock:
+            if not self._pending:
+                return 0
+            batch, self._pending = self._pending, {}
+            items = list(batch.items())
+            written = 0
+            try:
+                for i in range(0, len(items), self.max_batch):
+                    chunk = items[i : i + self.max_batch]
+                    rows = [(chat_id, user_id, d, message_id, message_time) for (chat_id, user_id, d), (message_id, message_time) in chunk]
+                    new_keys = await self.repo.record_checkins(rows)
+                    CHECKIN_RECORDED.inc(amount=len(new_keys))
+                    written += len(chunk)
+            except Exception:
+                # put unwritten rows back so the next flush retries them
+                for key, (message_id, message_time) in items[written:]:
+                    self._merge(key, message_id, message_time)
+                raise
+            return written
+
+    async def wait_idle(self) -> None:
+        """Wait for a size-triggered flush that is still running."""
+        if self._size_flush_running():
+            await self._size_flush_task
+
+    def _merge(self, key: CheckinKey, message_id: int, message_time: datetime) -> None:
+        current = self._pending.get(key)
+        if current is None or message_time >= current[1]:
+            self._pending[key] = (message_id, message_time)
+
+    def _size_flush_running(self) -> bool:
+        return self._size_flush_task is not None and not self._size_flush_task.done()
+
+    async def _flush_logged(self) -> None:
+        try:
+            await self.flush()
+        except Exception as e:
+            logger.exception("Check-in buffer flush failed, %s rows pending: %s", len(self._pending), e)
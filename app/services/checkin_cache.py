@@ -0,0 +1,66 @@
+"""
+In-process "already checked in today" cache.
+
+Keys are (chat_id, user_id, checkin_date) for the current Beijing date only;
+the cache rolls over when the first message of a new date arrives and evicts
+least-recently-seen users once it is full, so memory stays flat.
+"""
+
+from collections import OrderedDict
+from datetime import date
+from typing import Iterable, Optional, Tuple
+
+CheckinKey = Tuple[int, int, date]
+
+
+class CheckinDedupeCache:
+    def __init__(self, max_entries: int = 50000):
+        self.max_entries = max(1, max_entries)
+        self.current_date: Optional[date] = None
+        self._keys: "OrderedDict[CheckinKey, None]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def check(self, key: CheckinKey) -> bool:
+        """Return True if this user already checked in on that date (counts a hit/miss)."""
+        if key in self._keys:
+            self._keys.move_to_end(key)
+            self.hits += 1
+            return True
+        self.misses += 1
+        return False
+
+    def add(self, key: CheckinKey) -> None:
+        checkin_date = key[2]
+        if self.current_date is None or checkin_date > self.current_date:
+            # 北京时间跨天：丢弃前一天的全部记录
+            self._keys.clear()
+            self.current_date = checkin_date
+        elif checkin_date < self.current_date:
+            # 跨天前的迟到消息，不缓存
+            return
+        self._keys[key] = None
+        self._keys.move_to_end(key)
+        while len(self._keys) > self.max_entries:
+            self._keys.popitem(last=False)
+            self.evictions += 1
+
+    def warm(self, chat_id: int, checkin_date: date, user_ids: Iterable[int]) -> None:
+        for user_id in user_ids:
+            self.add((chat_id, user_id, checkin_date))
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "date": self.current_date,
+            "size": len(self._keys),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": (self.hits / lookups) if lookups else 0.0,
+        }
@@ -1,31 +1,125 @@
+import asyncio
+import logging
 from datetime import datetime, date
+from typing import Dict, Optional, Set, Tuple
 
 from app.db.repositories import CheckinRepository
+from app.metrics import CHECKIN_MESSAGES, CHECKIN_RECORDED
+from app.services.checkin_buffer import CheckinBuffer
+from app.services.checkin_cache import CheckinDedupeCache
 from app.utils import time_utils
 from app.models.dto import CheckinStatusDTO
 
+logger = logging.getLogger(__name__)
+
 
 class CheckinService:
-    def __init__(self, repo: CheckinRepository):
+    def __init__(self, repo: CheckinRepository, buffer: Optional[CheckinBuffer] = None, dedupe_cache: Optional[CheckinDedupeCache] = None):
         self.repo = repo
+        self.buffer = buffer
+        self.dedupe_cache = dedupe_cache
+        # (chat_id, checkin_date) -> 未落库的消息数，定期累加到 daily_checkin_rollups.message_count
+        self._pending_messages: Dict[Tuple[int, date], int] = {}
+        # 直写模式下正在写入的 key，避免同一用户的并发消息重复累加 rollup
+        self._inflight: Set[Tuple[int, int, date]] = set()
+        self._flush_lock = asyncio.Lock()
+        self._loop_task: Optional[asyncio.Task] = None
 
     async def process_message_for_checkin(self, chat_id: int, user_id: int, message_id: int, message_time: datetime) -> None:
         checkin_date = time_utils.get_today_beijing(message_time)
-        await self.repo.mark_checkin(chat_id, user_id, checkin_date, message_id, message_time)
+        key = (chat_id, user_id, checkin_date)
+        day_key = (chat_id, checkin_date)
+        CHECKIN_MESSAGES.inc()
+        self._pending_messages[day_key] = self._pending_messages.get(day_key, 0) + 1
+        # 当天已打卡的重复消息不再触达数据库
+        if self.dedupe_cache and self.dedupe_cache.check(key):
+            return
+        if self.buffer:
+            self.buffer.add(chat_id, user_id, checkin_date, message_id, message_time)
+        else:
+            if key in self._inflight:
+                return
+            self._inflight.add(key)
+            try:
+                new_keys = await self.repo.record_checkins([(chat_id, user_id, checkin_date, message_id, message_time)])
+                CHECKIN_RECORDED.inc(amount=len(new_keys))
+            finally:
+                self._inflight.discard(key)
+        if self.dedupe_cache:
+            self.dedupe_cache.add(key)
+
+    async def warm_dedupe_cache(self, chat_id: int, now: datetime | None = None) -> int:
+        """Pre-load today's checked-in users so the first message after a restart is deduped too."""
+        if not self.dedupe_cache:
+            return 0
+        today = time_utils.get_today_beijing(now)
+        user_ids = await self.repo.get_user_ids_for_date(chat_id, today)
+        self.dedupe_cache.warm(chat_id, today, user_ids)
+        return len(user_ids)
+
+    def get_dedupe_stats(self) -> Optional[dict]:
+        return self.dedupe_cache.stats() if self.dedupe_cache else None
+
+    async def flush_pending(self) -> int:
+        """Persist buffered check-ins (write-behind mode) and message counters before anything reads them."""
+        written = await self.buffer.flush() if self.buffer else 0
+        async with self._flush_lock:
+            counts, self._pending_messages = self._pending_messages, {}
+            if counts:
+                try:
+                    await self.repo.add_message_counts(counts)
+                except Exception:
+                    for day_key, n in counts.items():
+                        self._pending_messages[day_key] = self._pending_messages.get(day_key, 0) + n
+                    raise
+        return written
+
+    def start(self, flush_interval: float) -> None:
+        if self._loop_task is None:
+            self._loop_task = asyncio.create_task(self._flush_loop(flush_interval))
+
+    async def stop(self) -> None:
+        """Cancel the background loop and flush whatever is still pending."""
+        if self._loop_task:
+            self._loop_task.cancel()
+            try:
+                await self._loop_task
+            except asyncio.CancelledError:
+                pass
+            self._loop_task = None
+        if self.buffer:
+            await self.buffer.wait_idle()
+        await self.flush_pending()
+
+    async def _flush_loop(self, flush_interval: float) -> None:
+        while True:
+            await asyncio.sleep(flush_interval)
+            try:
+                await self.flush_pending()
+            except Exception as e:
+                logger.exception("Check-in flush failed: %s", e)
 
     async def get_checkin_status_for_user(self, chat_id: int, user_id: int, now: datetime) -> CheckinStatusDTO:
+        await self.flush_pending()
         today = time_utils.get_today_beijing(now)
-        week_start, week_end = time_utils.get_week_start_end(today)
-        today_row = await self.repo.get_today_checkin(chat_id, user_id, today)
-        week_count = await self.repo.get_week_checkin_count(chat_id, user_id, week_start, week_end)
-        return CheckinStatusDTO(today_checked=bool(today_row), week_checkin_count=week_count, checkin_date=today)
+        week_start, _ = time_utils.get_week_start_end(today)
+        # 单次主键读取：last_date 即本周最近一次打卡日期
+        row = await self.repo.get_week_attendance(chat_id, user_id, week_start)
+        return CheckinStatusDTO(
+            today_checked=bool(row) and row["last_date"] == today,
+            week_checkin_count=int(row["days"]) if row else 0,
+            checkin_date=today,
+        )
+
+    async def count_week_participants(self, chat_id: int, week_start: date) -> int:
+        await self.flush_pending()
+        return await self.repo.count_week_participants(chat_id, week_start)
 
     async def count_yesterday_checkins(self, chat_id: int, now: datetime) -> int:
+        await self.flush_pending()
         yesterday = time_utils.get_yesterday_beijing(now)
         return await self.repo.count_yesterday_checkins(chat_id, yesterday)
 
     async def get_weekly_checkin_map(self, chat_id: int, week_start: date, week_end: date):
+        await self.flush_pending()
         return await self.repo.get_weekly_checkin_counts_for_all_users(chat_id, week_start, week_end)
-
-    async def delete_before(self, chat_id: int, cutoff_date: date) -> int:
-        return await self.repo.delete_before(chat_id, cutoff_date)
@@ -0,0 +1,82 @@
+"""
+Weighted sampling without replacement for the lottery draw.
+
+A Fenwick (binary indexed) tree over the participant weights gives O(log n)
+picks and removals, so drawing k winners out of n participants costs
+O(n + k log n) instead of rebuilding and rescanning the pool for every prize unit.
+"""
+
+import random
+from typing import Iterator, List, Sequence
+
+
+class WeightedSampler:
+    def __init__(self, weights: Sequence[int]):
+        n = len(weights)
+        self._weights: List[int] = [max(int(w), 0) for w in weights]
+        tree = [0] * (n + 1)
+        for i, w in enumerate(self._weights, start=1):
+            tree[i] += w
+            parent = i + (i & -i)
+            if parent <= n:
+                tree[parent] += tree[i]
+        self._tree = tree
+        self._size = n
+        self._top_bit = 1 << (n.bit_length() - 1) if n else 0
+        self.total = sum(self._weights)
+
+    def __len__(self) -> int:
+        return self._size
+
+    def find(self, target: int) -> int:
+        """Index of the entry whose cumulative weight range contains target (1 <= target <= total)."""
+        pos = 0
+        remaining = target
+        step = self._top_bit
+        tree = self._tree
+        while step:
+            nxt = pos + step
+            if nxt <= self._size and tree[nxt] < remaining:
+                pos = nxt
+                remaining -= tree[nxt]
+            step >>= 1
+        return pos
+
+    def sample(self, rng: random.Random | None = None) -> int:
+        if self.total <= 0:
+            raise ValueError("No positive weight left to sample from")
+        pick = (rng or random).randint(1, self.total)
+        return self.find(pick)
+
+    def remove(self, index: int) -> None:
+        w = self._weights[index]
+        if w <= 0:
+            return
+        self._weights[index] = 0
+        self.total -= w
+        i = index + 1
+        while i <= self._size:
+            self._tree[i] -= w
+            i += i & -i
+
+
+def iter_weighted_draws(weights: Sequence[int], rng: random.Random | None = None, groups: Sequence | None = None) -> Iterator[int]:
+    """
+    Yield entry indices in draw order until no positive weight is left.
+
+    If groups is given (e.g. user_ids), drawing one index also removes every
+    other index with the same group so nobody can win twice.
+    """
+    sampler = WeightedSampler(weights)
+    members = {}
+    if groups is not None:
+        for idx, g in enumerate(groups):
+            members.setdefault(g, []).append(idx)
+    while sampler.total > 0:
+        idx = sampler.sample(rng)
+        if groups is not None:
+            for other in members[groups[idx]]:
+                sampler.remove(other)
+        else:
+            sampler.remove(idx)
+        yield idx
@@ -1,43 +1,77 @@
 from datetime import datetime, date, timedelta
 from typing import List, Dict, Optional
+import logging
 import random
 
 from app.db.repositories import LotteryRepository, PrizeRepository, CheckinRepository, SettingsRepository
+from app.services.checkin_buffer import CheckinBuffer
+from app.services.draw_engine import iter_weighted_draws
+from app.services.prize_service import PrizeService
+from app.services.settings_service import SettingsService
 from app.models.dto import LotteryResultDTO, LotteryWinnerDTO
 from app.utils import time_utils
 
+logger = logging.getLogger(__name__)
+
+
+class RoundClaimedError(Exception):
+    """Another worker created the same lottery round first (unique key on chat/type/period)."""
+
 
 class LotteryService:
-    def __init__(self, lottery_repo: LotteryRepository, prize_repo: PrizeRepository, checkin_repo: CheckinRepository, settings_repo: SettingsRepository):
+    def __init__(
+        self,
+        lottery_repo: LotteryRepository,
+        prize_repo: PrizeRepository,
+        checkin_repo: CheckinRepository,
+        settings_repo: SettingsRepository,
+        checkin_buffer: Optional[CheckinBuffer] = None,
+        settings_service: Optional[SettingsService] = None,
+        prize_service: Optional[PrizeService] = None,
+    ):
         self.lottery_repo = lottery_repo
         self.prize_repo = prize_repo
         self.checkin_repo = checkin_repo
         self.settings_repo = settings_repo
+        self.checkin_buffer = checkin_buffer
+        self.settings_service = settings_service
+        # 奖池读写统一经过 PrizeService，保证其缓存随克隆同步失效
+        self.prize_service = prize_service or PrizeService(prize_repo)
 
     async def run_weekly_lottery(self, chat_id: int, now: datetime) -> LotteryResultDTO:
         today = time_utils.get_today_beijing(now)
         last_week_target = today - timedelta(days=7)
         week_start, week_end = time_utils.get_week_start_end(last_week_target)
 
+        # write-behind 模式下先落库缓冲的打卡，保证开奖读取到完整数据
+        if self.checkin_buffer:
+            await self.checkin_buffer.flush()
+
+        # 整个开奖在一个事务内完成：中途失败会整体回滚，不会留下写了一半的轮次
+        try:
+            async with self.lottery_repo.session(transaction=True):
+                return await self._run_weekly_lottery_in_session(chat_id, week_start, week_end)
+        except RoundClaimedError:
+            # 另一副本/并发请求已抢先开奖：本事务已回滚，读取对方已提交的结果
+            claimed = await self.lottery_repo.get_round_by_period(chat_id, "weekly", week_start, week_end)
+            if claimed and claimed.get("status") == "done":
+                logger.info("Weekly round chat_id=%s %s already drawn by another worker", chat_id, week_start)
+                return await self._result_from_round(claimed, week_start, week_end)
+            raise
+
+    async def _run_weekly_lottery_in_session(self, chat_id: int, week_start: date, week_end: date) -> LotteryResultDTO:
         existing = await self.lottery_repo.get_round_by_period(chat_id, "weekly", week_start, week_end)
         if existing and existing.get("status") == "done":
-            winners_rows = await self.lottery_repo.get_winners(existing["id"])
-            winners = [LotteryWinnerDTO(user_id=w["user_id"], prize_name=w["prize_name"], prize_description=w.get("prize_description") or "", prize_rank=w.get("prize_rank", 1)) for w in winners_rows]
-            return LotteryResultDTO(
-                round_id=existing["id"],
-                round_type="weekly",
-                period_start_date=week_start,
-                period_end_date=week_end,
-                total_participants=existing.get("total_participants", 0),
-                total_tickets=existing.get("total_tickets", 0),
-                winners=winners,
-            )
+            return await self._result_from_round(existing, week_start, week_end)
 
-        checkin_map = await self.checkin_repo.get_weekly_checkin_counts_for_all_users(chat_id, week_start, week_end)
+        checkin_map = await self.checkin_repo.get_week_attendance_counts(chat_id, week_start)
         if not checkin_map:
             raise ValueError("No participants for weekly lottery")
 
-        settings = await self.settings_repo.get_or_create_settings(chat_id, "Asia/Shanghai")
+        if self.settings_service:
+            settings = await self.settings_service.get_settings(chat_id)
+        else:
+            settings = await self.settings_repo.get_or_create_settings(chat_id, "Asia/Shanghai")
         full_factor = int(settings.get("full_attendance_factor", 2) or 2)
 
         entries = []
@@ -48,28 +82,22 @@ class LotteryService:
             entries.append({"chat_id": chat_id, "user_id": user_id, "checkin_days": days, "weight": weight, "is_full_attendance": is_full})
             total_weight += weight
 
-        prize_set = await self.prize_repo.get_prize_set_for_period(chat_id, "weekly", week_start, week_end)
-        if not prize_set:
+        week_prizes = await self.prize_service.get_week_prizes(chat_id, week_start, week_end)
+        if week_prizes:
+            prize_set, prize_items = week_prizes
+        else:
             # try to clone from latest before this week
-            latest = await self.prize_repo.get_latest_prize_set_before(chat_id, "weekly", week_start)
+            latest = await self.prize_service.get_latest_prize_set_before(chat_id, week_start)
             if latest:
-                new_set_id = await self.prize_repo.create_prize_set(chat_id, "weekly", week_start, week_end)
-                source_items = await self.prize_repo.list_prizes_for_set(latest["id"])
-                for idx, p in enumerate(source_items, start=1):
-                    await self.prize_repo.insert_prize_item(
-                        set_id=new_set_id,
-                        name=p["name"],
-                        description=p.get("description"),
-                        quantity=p.get("quantity", 1),
-                        enabled=p.get("enabled", True),
-                        prize_rank=p.get("prize_rank", idx),
-                    )
+                new_set_id = await self._clone_prize_set_for_period(chat_id, latest["id"], week_start, week_end)
                 prize_set = {"id": new_set_id}
             else:
                 raise ValueError("No current weekly prize set")
-        prize_items = await self.prize_repo.list_prizes_for_set(prize_set["id"])
+            prize_items = await self.prize_service.list_prizes_for_set(prize_set["id"])
 
-        round_id = existing["id"] if existing else await self.lottery_repo.create_round(chat_id, "weekly", week_start, week_end, None, prize_set["id"])
+        round_id = existing["id"] if existing else await self.lottery_repo.claim_round(chat_id, "weekly", week_start, week_end, None, prize_set["id"])
+        if round_id is None:
+            raise RoundClaimedError(f"weekly round {chat_id} {week_start} already exists")
 
         winners = self._draw_winners(entries, prize_items)
 
@@ -90,7 +118,7 @@ class LotteryService:
         # Prepare下一周奖池：若未配置则自动沿用本周奖池
         next_week_start = week_end + timedelta(days=1)
         next_week_end = next_week_start + timedelta(days=6)
-        has_next = await self.prize_repo.get_prize_set_for_period(chat_id, "weekly", next_week_start, next_week_end)
+        has_next = await self.prize_service.get_prize_set_for_week(chat_id, next_week_start, next_week_end)
         if not has_next and prize_set.get("id"):
             await self._clone_prize_set_for_period(chat_id, prize_set.get("id"), next_week_start, next_week_end)
 
@@ -105,18 +133,7 @@ class LotteryService:
         )
 
     async def _clone_prize_set_for_period(self, chat_id: int, source_set_id: int, period_start: date, period_end: date) -> Optional[int]:
-        source_items = await self.prize_repo.list_prizes_for_set(source_set_id)
-        new_set_id = await self.prize_repo.create_prize_set(chat_id, "weekly", period_start, period_end)
-        for idx, p in enumerate(source_items, start=1):
-            await self.prize_repo.insert_prize_item(
-                set_id=new_set_id,
-                name=p["name"],
-                description=p.get("description"),
-                quantity=p.get("quantity", 1),
-                enabled=p.get("enabled", True),
-                prize_rank=p.get("prize_rank", idx),
-            )
-        return new_set_id
+        return await self.prize_service.clone_prize_set_for_period(chat_id, source_set_id, period_start, period_end)
 
     async def get_last_weekly_result(self, chat_id: int, now: datetime) -> LotteryResultDTO | None:
         today = time_utils.get_today_beijing(now)
@@ -126,8 +143,10 @@ class LotteryService:
         existing = await self.lottery_repo.get_round_by_period(chat_id, "weekly", week_start, week_end)
         if not existing or existing.get("status") != "done":
             return None
+        return await self._result_from_round(existing, week_start, week_end)
 
-        winners_rows = await self.lottery_repo.get_winners(existing["id"])
+    async def _result_from_round(self, round_row: Dict, week_start: date, week_end: date) -> LotteryResultDTO:
+        winners_rows = await self.lottery_repo.get_winners(round_row["id"])
         winners = [
             LotteryWinnerDTO(
                 user_id=w["user_id"],
@@ -137,45 +156,31 @@ class LotteryService:
             )
             for w in winners_rows
         ]
-
         return LotteryResultDTO(
-            round_id=existing["id"],
+            round_id=round_row["id"],
             round_type="weekly",
             period_start_date=week_start,
             period_end_date=week_end,
-            total_participants=existing.get("total_participants", 0),
-            total_tickets=existing.get("total_tickets", 0),
+            total_participants=round_row.get("total_participants", 0),
+            total_tickets=round_row.get("total_tickets", 0),
             winners=winners,
         )
 
     async def run_custom_lottery(self, chat_id: int, start_date: date, end_date: date, round_type: str, note: str) -> LotteryResultDTO:
         raise NotImplementedError("Custom lottery not implemented yet")
 
-    def _draw_winners(self, entries: List[Dict], prize_items: List[Dict]) -> List[Dict]:
+    def _draw_winners(self, entries: List[Dict], prize_items: List[Dict], rng: random.Random | None = None) -> List[Dict]:
         winners = []
-        # Copy entries to mutable list
-        mutable_entries = [{**e} for e in entries]
-        no_participants_left = False
+        if not entries:
+            return winners
+        # prize_items 已按 prize_rank 排序；每个奖品按 quantity 展开，依次抽取，同一用户不重复中奖
+        draws = iter_weighted_draws([e["weight"] for e in entries], rng=rng, groups=[e["user_id"] for e in entries])
         for prize in prize_items:
             for _ in range(prize.get("quantity", 1)):
-                # filter only positive weight users not already winners
-                available = [e for e in mutable_entries if e["weight"] > 0 and e.get("user_id") not in [w["user_id"] for w in winners]]
-                if not available:
-                    no_participants_left = True
-                    break
-                total_weight = sum(e["weight"] for e in available)
-                if total_weight <= 0:
-                    break
-                pick = random.randint(1, total_weight)
-                cumulative = 0
-                chosen = None
-                for e in available:
-                    cumulative += e["weight"]
-                    if pick <= cumulative:
-                        chosen = e
-                        break
-                if not chosen:
-                    continue
+                idx = next(draws, None)
+                if idx is None:
+                    return winners
+                chosen = entries[idx]
                 winners.append(
                     {
                         "chat_id": prize.get("chat_id") or entries[0]["chat_id"],
@@ -186,6 +191,4 @@ class LotteryService:
                         "prize_rank": prize.get("prize_rank", 1),
                     }
                 )
-            if no_participants_left:
-                break
         return winners
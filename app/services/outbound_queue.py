@@ -0,0 +1,229 @@
+"""
+Central outbound message queue.
+
+Each chat gets its own worker with a token bucket (Telegram allows roughly
+20 messages per minute in a group) and a priority queue, so a draw result
+is never stuck behind stats. A global bucket keeps the bot under the
+overall ~30 messages/second limit. TelegramRetryAfter pauses the chat for
+the requested time and the message is retried; texts over 4096 characters
+are split on line boundaries and sent as consecutive parts.
+"""
+
+import asyncio
+import itertools
+import logging
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramNetworkError, TelegramRetryAfter
+
+logger = logging.getLogger(__name__)
+
+TELEGRAM_MAX_TEXT = 4096
+
+# lower value = sent first
+PRIORITY_RESULT = 0
+PRIORITY_NOTICE = 1
+PRIORITY_STATS = 2
+
+LATENCY_SAMPLES = 500
+
+
+def split_text(text: str, limit: int = TELEGRAM_MAX_TEXT) -> List[str]:
+    """Split on newlines where possible; single lines longer than the limit are hard-cut."""
+    if len(text) <= limit:
+        return [text]
+    parts: List[str] = []
+    current = ""
+    for line in text.split("\n"):
+        while len(line) > limit:
+            if current:
+                parts.append(current)
+                current = ""
+            parts.append(line[:limit])
+            line = line[limit:]
+        candidate = f"{current}\n{line}" if current else line
+        if len(candidate) > limit:
+            parts.append(current)
+            current = line
+        else:
+            current = candidate
+    if current:
+        parts.append(current)
+    return parts
+
+
+class TokenBucket:
+    def __init__(self, rate_per_second: float, capacity: float):
+        self.rate = max(rate_per_second, 1e-6)
+        self.capacity = max(capacity, 1.0)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    async def take(self) -> None:
+        while True:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return
+            await asyncio.sleep((1 - self.tokens) / self.rate)
+
+    def empty(self) -> None:
+        self.tokens = 0
+        self.updated = time.monotonic()
+
+
+@dataclass(order=True)
+class _OutboundItem:
+    priority: int
+    seq: int
+    chat_id: int = field(compare=False)
+    parts: List[str] = field(compare=False)
+    kwargs: dict = field(compare=False)
+    enqueued_at: float = field(compare=False)
+    future: asyncio.Future = field(compare=False)
+    attempts: int = field(default=0, compare=False)
+
+
+class OutboundQueue:
+    def __init__(
+        self,
+        bot: Bot,
+        chat_rate_per_minute: float = 20,
+        chat_burst: int = 3,
+        global_rate_per_second: float = 30,
+        max_attempts: int = 5,
+    ):
+        self.bot = bot
+        self.chat_rate_per_minute = chat_rate_per_minute
+        self.chat_burst = chat_burst
+        self.max_attempts = max(1, max_attempts)
+        self._global_bucket = TokenBucket(global_rate_per_second, global_rate_per_second)
+        self._queues: Dict[int, asyncio.PriorityQueue] = {}
+        self._buckets: Dict[int, TokenBucket] = {}
+        self._workers: Dict[int, asyncio.Task] = {}
+        self._seq = itertools.count()
+        self._latencies: deque = deque(maxlen=LATENCY_SAMPLES)
+        self.sent = 0
+        self.failed = 0
+        self.retry_after_hits = 0
+
+    async def send(self, chat_id: int, text: str, priority: int = PRIORITY_NOTICE, wait: bool = True, **kwargs) -> Optional[asyncio.Future]:
+        """
+        Queue a text message (split if needed). With wait=True returns once every part was delivered
+        and re-raises the final error; with wait=False returns the future right away.
+        """
+        future = asyncio.get_running_loop().create_future()
+        item = _OutboundItem(
+            priority=priority,
+            seq=next(self._seq),
+            chat_id=chat_id,
+            parts=split_text(text),
+            kwargs=kwargs,
+            enqueued_at=time.monotonic(),
+            future=future,
+        )
+        self._queue_for(chat_id).put_nowait(item)
+        if not wait:
+            future.add_done_callback(_consume_exception)
+            return future
+        await future
+        return None
+
+    async def stop(self, timeout: float = 10.0) -> None:
+        """Give queued messages a chance to go out, then cancel the workers."""
+        try:
+            await asyncio.wait_for(asyncio.gather(*(q.join() for q in self._queues.values())), timeout)
+        except asyncio.TimeoutError:
+            logger.warning("Outbound queue not drained within %ss, %s messages dropped", timeout, self._depth())
+        for task in self._workers.values():
+            task.cancel()
+        await asyncio.gather(*self._workers.values(), return_exceptions=True)
+        self._workers.clear()
+
+    def stats(self) -> dict:
+        latencies = sorted(self._latencies)
+        return {
+            "sent": self.sent,
+            "failed": self.failed,
+            "retry_after": self.retry_after_hits,
+            "queue_depth": self._depth(),
+            "chat_queues": len(self._queues),
+            "queue_depth_max": max((q.qsize() for q in self._queues.values()), default=0),
+            "latency_p50_ms": _percentile(latencies, 0.5) * 1000,
+            "latency_p95_ms": _percentile(latencies, 0.95) * 1000,
+            "latency_max_ms": (latencies[-1] if latencies else 0.0) * 1000,
+        }
+
+    def _depth(self) -> int:
+        return sum(q.qsize() for q in self._queues.values())
+
+    def _queue_for(self, chat_id: int) -> asyncio.PriorityQueue:
+        queue = self._queues.get(chat_id)
+        if queue is None:
+            queue = self._queues[chat_id] = asyncio.PriorityQueue()
+            self._buckets[chat_id] = TokenBucket(self.chat_rate_per_minute / 60, self.chat_burst)
+        worker = self._workers.get(chat_id)
+        if worker is None or worker.done():
+            self._workers[chat_id] = asyncio.create_task(self._worker(chat_id))
+        return queue
+
+    async def _worker(self, chat_id: int) -> None:
+        queue = self._queues[chat_id]
+        bucket = self._buckets[chat_id]
+        while True:
+            item: _OutboundItem = await queue.get()
+            try:
+                await self._deliver(item, bucket)
+            finally:
+                queue.task_done()
+
+    async def _deliver(self, item: _OutboundItem, bucket: TokenBucket) -> None:
+        while item.parts:
+            await bucket.take()
+            await self._global_bucket.take()
+            try:
+                await self.bot.send_message(chat_id=item.chat_id, text=item.parts[0], **item.kwargs)
+            except TelegramRetryAfter as e:
+                self.retry_after_hits += 1
+                logger.warning("Telegram flood control for chat_id=%s, retrying in %ss", item.chat_id, e.retry_after)
+                await asyncio.sleep(e.retry_after)
+                bucket.empty()
+                continue
+            except TelegramNetworkError as e:
+                item.attempts += 1
+                if item.attempts >= self.max_attempts:
+                    self._fail(item, e)
+                    return
+                await asyncio.sleep(min(2 ** item.attempts, 30))
+                continue
+            except Exception as e:
+                self._fail(item, e)
+                return
+            item.parts.pop(0)
+        self.sent += 1
+        self._latencies.append(time.monotonic() - item.enqueued_at)
+        if not item.future.done():
+            item.future.set_result(None)
+
+    def _fail(self, item: _OutboundItem, error: Exception) -> None:
+        self.failed += 1
+        logger.error("Failed to deliver message to chat_id=%s after %s attempts: %s", item.chat_id, item.attempts + 1, error)
+        if not item.future.done():
+            item.future.set_exception(error)
+
+
+def _percentile(sorted_values: List[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+def _consume_exception(future: asyncio.Future) -> None:
+    if not future.cancelled():
+        future.exception()
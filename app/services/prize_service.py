@@ -1,46 +1,109 @@
-from typing import List, Dict, Optional
-from datetime import date
+from typing import List, Dict, Optional, Tuple
+from datetime import date, timedelta
 
 from app.db.repositories import PrizeRepository
 from app.utils import time_utils
 
+WeekPrizes = Tuple[Dict, List[Dict]]
+
 
 class PrizeService:
     def __init__(self, repo: PrizeRepository):
         self.repo = repo
+        # (chat_id, set_type, week_start) -> (prize_set, enabled items)；只缓存已存在的奖池
+        self._cache: Dict[Tuple[int, str, date], WeekPrizes] = {}
 
     async def get_current_prizes(self, chat_id: int, set_type: str) -> List[Dict]:
         today = time_utils.get_today_beijing()
         start, end = time_utils.get_week_start_end(today)
-        cur = await self.repo.get_prize_set_for_period(chat_id, set_type, start, end)
+        cur = await self.get_week_prizes(chat_id, start, end, set_type=set_type)
         if not cur:
             return []
-        items = await self.repo.list_prizes_for_set(cur["id"])
-        return items
+        return list(cur[1])
 
     async def get_prize_set_for_week(self, chat_id: int, week_start: date, week_end: date) -> Optional[Dict]:
-        return await self.repo.get_prize_set_for_period(chat_id, "weekly", week_start, week_end)
+        cur = await self.get_week_prizes(chat_id, week_start, week_end)
+        return cur[0] if cur else None
 
-    async def ensure_prize_set_for_week(self, chat_id: int, week_start: date, week_end: date, *, fallback_source_set_id: Optional[int] = None) -> Optional[int]:
-        existing = await self.repo.get_prize_set_for_period(chat_id, "weekly", week_start, week_end)
-        if existing:
-            return existing["id"]
-        source = None
-        if fallback_source_set_id:
-            source = {"id": fallback_source_set_id}
-        else:
-            source = await self.repo.get_latest_prize_set_before(chat_id, "weekly", week_start)
-        if not source:
+    async def get_week_prizes(self, chat_id: int, week_start: date, week_end: date, set_type: str = "weekly") -> Optional[WeekPrizes]:
+        """Prize set valid for the week plus its enabled items, cached per (chat, set_type, week_start)."""
+        key = (chat_id, set_type, week_start)
+        cached = self._cache.get(key)
+        if cached:
+            return cached
+        self._expire_old_weeks()
+        prize_set = await self.repo.get_prize_set_for_period(chat_id, set_type, week_start, week_end)
+        if not prize_set:
             return None
-        source_items = await self.repo.list_prizes_for_set(source["id"])
-        new_set_id = await self.repo.create_prize_set(chat_id, "weekly", week_start, week_end)
-        for idx, p in enumerate(source_items, start=1):
-            await self.repo.insert_prize_item(
-                set_id=new_set_id,
-                name=p["name"],
-                description=p.get("description"),
-                quantity=p.get("quantity", 1),
-                enabled=p.get("enabled", True),
-                prize_rank=p.get("prize_rank", idx),
-            )
+        items = await self.repo.list_prizes_for_set(prize_set["id"])
+        # 事务内读到的数据可能被回滚，不进缓存
+        if not self.repo.in_transaction():
+            self._cache[key] = (prize_set, items)
+        return prize_set, items
+
+    async def get_latest_prize_set_before(self, chat_id: int, ref_date: date, set_type: str = "weekly") -> Optional[Dict]:
+        return await self.repo.get_latest_prize_set_before(chat_id, set_type, ref_date)
+
+    async def list_prizes_for_set(self, set_id: int) -> List[Dict]:
+        return await self.repo.list_prizes_for_set(set_id)
+
+    async def create_prize_set(self, chat_id: int, set_type: str, valid_from: date | None, valid_to: date | None) -> int:
+        try:
+            return await self.repo.create_prize_set(chat_id, set_type, valid_from, valid_to)
+        finally:
+            self.invalidate(chat_id)
+
+    async def add_prize_item(self, set_id: int, name: str, description: str | None, quantity: int, enabled: bool, prize_rank: int) -> None:
+        try:
+            await self.repo.insert_prize_item(set_id, name, description, quantity, enabled, prize_rank)
+        finally:
+            self.invalidate()
+
+    async def set_prize_item_enabled(self, item_id: int, enabled: bool) -> None:
+        try:
+            await self.repo.update_prize_item_enabled(item_id, enabled)
+        finally:
+            self.invalidate()
+
+    def invalidate(self, chat_id: Optional[int] = None) -> None:
+        if chat_id is None:
+            self._cache.clear()
+            return
+        for key in [k for k in self._cache if k[0] == chat_id]:
+            del self._cache[key]
+
+    async def clone_prize_set_for_period(self, chat_id: int, source_set_id: int, period_start: date, period_end: date) -> int:
+        async with self.repo.session(transaction=True):
+            source_items = await self.repo.list_prizes_for_set(source_set_id)
+            new_set_id = await self.create_prize_set(chat_id, "weekly", period_start, period_end)
+            for idx, p in enumerate(source_items, start=1):
+                await self.add_prize_item(
+                    set_id=new_set_id,
+                    name=p["name"],
+                    description=p.get("description"),
+                    quantity=p.get("quantity", 1),
+                    enabled=p.get("enabled", True),
+                    prize_rank=p.get("prize_rank", idx),
+                )
         return new_set_id
+
+    async def ensure_prize_set_for_week(self, chat_id: int, week_start: date, week_end: date, *, fallback_source_set_id: Optional[int] = None) -> Optional[int]:
+        async with self.repo.session(transaction=True):
+            existing = await self.repo.get_prize_set_for_period(chat_id, "weekly", week_start, week_end)
+            if existing:
+                return existing["id"]
+            source = None
+            if fallback_source_set_id:
+                source = {"id": fallback_source_set_id}
+            else:
+                source = await self.repo.get_latest_prize_set_before(chat_id, "weekly", week_start)
+            if not source:
+                return None
+            return await self.clone_prize_set_for_period(chat_id, source["id"], week_start, week_end)
+
+    def _expire_old_weeks(self) -> None:
+        # 上一周的奖池开奖时还要用，更早的自然过期
+        current_week_start, _ = time_utils.get_week_start_end(time_utils.get_today_beijing())
+        oldest = current_week_start - timedelta(days=7)
+        for key in [k for k in self._cache if k[2] < oldest]:
+            del self._cache[key]
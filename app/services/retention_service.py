@@ -0,0 +1,109 @@
+import asyncio
+import logging
+import re
+from datetime import date
+from typing import Awaitable, Callable, List, Optional, Set
+
+from app.db.repositories import CheckinRepository
+from app.services.checkin_service import CheckinService
+
+logger = logging.getLogger(__name__)
+
+# daily_checkins 的月分区命名：p202501 存放 2025-01 的数据，pmax 兜底
+_MONTH_PARTITION_RE = re.compile(r"^p(\d{4})(\d{2})$")
+MAX_PARTITION = "pmax"
+
+ProgressCallback = Callable[[int], Awaitable[None]]
+
+
+def _month_start(d: date) -> date:
+    return d.replace(day=1)
+
+
+def _next_month(d: date) -> date:
+    return date(d.year + d.month // 12, d.month % 12 + 1, 1)
+
+
+class RetentionService:
+    """
+    Check-in retention without long locks.
+
+    Rows are deleted in chunks of chunk_size with a pause in between, so the
+    check-in upserts keep running. On MySQL, whole months older than the cutoff
+    are removed by dropping their daily_checkins partitions instead.
+    """
+
+    def __init__(
+        self,
+        checkin_repo: CheckinRepository,
+        checkin_service: Optional[CheckinService] = None,
+        chunk_size: int = 5000,
+        pause_seconds: float = 0.2,
+    ):
+        self.repo = checkin_repo
+        # optional: flush write-behind check-ins before deleting
+        self.checkin_service = checkin_service
+        self.chunk_size = max(1, chunk_size)
+        self.pause_seconds = max(0.0, pause_seconds)
+        self._running: Set[int] = set()
+
+    def is_running(self, chat_id: int) -> bool:
+        return chat_id in self._running
+
+    async def purge_before(self, chat_id: int, cutoff: date, on_progress: Optional[ProgressCallback] = None) -> int:
+        """Delete the chat's check-ins before cutoff chunk by chunk; on_progress gets the running total."""
+        if chat_id in self._running:
+            raise RuntimeError(f"Retention already running for chat_id={chat_id}")
+        self._running.add(chat_id)
+        deleted = 0
+        try:
+            if self.checkin_service:
+                await self.checkin_service.flush_pending()
+            while True:
+                n = await self.repo.delete_before_chunk(chat_id, cutoff, self.chunk_size)
+                deleted += n
+                if on_progress and n:
+                    await on_progress(deleted)
+                if n < self.chunk_size:
+                    break
+                await asyncio.sleep(self.pause_seconds)
+        finally:
+            self._running.discard(chat_id)
+        logger.info("Retention chat_id=%s deleted %s check-ins before %s", chat_id, deleted, cutoff)
+        return deleted
+
+    async def drop_expired_partitions(self, cutoff: date) -> List[str]:
+        """Drop monthly partitions whose every row is older than cutoff (applies to all chats)."""
+        expired = []
+        for part in await self.repo.list_partitions():
+            match = _MONTH_PARTITION_RE.match(part["name"] or "")
+            if not match:
+                continue
+            upper = _next_month(date(int(match.group(1)), int(match.group(2)), 1))
+            if upper <= cutoff:
+                expired.append(part["name"])
+        if expired:
+            await self.repo.drop_partitions(expired)
+            logger.info("Dropped expired check-in partitions: %s", ", ".join(expired))
+        return expired
+
+    async def ensure_future_partitions(self, today: date, months_ahead: int = 2) -> List[str]:
+        """Split the MAXVALUE partition so the current month and the next months_ahead have their own partitions."""
+        parts = await self.repo.list_partitions()
+        names = {p["name"] for p in parts}
+        if MAX_PARTITION not in names:
+            return []
+        months = [m for m in (_MONTH_PARTITION_RE.match(n or "") for n in names) if m]
+        newest = max((date(int(m.group(1)), int(m.group(2)), 1) for m in months), default=None)
+        month = _next_month(newest) if newest else _month_start(today)
+        target = _month_start(today)
+        for _ in range(months_ahead):
+            target = _next_month(target)
+        created = []
+        while month <= target:
+            created.append((f"p{month:%Y%m}", _next_month(month)))
+            month = _next_month(month)
+        if created:
+            await self.repo.add_partitions(MAX_PARTITION, created)
+            logger.info("Created check-in partitions: %s", ", ".join(name for name, _ in created))
+        return [name for name, _ in created]
@@ -1,3 +1,5 @@
+from typing import Dict, List
+
 from app.db.repositories import SettingsRepository
 
 
@@ -5,12 +7,52 @@ class SettingsService:
     def __init__(self, repo: SettingsRepository, timezone: str = "Asia/Shanghai"):
         self.repo = repo
         self.timezone = timezone
+        # per-chat settings cache; every write invalidates the entry and bumps the version
+        self._cache: Dict[int, Dict] = {}
+        self._versions: Dict[int, int] = {}
 
     async def get_settings(self, chat_id: int):
-        return await self.repo.get_or_create_settings(chat_id, self.timezone)
+        cached = self._cache.get(chat_id)
+        if cached is None:
+            version = self.get_settings_version(chat_id)
+            cached = await self.repo.get_or_create_settings(chat_id, self.timezone)
+            # 读取期间若有写入（版本变化），不缓存可能过期的结果
+            if self.get_settings_version(chat_id) == version:
+                self._cache[chat_id] = cached
+        return dict(cached)
+
+    async def load_all(self) -> List[int]:
+        """Prime the cache with every chat's settings in one query; returns the chat ids found."""
+        rows = await self.repo.list_settings()
+        for row in rows:
+            self._cache.setdefault(int(row["chat_id"]), row)
+        return [int(row["chat_id"]) for row in rows]
+
+    def get_settings_version(self, chat_id: int) -> int:
+        """Monotonic per-chat version; downstream caches can key on it to follow settings changes."""
+        return self._versions.get(chat_id, 0)
+
+    def invalidate(self, chat_id: int) -> None:
+        self._cache.pop(chat_id, None)
+        self._versions[chat_id] = self.get_settings_version(chat_id) + 1
 
     async def set_weekly_enabled(self, chat_id: int, enabled: bool) -> None:
-        await self.repo.set_weekly_enabled(chat_id, enabled)
+        try:
+            await self.repo.set_weekly_enabled(chat_id, enabled)
+        finally:
+            self.invalidate(chat_id)
+
+    async def set_draw_times(self, chat_id: int, weekly_time: str) -> None:
+        try:
+            await self.repo.set_draw_times(chat_id, weekly_time)
+        finally:
+            self.invalidate(chat_id)
+
+    async def set_full_attendance_factor(self, chat_id: int, factor: int) -> None:
+        try:
+            await self.repo.set_full_attendance_factor(chat_id, factor)
+        finally:
+            self.invalidate(chat_id)
 
     async def is_weekly_enabled(self, chat_id: int) -> bool:
         settings = await self.get_settings(chat_id)
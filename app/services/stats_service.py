@@ -1,21 +1,102 @@
+import calendar
+import logging
 from datetime import date, timedelta
+from typing import Optional
 
 from app.db.repositories import CheckinRepository
+from app.models.dto import DailyCheckinStatsDTO, RangeStatsDTO
+from app.services.checkin_service import CheckinService
+from app.utils import time_utils
+
+logger = logging.getLogger(__name__)
+
+# user_week_attendance 按整周重建，每条语句覆盖的周数
+ATTENDANCE_REBUILD_WEEKS = 4
 
 
 class StatsService:
-    def __init__(self, repo: CheckinRepository):
+    def __init__(self, repo: CheckinRepository, checkin_service: Optional[CheckinService] = None):
         self.repo = repo
+        # optional: flush write-behind check-ins before reading rollups
+        self.checkin_service = checkin_service
 
     async def get_daily_stats(self, chat_id: int, target_date: date) -> dict:
+        await self._flush()
         count = await self.repo.count_yesterday_checkins(chat_id, target_date)
         return {"date": target_date, "user_count": count}
 
-    async def get_week_stats(self, chat_id: int, week_start: date, week_end: date) -> dict:
+    async def get_range_stats(self, chat_id: int, start_date: date, end_date: date) -> RangeStatsDTO:
+        """Per-day numbers come from daily_checkin_rollups; only the range-wide distinct user count touches raw rows."""
+        await self._flush()
+        rows = await self.repo.get_rollups(chat_id, start_date, end_date)
+        by_date = {r["checkin_date"]: r for r in rows}
+
         days = []
-        current = week_start
-        while current <= week_end:
-            cnt = await self.repo.count_yesterday_checkins(chat_id, current)
-            days.append({"date": current, "user_count": cnt})
+        current = start_date
+        while current <= end_date:
+            r = by_date.get(current)
+            days.append(
+                DailyCheckinStatsDTO(
+                    date=current,
+                    user_count=int(r["user_count"]) if r else 0,
+                    new_users=int(r["new_user_count"]) if r else 0,
+                    checkins=int(r["user_count"]) if r else 0,
+                    messages=int(r["message_count"]) if r else 0,
+                )
+            )
             current += timedelta(days=1)
-        return {"week_start": week_start, "week_end": week_end, "days": days}
+
+        return RangeStatsDTO(
+            start_date=start_date,
+            end_date=end_date,
+            days=days,
+            unique_users=await self.repo.count_distinct_users_between(chat_id, start_date, end_date),
+            new_users=sum(d.new_users for d in days),
+            total_checkins=sum(d.checkins for d in days),
+            total_messages=sum(d.messages for d in days),
+        )
+
+    async def get_week_stats(self, chat_id: int, week_start: date, week_end: date) -> RangeStatsDTO:
+        return await self.get_range_stats(chat_id, week_start, week_end)
+
+    async def get_month_stats(self, chat_id: int, year: int, month: int) -> RangeStatsDTO:
+        last_day = calendar.monthrange(year, month)[1]
+        return await self.get_range_stats(chat_id, date(year, month, 1), date(year, month, last_day))
+
+    async def rebuild_rollups(self, chat_id: int, start_date: Optional[date] = None, end_date: Optional[date] = None) -> int:
+        """
+        Recompute daily_checkin_rollups (one month per statement) and user_week_attendance
+        (whole weeks, a few per statement) from daily_checkins, so a full-history backfill never
+        holds locks for long. Returns the number of days rebuilt.
+        """
+        await self._flush()
+        # 导入/回填的原始记录可能早于已知的首次打卡日，先同步 user_first_checkins
+        await self.repo.sync_first_checkin_dates(chat_id)
+        if start_date is None or end_date is None:
+            bounds = await self.repo.get_date_bounds(chat_id)
+            if not bounds:
+                return 0
+            start_date = start_date or bounds["first_date"]
+            end_date = end_date or bounds["last_date"]
+        days = 0
+        chunk_start = start_date
+        while chunk_start <= end_date:
+            month_end = chunk_start.replace(day=calendar.monthrange(chunk_start.year, chunk_start.month)[1])
+            chunk_end = min(month_end, end_date)
+            await self.repo.rebuild_rollups(chat_id, chunk_start, chunk_end)
+            days += (chunk_end - chunk_start).days + 1
+            logger.info("Rebuilt check-in rollups chat_id=%s %s ~ %s", chat_id, chunk_start, chunk_end)
+            chunk_start = chunk_end + timedelta(days=1)
+
+        week_start = time_utils.get_week_start_end(start_date)[0]
+        last_week_end = time_utils.get_week_start_end(end_date)[1]
+        while week_start <= last_week_end:
+            chunk_end = min(week_start + timedelta(weeks=ATTENDANCE_REBUILD_WEEKS) - timedelta(days=1), last_week_end)
+            await self.repo.rebuild_week_attendance(chat_id, week_start, chunk_end)
+            logger.info("Rebuilt weekly attendance chat_id=%s %s ~ %s", chat_id, week_start, chunk_end)
+            week_start = chunk_end + timedelta(days=1)
+        return days
+
+    async def _flush(self) -> None:
+        if self.checkin_service:
+            await self.checkin_service.flush_pending()
@@ -0,0 +1,88 @@
+import asyncio
+import logging
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional, Tuple
+
+from aiogram import Bot
+from aiogram.types import User
+
+from app.db.repositories import TelegramUserRepository
+
+logger = logging.getLogger(__name__)
+
+ProfileSnapshot = Tuple[Optional[str], Optional[str], Optional[str], bool, Optional[str]]
+
+
+def format_display_name(user_id: int, username: str | None, first_name: str | None, last_name: str | None) -> str:
+    if username:
+        return f"@{username}"
+    name = " ".join(part for part in (first_name or "", last_name or "") if part).strip()
+    if name:
+        return name
+    return f"用户 {user_id}"
+
+
+class UserProfileService:
+    """
+    Local store of Telegram user profiles (telegram_user table).
+
+    Profiles are captured passively from incoming messages; an in-memory snapshot
+    per (chat_id, user_id) makes sure the DB is only written when something changed.
+    """
+
+    def __init__(self, repo: TelegramUserRepository, bot: Bot, lookup_concurrency: int = 5, cache_max_entries: int = 50000):
+        self.repo = repo
+        self.bot = bot
+        self.lookup_concurrency = max(1, lookup_concurrency)
+        self.cache_max_entries = max(1, cache_max_entries)
+        self._snapshots: "OrderedDict[Tuple[int, int], ProfileSnapshot]" = OrderedDict()
+
+    async def observe_user(self, chat_id: int, user: User) -> None:
+        key = (chat_id, user.id)
+        snapshot = (user.username, user.first_name, user.last_name, bool(user.is_bot), user.language_code)
+        if self._snapshots.get(key) == snapshot:
+            self._snapshots.move_to_end(key)
+            return
+        await self.repo.upsert_user(chat_id, user.id, user.username, user.first_name, user.last_name, bool(user.is_bot), user.language_code)
+        self._remember(key, snapshot)
+
+    async def resolve_display_names(self, chat_id: int, user_ids: Iterable[int]) -> Dict[int, str]:
+        """One bulk DB lookup; only users missing from telegram_user hit the Bot API (bounded concurrency)."""
+        wanted = list(dict.fromkeys(user_ids))
+        if not wanted:
+            return {}
+        rows = await self.repo.get_users(chat_id, wanted)
+        names = {
+            uid: format_display_name(uid, row.get("username"), row.get("first_name"), row.get("last_name"))
+            for uid, row in rows.items()
+        }
+
+        unknown = [uid for uid in wanted if uid not in rows]
+        if unknown:
+            semaphore = asyncio.Semaphore(self.lookup_concurrency)
+
+            async def lookup(uid: int) -> None:
+                async with semaphore:
+                    try:
+                        member = await self.bot.get_chat_member(chat_id, uid)
+                    except Exception as e:
+                        logger.warning("Failed to resolve username for user_id=%s: %s", uid, e)
+                        return
+                user = getattr(member, "user", None)
+                if not user:
+                    return
+                names[uid] = format_display_name(uid, user.username, user.first_name, user.last_name)
+                try:
+                    await self.observe_user(chat_id, user)
+                except Exception as e:
+                    logger.warning("Failed to store profile for user_id=%s: %s", uid, e)
+
+            await asyncio.gather(*(lookup(uid) for uid in unknown))
+
+        return {uid: names.get(uid, format_display_name(uid, None, None, None)) for uid in wanted}
+
+    def _remember(self, key: Tuple[int, int], snapshot: ProfileSnapshot) -> None:
+        self._snapshots[key] = snapshot
+        self._snapshots.move_to_end(key)
+        while len(self._snapshots) > self.cache_max_entries:
+            self._snapshots.popitem(last=False)
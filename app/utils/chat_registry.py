@@ -0,0 +1,82 @@
+"""
+Set of chats this process serves.
+
+Single-chat deployments keep using TARGET_CHAT_ID. With MULTI_CHAT=true every
+chat that has a lottery_settings row is served as well, so one process can
+host many groups; handlers route through `registered_chat` instead of
+comparing against one chat id.
+"""
+
+import asyncio
+import logging
+from typing import Awaitable, Callable, Dict, Iterable, Iterator, List, Set, TypeVar
+
+from aiogram.filters import Filter
+from aiogram.types import TelegramObject
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class ChatRegistry:
+    def __init__(self):
+        self._chat_ids: Set[int] = set()
+
+    def __contains__(self, chat_id: object) -> bool:
+        return chat_id in self._chat_ids
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(sorted(self._chat_ids))
+
+    def __len__(self) -> int:
+        return len(self._chat_ids)
+
+    def add(self, chat_id: int) -> None:
+        self._chat_ids.add(chat_id)
+
+    def discard(self, chat_id: int) -> None:
+        self._chat_ids.discard(chat_id)
+
+    def replace(self, chat_ids: Iterable[int]) -> None:
+        self._chat_ids = {int(c) for c in chat_ids if c}
+
+    @property
+    def chat_ids(self) -> List[int]:
+        return list(self)
+
+
+class RegisteredChatFilter(Filter):
+    """Passes events whose chat is in the registry (evaluated per update, so registry changes apply live)."""
+
+    def __init__(self, registry: ChatRegistry):
+        self.registry = registry
+
+    async def __call__(self, event: TelegramObject) -> bool:
+        chat = getattr(event, "chat", None)
+        return chat is not None and chat.id in self.registry
+
+
+async def run_for_chats(
+    chat_ids: Iterable[int],
+    func: Callable[[int], Awaitable[T]],
+    concurrency: int = 10,
+) -> Dict[int, T | BaseException]:
+    """Run func(chat_id) for every chat with bounded concurrency; one chat failing does not stop the others."""
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    results: Dict[int, T | BaseException] = {}
+
+    async def run(chat_id: int) -> None:
+        async with semaphore:
+            try:
+                results[chat_id] = await func(chat_id)
+            except Exception as e:
+                logger.exception("Per-chat task failed chat_id=%s: %s", chat_id, e)
+                results[chat_id] = e
+
+    await asyncio.gather(*(run(chat_id) for chat_id in chat_ids))
+    return results
+
+
+chat_registry = ChatRegistry()
+registered_chat = RegisteredChatFilter(chat_registry)
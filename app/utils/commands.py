@@ -11,6 +11,11 @@ def _build_admin_commands(weekly_enabled: bool):
         BotCommand(command="cleanup_checkins", description="【管理员】清理打卡"),
         BotCommand(command="stats_today", description="【管理员】今日统计"),
         BotCommand(command="stats_week", description="【管理员】本周统计"),
+        BotCommand(command="stats_range", description="【管理员】区间统计"),
+        BotCommand(command="stats_month", description="【管理员】月度统计"),
+        BotCommand(command="rebuild_stats", description="【管理员】重建统计汇总"),
+        BotCommand(command="admin_db_stats", description="【管理员】数据库连接池状态"),
+        BotCommand(command="admin_slow_queries", description="【管理员】查看慢查询"),
         BotCommand(command="help", description="查看指令与抽奖规则"),
     ]
     if weekly_enabled:
@@ -27,7 +32,7 @@ async def update_admin_bot_commands(bot: Bot, target_chat_id: int, *, weekly_ena
         logging.warning("Failed to update admin commands for chat_id=%s: %s", target_chat_id, e.message)
 
 
-async def set_bot_commands(bot: Bot, target_chat_id: int, *, weekly_enabled: bool = True) -> None:
+async def set_default_bot_commands(bot: Bot) -> None:
     await bot.set_my_commands(
         commands=[
             BotCommand(command="checkin_status", description="查询今日/本周打卡"),
@@ -38,6 +43,9 @@ async def set_bot_commands(bot: Bot, target_chat_id: int, *, weekly_enabled: boo
         scope=BotCommandScopeDefault(),
     )
 
+
+async def set_bot_commands(bot: Bot, target_chat_id: int, *, weekly_enabled: bool = True) -> None:
+    await set_default_bot_commands(bot)
     await update_admin_bot_commands(
         bot,
         target_chat_id,
@@ -1,12 +1,134 @@
+import asyncio
+import logging
+import time
+from typing import Dict, Iterable, Optional, Set
+
 from aiogram import Bot
+from aiogram.types import Message
+
+from app.texts import zh_cn
+
+logger = logging.getLogger(__name__)
+
+ADMIN_STATUSES = {"creator", "administrator"}
+
+
+class AdminCache:
+    """
+    Per-chat set of administrator user ids.
+
+    Membership is answered from memory; entries are refreshed in the background
+    once they are older than ttl_seconds and patched by chat_member updates.
+    """
+
+    def __init__(self, ttl_seconds: float = 300):
+        self.ttl_seconds = ttl_seconds
+        self._admins: Dict[int, Set[int]] = {}
+        self._fetched_at: Dict[int, float] = {}
+        self._refresh_ms: Dict[int, float] = {}
+        self._refreshing: Dict[int, asyncio.Task] = {}
+        self._loop_task: Optional[asyncio.Task] = None
+
+    async def is_admin(self, bot: Bot, chat_id: int, user_id: int) -> bool:
+        admins = self._admins.get(chat_id)
+        if admins is None:
+            await self.refresh(bot, chat_id)
+            admins = self._admins.get(chat_id, set())
+        elif self._age(chat_id) > self.ttl_seconds:
+            self._schedule_refresh(bot, chat_id)
+        return user_id in admins
+
+    async def refresh(self, bot: Bot, chat_id: int) -> None:
+        started = time.monotonic()
+        try:
+            members = await bot.get_chat_administrators(chat_id)
+        except Exception as e:
+            # 保留旧数据，下次再试
+            logger.warning("Failed to refresh admin list for chat_id=%s: %s", chat_id, e)
+            return
+        self._admins[chat_id] = {m.user.id for m in members}
+        self._fetched_at[chat_id] = time.monotonic()
+        self._refresh_ms[chat_id] = (self._fetched_at[chat_id] - started) * 1000
+
+    def apply_member_status(self, chat_id: int, user_id: int, status: str) -> None:
+        admins = self._admins.get(chat_id)
+        if admins is None:
+            return
+        if status in ADMIN_STATUSES:
+            admins.add(user_id)
+        else:
+            admins.discard(user_id)
+
+    def invalidate(self, chat_id: int) -> None:
+        self._admins.pop(chat_id, None)
+        self._fetched_at.pop(chat_id, None)
+
+    def start(self, bot: Bot, chat_ids: Iterable[int]) -> None:
+        if self._loop_task is None:
+            self._loop_task = asyncio.create_task(self._refresh_loop(bot, chat_ids))
+
+    async def stop(self) -> None:
+        if self._loop_task:
+            self._loop_task.cancel()
+            try:
+                await self._loop_task
+            except asyncio.CancelledError:
+                pass
+            self._loop_task = None
+
+    def stats(self) -> Dict[int, dict]:
+        return {
+            chat_id: {
+                "admins": len(admins),
+                "age_seconds": self._age(chat_id),
+                "refresh_ms": self._refresh_ms.get(chat_id),
+            }
+            for chat_id, admins in self._admins.items()
+        }
+
+    def summary(self) -> dict:
+        """Aggregates across chats for metrics; per-chat details stay in stats()."""
+        ages = [age for age in (self._age(chat_id) for chat_id in self._admins) if age != float("inf")]
+        refresh = [ms for ms in self._refresh_ms.values() if ms is not None]
+        return {
+            "chats": len(self._admins),
+            "admins": sum(len(admins) for admins in self._admins.values()),
+            "age_min_seconds": min(ages, default=0.0),
+            "age_max_seconds": max(ages, default=0.0),
+            "refresh_ms_max": max(refresh, default=0.0),
+        }
+
+    def _age(self, chat_id: int) -> float:
+        fetched_at = self._fetched_at.get(chat_id)
+        return time.monotonic() - fetched_at if fetched_at is not None else float("inf")
+
+    def _schedule_refresh(self, bot: Bot, chat_id: int) -> None:
+        task = self._refreshing.get(chat_id)
+        if task and not task.done():
+            return
+        self._refreshing[chat_id] = asyncio.create_task(self.refresh(bot, chat_id))
+
+    async def _refresh_loop(self, bot: Bot, chat_ids: Iterable[int]) -> None:
+        while True:
+            for chat_id in set(chat_ids) | set(self._admins):
+                await self.refresh(bot, chat_id)
+            await asyncio.sleep(max(self.ttl_seconds / 2, 1))
+
+
+admin_cache = AdminCache()
 
 
 async def is_chat_admin(bot: Bot, chat_id: int, user_id: int) -> bool:
-    try:
-        admins = await bot.get_chat_administrators(chat_id)
-    except Exception:
+    return await admin_cache.is_admin(bot, chat_id, user_id)
+
+
+async def ensure_admin(message: Message) -> bool:
+    # Allow anonymous admin mode (sender_chat == current chat) to pass
+    if getattr(message, "sender_chat", None) and message.sender_chat.id == message.chat.id:
+        return True
+    is_admin = await is_chat_admin(message.bot, message.chat.id, message.from_user.id)
+    logger.info("Admin check chat_id=%s user_id=%s is_admin=%s", message.chat.id, message.from_user.id, is_admin)
+    if not is_admin:
+        await message.answer(zh_cn.TEXT_NOT_ADMIN)
         return False
-    for member in admins:
-        if member.user.id == user_id:
-            return True
-    return False
+    return True
@@ -0,0 +1,162 @@
+"""
+Stream messages out of a Telegram Desktop chat export (result.json, "Export chat history" → JSON).
+
+The file holds one chat: {"name": ..., "type": ..., "id": ..., "messages": [...]}. Only the
+top-level keys are walked. Each message is decoded on its own with json.JSONDecoder.raw_decode
+over a sliding buffer, so memory stays bounded by the largest single message whatever the file size.
+"""
+
+import json
+from datetime import date, datetime
+from typing import Any, Dict, Iterator, Optional, TextIO
+
+import pytz
+
+from app.utils import time_utils
+
+READ_SIZE = 1 << 20
+_WHITESPACE = " \t\r\n"
+
+
+class _JsonStream:
+    def __init__(self, f: TextIO, read_size: int = READ_SIZE):
+        self.f = f
+        self.read_size = read_size
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+        self.decoder = json.JSONDecoder()
+
+    def _fill(self) -> bool:
+        if self.eof:
+            return False
+        chunk = self.f.read(self.read_size)
+        if not chunk:
+            self.eof = True
+            return False
+        # 丢弃已消费的前缀，缓冲区只保留未解析部分
+        self.buf = self.buf[self.pos :] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self) -> str:
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._fill():
+                raise ValueError("Unexpected end of export file")
+
+    def expect(self, char: str) -> None:
+        found = self.peek()
+        if found != char:
+            raise ValueError(f"Malformed export: expected {char!r}, found {found!r}")
+        self.pos += 1
+
+    def value(self) -> Any:
+        self.peek()
+        while True:
+            try:
+                obj, end = self.decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                if not self._fill():
+                    raise
+                continue
+            # 数字等标量可能被截断在缓冲区末尾，确认后面还有字符再接受
+            if end == len(self.buf) and not self.eof and self._fill():
+                continue
+            self.pos = end
+            return obj
+
+
+def _top_level_keys(stream: _JsonStream) -> Iterator[str]:
+    """Yield each top-level key with the stream left at its value, which the caller must consume."""
+    stream.expect("{")
+    if stream.peek() == "}":
+        return
+    while True:
+        key = stream.value()
+        stream.expect(":")
+        yield key
+        if stream.peek() == ",":
+            stream.pos += 1
+            continue
+        stream.expect("}")
+        return
+
+
+def iter_export_messages(f: TextIO, read_size: int = READ_SIZE) -> Iterator[Dict[str, Any]]:
+    """Yield every entry of the top-level "messages" array; other top-level values are skipped."""
+    stream = _JsonStream(f, read_size)
+    for key in _top_level_keys(stream):
+        if key != "messages":
+            stream.value()
+            continue
+        stream.expect("[")
+        if stream.peek() == "]":
+            stream.pos += 1
+            continue
+        while True:
+            yield stream.value()
+            if stream.peek() == ",":
+                stream.pos += 1
+                continue
+            stream.expect("]")
+            break
+
+
+def read_export_header(f: TextIO, read_size: int = READ_SIZE) -> Dict[str, Any]:
+    """Top-level values written before "messages" (name, type, id); stops there without reading the history."""
+    stream = _JsonStream(f, read_size)
+    header: Dict[str, Any] = {}
+    for key in _top_level_keys(stream):
+        if key == "messages":
+            break
+        header[key] = stream.value()
+    return header
+
+
+def bot_chat_id(header: Dict[str, Any]) -> Optional[int]:
+    """Chat id as the Bot API reports it: -100<id> for supergroups and channels, -<id> for basic groups."""
+    export_id = header.get("id")
+    if not isinstance(export_id, int):
+        return None
+    chat_type = header.get("type") or ""
+    if chat_type.endswith("_supergroup") or chat_type.endswith("_channel"):
+        return int(f"-100{export_id}")
+    if chat_type == "private_group":
+        return -export_id
+    return export_id
+
+
+def sender_user_id(message: Dict[str, Any]) -> Optional[int]:
+    """Numeric user id for "user123" senders; channels and anonymous admins return None."""
+    from_id = message.get("from_id") or ""
+    if not from_id.startswith("user"):
+        return None
+    try:
+        return int(from_id[4:])
+    except ValueError:
+        return None
+
+
+def is_command(message: Dict[str, Any]) -> bool:
+    text = message.get("text")
+    if isinstance(text, list):
+        text = text[0] if text else ""
+        if isinstance(text, dict):
+            return text.get("type") == "bot_command"
+    return isinstance(text, str) and text.startswith("/")
+
+
+def message_time_utc(message: Dict[str, Any], export_tz: pytz.BaseTzInfo) -> datetime:
+    """Naive UTC send time. Newer exports carry date_unixtime; older ones only the exporting PC's local time."""
+    if message.get("date_unixtime"):
+        return datetime.utcfromtimestamp(int(message["date_unixtime"]))
+    local = export_tz.localize(datetime.fromisoformat(message["date"]))
+    return local.astimezone(pytz.utc).replace(tzinfo=None)
+
+
+def checkin_date_for(message_time: datetime) -> date:
+    return time_utils.get_today_beijing(message_time)
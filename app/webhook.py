@@ -0,0 +1,103 @@
+"""
+Webhook delivery mode: an embedded aiohttp server fed by aiogram's SimpleRequestHandler.
+
+Updates are acknowledged immediately and processed in background tasks
+(handle_in_background), so Telegram never waits on DB work and several
+updates are handled concurrently.
+"""
+
+import asyncio
+import logging
+import signal
+
+from aiogram import Bot, Dispatcher
+from aiogram.webhook.aiohttp_server import SimpleRequestHandler, setup_application
+from aiohttp import web
+
+from app.config import WebhookConfig
+
+logger = logging.getLogger(__name__)
+
+# 停机时等待进行中的 update 处理完成的最长时间（秒）
+SHUTDOWN_GRACE_SECONDS = 10.0
+
+
+async def _healthz(request: web.Request) -> web.Response:
+    return web.Response(text="ok")
+
+
+def build_webhook_app(bot: Bot, dp: Dispatcher, config: WebhookConfig) -> tuple[web.Application, SimpleRequestHandler]:
+    app = web.Application()
+    handler = SimpleRequestHandler(
+        dispatcher=dp,
+        bot=bot,
+        handle_in_background=True,
+        secret_token=config.secret_token or None,
+    )
+    handler.register(app, path=config.path)
+    app.router.add_get("/healthz", _healthz)
+    setup_application(app, dp, bot=bot)
+    return app, handler
+
+
+async def run_webhook(bot: Bot, dp: Dispatcher, config: WebhookConfig) -> None:
+    """
+    Serve updates until SIGTERM/SIGINT (or cancellation). setWebhook is only called when a
+    public base URL is configured. On stop, new requests are refused and in-flight updates
+    get SHUTDOWN_GRACE_SECONDS to finish, then the caller's shutdown (buffer flush etc.) runs.
+    """
+    if not config.secret_token:
+        logger.warning("WEBHOOK_SECRET is empty; webhook requests are not authenticated")
+
+    app, handler = build_webhook_app(bot, dp, config)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, host=config.host, port=config.port)
+    await site.start()
+    logger.info("Webhook server listening on %s:%s%s", config.host, config.port, config.path)
+
+    # start_polling 自带信号处理，webhook 模式需要自己接管，否则 docker stop 会跳过 run_bot 的收尾逻辑
+    loop = asyncio.get_running_loop()
+    stop_event = asyncio.Event()
+    signals = []
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        try:
+            loop.add_signal_handler(sig, stop_event.set)
+            signals.append(sig)
+        except (NotImplementedError, RuntimeError):
+            pass
+
+    try:
+        if config.base_url:
+            allowed_updates = dp.resolve_used_update_types()
+            await bot.set_webhook(
+                url=config.url,
+                secret_token=config.secret_token or None,
+                allowed_updates=allowed_updates,
+                drop_pending_updates=config.drop_pending_updates,
+            )
+            logger.info("Webhook registered at %s (allowed_updates=%s)", config.url, allowed_updates)
+        else:
+            logger.info("WEBHOOK_BASE_URL not set, skipping setWebhook (local testing)")
+        await stop_event.wait()
+        logger.info("Stop signal received, shutting down webhook server")
+    finally:
+        for sig in signals:
+            loop.remove_signal_handler(sig)
+        await site.stop()
+        await _drain_updates(handler)
+        await runner.cleanup()
+
+
+async def _drain_updates(handler: SimpleRequestHandler) -> None:
+    # aiogram 只在私有集合中跟踪后台处理的 update 任务
+    tasks = set(getattr(handler, "_background_feed_update_tasks", ()))
+    if not tasks:
+        return
+    logger.info("Waiting for %s in-flight updates", len(tasks))
+    done, pending = await asyncio.wait(tasks, timeout=SHUTDOWN_GRACE_SECONDS)
+    if pending:
+        logger.warning("%s updates still running after %.0fs, cancelling", len(pending), SHUTDOWN_GRACE_SECONDS)
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
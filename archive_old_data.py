@@ -0,0 +1,73 @@
+"""
+Move old daily_checkins / lottery_round_entries / lottery_winners rows into gzip'd CSV files
+(one per table and month) and purge them from the database once the counts are verified.
+Usage:
+    python archive_old_data.py --before 2025-01-01
+    python archive_old_data.py --older-than-days 365 --tables daily_checkins --no-purge
+Uses the DB settings from .env (DB_BACKEND=mysql or sqlite). A manifest with row counts and
+sha256 per file is written next to the archives.
+"""
+
+import argparse
+import asyncio
+import logging
+from datetime import datetime, timedelta
+
+from dotenv import load_dotenv
+
+from app.config import load_config
+from app.db.backend import close_db, init_db
+from app.db.repositories import ArchiveRepository
+from app.logging_config import setup_logging
+from app.services.archive_service import ArchiveService
+from app.utils import time_utils
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    cutoff = parser.add_mutually_exclusive_group(required=True)
+    cutoff.add_argument("--before", help="archive rows dated before YYYY-MM-DD (Beijing date)")
+    cutoff.add_argument("--older-than-days", type=int, help="archive rows older than N days")
+    parser.add_argument("--tables", nargs="+", choices=ArchiveRepository.TABLES, help="default: all three tables")
+    parser.add_argument("--output-dir", default="data/archive")
+    parser.add_argument("--no-purge", action="store_true", help="only export and verify, keep the rows")
+    parser.add_argument("--batch-size", type=int, default=1000, help="rows fetched per round trip")
+    parser.add_argument("--chunk-size", type=int, help="rows per DELETE (default: CHECKIN_RETENTION_CHUNK_SIZE)")
+    parser.add_argument("--pause", type=float, help="seconds between DELETE chunks (default: CHECKIN_RETENTION_PAUSE_SECONDS)")
+    return parser.parse_args()
+
+
+async def main() -> None:
+    load_dotenv()
+    setup_logging()
+    args = parse_args()
+    config = load_config()
+    if args.before:
+        cutoff = datetime.strptime(args.before, "%Y-%m-%d").date()
+    else:
+        cutoff = time_utils.get_today_beijing() - timedelta(days=args.older_than_days)
+
+    await init_db(config.db)
+    try:
+        service = ArchiveService(
+            ArchiveRepository(),
+            args.output_dir,
+            chunk_size=args.chunk_size or config.checkin.retention_chunk_size,
+            pause_seconds=config.checkin.retention_pause_seconds if args.pause is None else args.pause,
+            batch_size=args.batch_size,
+        )
+        manifest = await service.archive(cutoff, tables=args.tables, purge=not args.no_purge)
+    finally:
+        await close_db()
+
+    for result in manifest["tables"]:
+        logging.info(
+            "%s: exported=%s files=%s verified=%s purged=%s",
+            result["table"], result["exported"], len(result["files"]), result["verified"], result["purged"],
+        )
+    if not all(result["verified"] for result in manifest["tables"]):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,131 @@
+"""
+Benchmark and distribution check for the weekly draw engine.
+
+Usage:
+    python -m benchmarks.draw_engine                 # timing, legacy vs Fenwick engine
+    python -m benchmarks.draw_engine --check         # chi-square check that wins follow the weights
+    python -m benchmarks.draw_engine --sizes 1000 10000 100000 --prize-units 1000
+"""
+
+import argparse
+import random
+import time
+from typing import Dict, List
+
+from app.services.draw_engine import iter_weighted_draws
+from app.services.lottery_service import LotteryService
+
+
+def legacy_draw_winners(entries: List[Dict], prize_items: List[Dict]) -> List[Dict]:
+    """Pre-engine LotteryService._draw_winners, kept verbatim as the comparison baseline."""
+    winners = []
+    mutable_entries = [{**e} for e in entries]
+    no_participants_left = False
+    for prize in prize_items:
+        for _ in range(prize.get("quantity", 1)):
+            available = [e for e in mutable_entries if e["weight"] > 0 and e.get("user_id") not in [w["user_id"] for w in winners]]
+            if not available:
+                no_participants_left = True
+                break
+            total_weight = sum(e["weight"] for e in available)
+            if total_weight <= 0:
+                break
+            pick = random.randint(1, total_weight)
+            cumulative = 0
+            chosen = None
+            for e in available:
+                cumulative += e["weight"]
+                if pick <= cumulative:
+                    chosen = e
+                    break
+            if not chosen:
+                continue
+            winners.append(
+                {
+                    "chat_id": prize.get("chat_id") or entries[0]["chat_id"],
+                    "user_id": chosen["user_id"],
+                    "prize_set_id": prize.get("set_id") or prize.get("id") or None,
+                    "prize_name": prize.get("name"),
+                    "prize_description": prize.get("description"),
+                    "prize_rank": prize.get("prize_rank", 1),
+                }
+            )
+        if no_participants_left:
+            break
+    return winners
+
+
+def make_entries(n: int, seed: int = 42) -> List[Dict]:
+    rng = random.Random(seed)
+    entries = []
+    for user_id in range(1, n + 1):
+        days = rng.randint(1, 7)
+        entries.append({"chat_id": -100, "user_id": user_id, "checkin_days": days, "weight": days * (2 if days == 7 else 1), "is_full_attendance": days == 7})
+    return entries
+
+
+def make_prizes(units: int, ranks: int = 5) -> List[Dict]:
+    per_rank, extra = divmod(units, ranks)
+    return [
+        {"id": 1, "name": f"Prize {rank}", "quantity": per_rank + (1 if rank <= extra else 0), "prize_rank": rank}
+        for rank in range(1, ranks + 1)
+    ]
+
+
+def _time(fn, *args) -> float:
+    start = time.perf_counter()
+    fn(*args)
+    return time.perf_counter() - start
+
+
+def run_benchmark(sizes: List[int], prize_units: int, legacy_limit: int) -> None:
+    service = LotteryService(None, None, None, None)
+    prizes = make_prizes(prize_units)
+    print(f"{'participants':>12} {'prize units':>12} {'engine (s)':>12} {'legacy (s)':>12} {'speedup':>9}")
+    for n in sizes:
+        entries = make_entries(n)
+        engine_s = _time(service._draw_winners, entries, prizes)
+        # the legacy draw is O(prizes x participants x winners); skip sizes that would take minutes
+        if n * prize_units <= legacy_limit:
+            legacy_s = _time(legacy_draw_winners, entries, prizes)
+            print(f"{n:>12} {prize_units:>12} {engine_s:>12.4f} {legacy_s:>12.4f} {legacy_s / engine_s:>8.1f}x")
+        else:
+            print(f"{n:>12} {prize_units:>12} {engine_s:>12.4f} {'skipped':>12} {'-':>9}")
+
+
+def check_distribution(trials: int = 200_000, seed: int = 7) -> bool:
+    """Chi-square goodness of fit of the first pick against the weights (alpha = 0.001)."""
+    weights = [1, 2, 3, 4, 5, 6, 14]
+    rng = random.Random(seed)
+    counts = [0] * len(weights)
+    for _ in range(trials):
+        counts[next(iter_weighted_draws(weights, rng=rng))] += 1
+    total = sum(weights)
+    chi2 = sum((c - trials * w / total) ** 2 / (trials * w / total) for c, w in zip(counts, weights))
+    critical = 22.458  # chi-square, 6 degrees of freedom, p = 0.001
+    for w, c in zip(weights, counts):
+        print(f"weight={w:>3} expected={w / total:.4f} observed={c / trials:.4f}")
+    print(f"chi2={chi2:.3f} critical={critical} -> {'OK' if chi2 < critical else 'FAIL'}")
+
+    # without replacement: every participant must win exactly once when prizes exceed participants
+    order = list(iter_weighted_draws(weights, rng=rng))
+    distinct = sorted(order) == list(range(len(weights)))
+    print(f"no repeat winners -> {'OK' if distinct else 'FAIL'}")
+    return chi2 < critical and distinct
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--prize-units", type=int, default=100)
+    parser.add_argument("--legacy-limit", type=int, default=2_000_000, help="skip the legacy draw when participants x prize units exceeds this")
+    parser.add_argument("--check", action="store_true", help="run the distribution check instead of the timing benchmark")
+    args = parser.parse_args()
+
+    if args.check:
+        raise SystemExit(0 if check_distribution() else 1)
+    run_benchmark(args.sizes, args.prize_units, args.legacy_limit)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,209 @@
+"""
+In-memory stand-ins for the repositories, so benchmarks drive the real services without MySQL.
+
+They subclass the real repositories and keep the same return shapes as the
+queries behind them. latency_ms adds an asyncio.sleep per call to approximate
+a database round trip.
+"""
+
+import asyncio
+from contextlib import asynccontextmanager
+from datetime import date
+from itertools import count
+from typing import Dict, List, Optional
+
+from app.db.repositories import CheckinRepository, LotteryRepository, PrizeRepository, SettingsRepository
+from app.utils import time_utils
+
+
+class InMemoryRepository:
+    def __init__(self, latency_ms: float = 0.0):
+        self.latency = latency_ms / 1000
+        self.calls = 0
+        self._transactions = 0
+
+    @asynccontextmanager
+    async def session(self, transaction: bool = False):
+        self._transactions += int(transaction)
+        try:
+            yield self
+        finally:
+            self._transactions -= int(transaction)
+
+    def in_transaction(self) -> bool:
+        return self._transactions > 0
+
+    async def _round_trip(self) -> None:
+        self.calls += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+
+class InMemoryCheckinRepository(InMemoryRepository, CheckinRepository):
+    def __init__(self, latency_ms: float = 0.0):
+        super().__init__(latency_ms)
+        # (chat_id, user_id, checkin_date) -> (message_id, message_time)
+        self.checkins: Dict[tuple, tuple] = {}
+        # (chat_id, user_id, week_start) -> days
+        self.attendance: Dict[tuple, int] = {}
+        self.message_counts: Dict[tuple, int] = {}
+
+    def seed_week(self, chat_id: int, week_start: date, days_by_user: Dict[int, int]) -> None:
+        for user_id, days in days_by_user.items():
+            self.attendance[(chat_id, user_id, week_start)] = days
+
+    async def record_checkins(self, rows: List[tuple]) -> List[tuple]:
+        await self._round_trip()
+        new_keys = []
+        for chat_id, user_id, checkin_date, message_id, message_time in rows:
+            key = (chat_id, user_id, checkin_date)
+            if key not in self.checkins:
+                new_keys.append(key)
+                week_key = (chat_id, user_id, time_utils.get_week_start_end(checkin_date)[0])
+                self.attendance[week_key] = self.attendance.get(week_key, 0) + 1
+            self.checkins[key] = (message_id, message_time)
+        return new_keys
+
+    async def add_message_counts(self, counts: Dict[tuple, int]) -> None:
+        await self._round_trip()
+        for key, n in counts.items():
+            self.message_counts[key] = self.message_counts.get(key, 0) + n
+
+    async def get_user_ids_for_date(self, chat_id: int, checkin_date: date) -> List[int]:
+        await self._round_trip()
+        return [uid for (cid, uid, d) in self.checkins if cid == chat_id and d == checkin_date]
+
+    async def get_week_attendance_counts(self, chat_id: int, week_start: date) -> Dict[int, int]:
+        await self._round_trip()
+        return {uid: days for (cid, uid, ws), days in self.attendance.items() if cid == chat_id and ws == week_start}
+
+    async def count_week_participants(self, chat_id: int, week_start: date) -> int:
+        return len(await self.get_week_attendance_counts(chat_id, week_start))
+
+
+class InMemorySettingsRepository(InMemoryRepository, SettingsRepository):
+    def __init__(self, latency_ms: float = 0.0):
+        super().__init__(latency_ms)
+        self.settings: Dict[int, Dict] = {}
+
+    async def get_or_create_settings(self, chat_id: int, timezone: str) -> Dict:
+        await self._round_trip()
+        return self.settings.setdefault(
+            chat_id,
+            {"chat_id": chat_id, "weekly_enabled": 1, "weekly_draw_at": "00:00:00", "full_attendance_factor": 2, "timezone": timezone},
+        )
+
+    async def get_settings(self, chat_id: int) -> Optional[Dict]:
+        await self._round_trip()
+        return self.settings.get(chat_id)
+
+    async def list_settings(self) -> List[Dict]:
+        await self._round_trip()
+        return [self.settings[k] for k in sorted(self.settings)]
+
+
+class InMemoryPrizeRepository(InMemoryRepository, PrizeRepository):
+    def __init__(self, latency_ms: float = 0.0):
+        super().__init__(latency_ms)
+        self.sets: List[Dict] = []
+        self.items: List[Dict] = []
+        self._set_ids = count(1)
+        self._item_ids = count(1)
+
+    async def get_prize_set_for_period(self, chat_id: int, set_type: str, period_start: date, period_end: date) -> Optional[Dict]:
+        await self._round_trip()
+        matches = [
+            s for s in self.sets
+            if s["chat_id"] == chat_id and s["set_type"] == set_type and s["valid_from"] <= period_start
+            and (s["valid_to"] is None or s["valid_to"] >= period_end)
+        ]
+        return max(matches, key=lambda s: (s["valid_from"], s["id"]), default=None)
+
+    async def get_latest_prize_set_before(self, chat_id: int, set_type: str, ref_date: date) -> Optional[Dict]:
+        await self._round_trip()
+        matches = [s for s in self.sets if s["chat_id"] == chat_id and s["set_type"] == set_type and s["valid_from"] <= ref_date]
+        return max(matches, key=lambda s: (s["valid_from"], s["id"]), default=None)
+
+    async def list_prizes_for_set(self, set_id: int) -> List[Dict]:
+        await self._round_trip()
+        items = [i for i in self.items if i["set_id"] == set_id and i["enabled"]]
+        return sorted(items, key=lambda i: (i["prize_rank"], i["id"]))
+
+    async def create_prize_set(self, chat_id: int, set_type: str, valid_from: date | None, valid_to: date | None) -> int:
+        await self._round_trip()
+        set_id = next(self._set_ids)
+        self.sets.append({"id": set_id, "chat_id": chat_id, "set_type": set_type, "valid_from": valid_from, "valid_to": valid_to})
+        return set_id
+
+    async def insert_prize_item(self, set_id: int, name: str, description: str | None, quantity: int, enabled: bool, prize_rank: int) -> None:
+        await self._round_trip()
+        self.items.append(
+            {
+                "id": next(self._item_ids),
+                "set_id": set_id,
+                "name": name,
+                "description": description,
+                "quantity": quantity,
+                "enabled": int(enabled),
+                "prize_rank": prize_rank,
+            }
+        )
+
+    async def update_prize_item_enabled(self, item_id: int, enabled: bool) -> None:
+        await self._round_trip()
+        for item in self.items:
+            if item["id"] == item_id:
+                item["enabled"] = int(enabled)
+
+
+class InMemoryLotteryRepository(InMemoryRepository, LotteryRepository):
+    def __init__(self, latency_ms: float = 0.0, bulk_chunk_size: int = 500):
+        InMemoryRepository.__init__(self, latency_ms)
+        LotteryRepository.__init__(self, bulk_chunk_size=bulk_chunk_size)
+        self.rounds: Dict[int, Dict] = {}
+        self.entries: Dict[int, List[Dict]] = {}
+        self.winners: Dict[int, List[Dict]] = {}
+        self._round_ids = count(1)
+
+    async def get_round_by_period(self, chat_id: int, round_type: str, period_start: date, period_end: date) -> Optional[Dict]:
+        await self._round_trip()
+        for r in self.rounds.values():
+            if (r["chat_id"], r["round_type"], r["period_start_date"], r["period_end_date"]) == (chat_id, round_type, period_start, period_end):
+                return r
+        return None
+
+    async def claim_round(self, chat_id: int, round_type: str, period_start_date: date, period_end_date: date, note: str | None, prize_set_id: int | None) -> Optional[int]:
+        if await self.get_round_by_period(chat_id, round_type, period_start_date, period_end_date):
+            return None
+        round_id = next(self._round_ids)
+        self.rounds[round_id] = {
+            "id": round_id,
+            "chat_id": chat_id,
+            "round_type": round_type,
+            "period_start_date": period_start_date,
+            "period_end_date": period_end_date,
+            "prize_set_id": prize_set_id,
+            "status": "pending",
+            "total_participants": 0,
+            "total_tickets": 0,
+        }
+        return round_id
+
+    async def complete_round(self, round_id: int, total_participants: int, total_tickets: int) -> None:
+        await self._round_trip()
+        self.rounds[round_id].update(status="done", total_participants=total_participants, total_tickets=total_tickets)
+
+    async def add_entries(self, round_id: int, entries: List[Dict]) -> None:
+        # 与真实仓库一样按 bulk_chunk_size 分批，每批算一次往返
+        for i in range(0, len(entries), self.bulk_chunk_size):
+            await self._round_trip()
+        self.entries[round_id] = list(entries)
+
+    async def add_winners(self, round_id: int, winners: List[Dict]) -> None:
+        for i in range(0, len(winners), self.bulk_chunk_size):
+            await self._round_trip()
+        self.winners[round_id] = list(winners)
+
+    async def get_winners(self, round_id: int) -> List[Dict]:
+        await self._round_trip()
+        return list(self.winners.get(round_id, []))
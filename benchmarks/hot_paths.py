@@ -0,0 +1,199 @@
+"""
+Benchmarks for the hot paths: check-in ingestion, the weekly lottery and the draw.
+
+The real services run on the in-memory repositories from benchmarks.fakes, and
+the results are written as JSON so runs can be diffed between releases.
+
+Usage:
+    python -m benchmarks.hot_paths                               # everything, results to benchmark-results.json
+    python -m benchmarks.hot_paths --only checkin --db-latency-ms 1
+    python -m benchmarks.hot_paths --sizes 1000 10000 100000 --output results/v1.4.json
+"""
+
+import argparse
+import asyncio
+import json
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List
+
+from app.services.checkin_buffer import CheckinBuffer
+from app.services.checkin_cache import CheckinDedupeCache
+from app.services.checkin_service import CheckinService
+from app.services.lottery_service import LotteryService
+from app.services.prize_service import PrizeService
+from app.services.settings_service import SettingsService
+from app.utils import time_utils
+from benchmarks.draw_engine import make_entries, make_prizes
+from benchmarks.fakes import (
+    InMemoryCheckinRepository,
+    InMemoryLotteryRepository,
+    InMemoryPrizeRepository,
+    InMemorySettingsRepository,
+)
+
+CHAT_ID = -100
+# 周一 00:00 开奖，抽上一周
+DRAW_AT = time_utils.BEIJING_TZ.localize(datetime(2024, 6, 10, 0, 5))
+
+
+def _summary(name: str, params: Dict, samples: List[float], ops: int) -> Dict:
+    median = statistics.median(samples)
+    return {
+        "name": name,
+        "params": params,
+        "runs": len(samples),
+        "median_s": median,
+        "min_s": min(samples),
+        "max_s": max(samples),
+        "ops": ops,
+        "ops_per_s": ops / median if median else None,
+    }
+
+
+def _print(result: Dict) -> None:
+    params = " ".join(f"{k}={v}" for k, v in result["params"].items())
+    rate = f"{result['ops_per_s']:,.0f} ops/s" if result["ops_per_s"] else "-"
+    print(f"{result['name']:<16} {params:<60} median {result['median_s']:.4f}s  {rate}")
+
+
+async def _checkin_run(messages: List[tuple], mode: str, concurrency: int, latency_ms: float) -> float:
+    repo = InMemoryCheckinRepository(latency_ms)
+    buffer = CheckinBuffer(repo, max_batch=500) if mode == "write_behind" else None
+    cache = CheckinDedupeCache() if mode in ("dedupe", "write_behind") else None
+    service = CheckinService(repo, buffer=buffer, dedupe_cache=cache)
+    queue: asyncio.Queue = asyncio.Queue()
+    for item in messages:
+        queue.put_nowait(item)
+
+    async def worker() -> None:
+        while not queue.empty():
+            user_id, message_id, message_time = queue.get_nowait()
+            await service.process_message_for_checkin(CHAT_ID, user_id, message_id, message_time)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    await service.flush_pending()
+    if buffer:
+        await buffer.wait_idle()
+    return time.perf_counter() - started
+
+
+def bench_checkin(messages: int, users: int, concurrency: int, latency_ms: float, runs: int) -> List[Dict]:
+    rng = random.Random(1)
+    day = DRAW_AT.replace(hour=9)
+    stream = [(rng.randint(1, users), i, day + timedelta(seconds=i % 36000)) for i in range(messages)]
+    results = []
+    for mode in ("direct", "dedupe", "write_behind"):
+        samples = [asyncio.run(_checkin_run(stream, mode, concurrency, latency_ms)) for _ in range(runs)]
+        results.append(
+            _summary(
+                "checkin",
+                {"mode": mode, "messages": messages, "users": users, "concurrency": concurrency, "db_latency_ms": latency_ms},
+                samples,
+                messages,
+            )
+        )
+    return results
+
+
+async def _lottery_run(participants: int, prize_units: int, latency_ms: float) -> float:
+    week_start, week_end = time_utils.get_week_start_end(DRAW_AT.date() - timedelta(days=7))
+    rng = random.Random(participants)
+    checkin_repo = InMemoryCheckinRepository(latency_ms)
+    checkin_repo.seed_week(CHAT_ID, week_start, {uid: rng.randint(1, 7) for uid in range(1, participants + 1)})
+    prize_repo = InMemoryPrizeRepository(latency_ms)
+    set_id = await prize_repo.create_prize_set(CHAT_ID, "weekly", week_start, week_end)
+    for prize in make_prizes(prize_units):
+        await prize_repo.insert_prize_item(set_id, prize["name"], None, prize["quantity"], True, prize["prize_rank"])
+    settings_repo = InMemorySettingsRepository(latency_ms)
+    service = LotteryService(
+        InMemoryLotteryRepository(latency_ms),
+        prize_repo,
+        checkin_repo,
+        settings_repo,
+        settings_service=SettingsService(settings_repo),
+        prize_service=PrizeService(prize_repo),
+    )
+    started = time.perf_counter()
+    result = await service.run_weekly_lottery(CHAT_ID, DRAW_AT)
+    elapsed = time.perf_counter() - started
+    assert result.total_participants == participants
+    return elapsed
+
+
+def bench_weekly_lottery(sizes: List[int], prize_units: int, latency_ms: float, runs: int) -> List[Dict]:
+    results = []
+    for n in sizes:
+        samples = [asyncio.run(_lottery_run(n, prize_units, latency_ms)) for _ in range(runs)]
+        results.append(_summary("weekly_lottery", {"participants": n, "prize_units": prize_units, "db_latency_ms": latency_ms}, samples, 1))
+    return results
+
+
+def _time(fn: Callable, *args) -> float:
+    started = time.perf_counter()
+    fn(*args)
+    return time.perf_counter() - started
+
+
+def bench_draw(sizes: List[int], prize_units: int, runs: int) -> List[Dict]:
+    service = LotteryService(None, None, None, None)
+    prizes = make_prizes(prize_units)
+    results = []
+    for n in sizes:
+        entries = make_entries(n)
+        samples = [_time(service._draw_winners, entries, prizes) for _ in range(runs)]
+        results.append(_summary("draw_winners", {"participants": n, "prize_units": prize_units}, samples, min(n, prize_units)))
+    return results
+
+
+def _git_revision() -> str | None:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=5)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return out.stdout.strip() or None
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--only", choices=["checkin", "lottery", "draw"], nargs="+", default=["checkin", "lottery", "draw"])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000], help="participant counts for the lottery and the draw")
+    parser.add_argument("--prize-units", type=int, default=100)
+    parser.add_argument("--messages", type=int, default=50_000, help="check-in messages per run")
+    parser.add_argument("--users", type=int, default=5_000, help="distinct senders in the check-in stream")
+    parser.add_argument("--concurrency", type=int, default=4, help="concurrent handlers, cf. UPDATE_MAX_IN_FLIGHT")
+    parser.add_argument("--db-latency-ms", type=float, default=0.0, help="simulated round trip per repository call")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--output", default="benchmark-results.json")
+    args = parser.parse_args()
+
+    results: List[Dict] = []
+    if "checkin" in args.only:
+        results += bench_checkin(args.messages, args.users, args.concurrency, args.db_latency_ms, args.runs)
+    if "lottery" in args.only:
+        results += bench_weekly_lottery(args.sizes, args.prize_units, args.db_latency_ms, args.runs)
+    if "draw" in args.only:
+        results += bench_draw(args.sizes, args.prize_units, args.runs)
+    for result in results:
+        _print(result)
+
+    report = {
+        "generated_at": datetime.now().isoformat(timespec="seconds"),
+        "git_revision": _git_revision(),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "results": results,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""
+Backfill daily_checkins from a Telegram Desktop chat export (result.json), without network access.
+Usage:
+    python import_chat_export.py path/to/result.json
+    python import_chat_export.py result.json --chat-id -1001234567890 --from 2025-01-01 --exclude 777 888
+Every user message counts as that user's check-in for its Beijing date, like the live handler:
+service messages, /commands and channel / anonymous-admin senders are skipped. The export does
+not mark bots, so pass their ids with --exclude. The file is streamed, so multi-GB exports are fine.
+The export's own chat id must match the target chat (-100<id> for supergroups); --force overrides.
+Rollups and weekly attendance are rebuilt afterwards (message_count is only raised to user_count).
+"""
+
+import argparse
+import asyncio
+import logging
+from datetime import datetime
+from typing import Dict, Optional
+
+import pytz
+from dotenv import load_dotenv
+
+from app.config import load_config
+from app.db.backend import close_db, init_db
+from app.db.repositories import CheckinRepository
+from app.logging_config import setup_logging
+from app.services.stats_service import StatsService
+from app.utils.telegram_export import (
+    bot_chat_id,
+    checkin_date_for,
+    is_command,
+    iter_export_messages,
+    message_time_utc,
+    read_export_header,
+    sender_user_id,
+)
+
+PROGRESS_EVERY = 100_000
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("path", help="result.json from Telegram Desktop")
+    parser.add_argument("--chat-id", type=int, help="bot chat id, e.g. -100...; default TARGET_CHAT_ID")
+    parser.add_argument("--from", dest="date_from", help="only import Beijing dates >= YYYY-MM-DD")
+    parser.add_argument("--to", dest="date_to", help="only import Beijing dates <= YYYY-MM-DD")
+    parser.add_argument("--exclude", type=int, nargs="*", default=[], help="user ids to skip (bots, admins)")
+    parser.add_argument("--batch-size", type=int, default=1000, help="check-ins per bulk upsert")
+    parser.add_argument("--export-tz", default="Asia/Shanghai", help="timezone of the exporting PC, used when date_unixtime is missing")
+    parser.add_argument("--no-rebuild", action="store_true", help="skip rebuilding rollups and weekly attendance")
+    parser.add_argument("--dry-run", action="store_true", help="parse and count only, do not touch the database")
+    parser.add_argument("--force", action="store_true", help="import even if the export belongs to a different chat")
+    return parser.parse_args()
+
+
+def _parse_date(value: Optional[str]):
+    return datetime.strptime(value, "%Y-%m-%d").date() if value else None
+
+
+async def main() -> None:
+    load_dotenv()
+    setup_logging()
+    args = parse_args()
+    config = load_config()
+    chat_id = args.chat_id or config.bot.target_chat_id
+    if not chat_id:
+        raise SystemExit("--chat-id or TARGET_CHAT_ID is required")
+    date_from, date_to = _parse_date(args.date_from), _parse_date(args.date_to)
+    export_tz = pytz.timezone(args.export_tz)
+    exclude = set(args.exclude)
+
+    with open(args.path, encoding="utf-8") as f:
+        header = read_export_header(f)
+    export_chat_id = bot_chat_id(header)
+    if export_chat_id != chat_id:
+        # 导错文件会把别的群的历史写进本群，默认拒绝
+        problem = f"Export {header.get('name')!r} is chat_id={export_chat_id} ({header.get('type')}), not {chat_id}"
+        if not args.force:
+            raise SystemExit(f"{problem}; pass --force to import anyway")
+        logging.warning("%s; importing anyway (--force)", problem)
+
+    if not args.dry_run:
+        await init_db(config.db)
+    repo = CheckinRepository()
+    try:
+        # 同一批次内每个 (user, date) 只保留最后一条，与线上 upsert 的结果一致
+        batch: Dict[tuple, tuple] = {}
+        seen = imported = 0
+        first_date = last_date = None
+        with open(args.path, encoding="utf-8") as f:
+            for message in iter_export_messages(f):
+                seen += 1
+                if seen % PROGRESS_EVERY == 0:
+                    logging.info("Scanned %s messages, %s check-in rows so far", seen, imported + len(batch))
+                if message.get("type") != "message" or is_command(message):
+                    continue
+                user_id = sender_user_id(message)
+                if user_id is None or user_id in exclude:
+                    continue
+                message_time = message_time_utc(message, export_tz)
+                checkin_date = checkin_date_for(message_time)
+                if (date_from and checkin_date < date_from) or (date_to and checkin_date > date_to):
+                    continue
+                batch[(user_id, checkin_date)] = (chat_id, user_id, checkin_date, int(message["id"]), message_time)
+                first_date = min(first_date or checkin_date, checkin_date)
+                last_date = max(last_date or checkin_date, checkin_date)
+                if len(batch) >= args.batch_size:
+                    if not args.dry_run:
+                        await repo.mark_checkins_bulk(list(batch.values()))
+                    imported += len(batch)
+                    batch.clear()
+        if batch:
+            if not args.dry_run:
+                await repo.mark_checkins_bulk(list(batch.values()))
+            imported += len(batch)
+        logging.info(
+            "Scanned %s messages, upserted %s check-in rows for chat_id=%s (%s ~ %s)%s",
+            seen, imported, chat_id, first_date, last_date, " [dry run]" if args.dry_run else "",
+        )
+
+        if first_date and not args.dry_run and not args.no_rebuild:
+            # 更早的历史会改变之后日期的新用户数，因此重建到最新日期
+            days = await StatsService(repo).rebuild_rollups(chat_id, first_date)
+            logging.info("Rebuilt rollups and weekly attendance for %s days", days)
+    finally:
+        if not args.dry_run:
+            await close_db()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
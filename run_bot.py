@@ -11,69 +11,190 @@ from app.logging_config import setup_logging
 from app.bot_loader import create_bot_and_dp
 from app.handlers import register_handlers
 from app.scheduler.jobs import register_jobs
-from app.db.connection import init_db_pool, close_db_pool
+from app.scheduler.leader import LeaderElector
+from app.db.backend import close_db, current_backend, init_db, pool_stats
+from app.db.slow_queries import slow_query_log
 from app.db.repositories import (
     CheckinRepository,
     SettingsRepository,
     PrizeRepository,
     LotteryRepository,
     AdminActionRepository,
+    TelegramUserRepository,
 )
+from app.services.checkin_buffer import CheckinBuffer
+from app.services.checkin_cache import CheckinDedupeCache
 from app.services.checkin_service import CheckinService
 from app.services.settings_service import SettingsService
 from app.services.prize_service import PrizeService
 from app.services.lottery_service import LotteryService
 from app.services.announce_service import AnnounceService
+from app.services.outbound_queue import OutboundQueue
+from app.services.retention_service import RetentionService
 from app.services.stats_service import StatsService
+from app.services.user_profile_service import UserProfileService
 from app.middlewares.services import ServiceMiddleware
-from app.utils.commands import set_bot_commands
+from app.utils.commands import set_default_bot_commands, update_admin_bot_commands
+from app.utils.chat_registry import chat_registry, run_for_chats
+from app.utils.permissions import admin_cache
 from app.middlewares.log_commands import LogCommandMiddleware
+from app.middlewares.concurrency import ConcurrencyGovernor, ConcurrencyMiddleware
+from app.middlewares.metrics import TelegramMetricsMiddleware, UpdateMetricsMiddleware
+from app.metrics import register_component, register_pool_metrics, start_metrics_server
 from app.utils import time_utils
+from app.webhook import run_webhook
 
 
-async def _startup(config: Config) -> tuple[Bot, Dispatcher, SettingsService, PrizeService]:
+async def _startup(config: Config) -> tuple[Bot, Dispatcher, AnnounceService, SettingsService, PrizeService, CheckinService, OutboundQueue, Optional[LeaderElector]]:
     setup_logging()
     logging.getLogger("aiogram").setLevel(logging.DEBUG)
-    logging.info("Loading bot with TARGET_CHAT_ID=%s", config.target_chat_id)
+    logging.info("Loading bot with TARGET_CHAT_ID=%s multi_chat=%s", config.target_chat_id, config.bot.multi_chat)
 
-    await init_db_pool(config.db)
+    await init_db(config.db)
+    logging.info("Storage backend: %s", current_backend())
+    slow_query_log.configure(
+        # EXPLAIN 走独立的 MySQL 连接，SQLite 后端只记录慢查询
+        config.db if current_backend() == "mysql" else None,
+        threshold_ms=config.db.slow_query_ms,
+        top_n=config.db.slow_query_top_n,
+        explain_interval_seconds=config.db.slow_query_explain_interval_seconds,
+    )
     bot, dp, scheduler = create_bot_and_dp(config)
+    bot.session.middleware(TelegramMetricsMiddleware())
 
     # Instantiate repositories and services (placeholder implementations)
     checkin_repo = CheckinRepository()
     settings_repo = SettingsRepository()
     prize_repo = PrizeRepository()
-    lottery_repo = LotteryRepository()
+    lottery_repo = LotteryRepository(bulk_chunk_size=config.db.bulk_chunk_size)
     admin_repo = AdminActionRepository()
+    telegram_user_repo = TelegramUserRepository()
 
-    checkin_service = CheckinService(checkin_repo)
+    checkin_buffer: Optional[CheckinBuffer] = None
+    if config.checkin.write_behind:
+        checkin_buffer = CheckinBuffer(
+            checkin_repo,
+            max_batch=config.checkin.flush_max_batch,
+        )
+        logging.info(
+            "Check-in write-behind enabled (batch=%s, interval=%ss)",
+            config.checkin.flush_max_batch,
+            config.checkin.flush_interval_seconds,
+        )
+
+    dedupe_cache = CheckinDedupeCache(config.checkin.dedupe_max_entries) if config.checkin.dedupe_enabled else None
+    checkin_service = CheckinService(checkin_repo, buffer=checkin_buffer, dedupe_cache=dedupe_cache)
+    checkin_service.start(config.checkin.flush_interval_seconds)
     settings_service = SettingsService(settings_repo, timezone=config.scheduler.timezone)
+
+    # 服务的群组：环境变量配置的群 + 多群模式下 lottery_settings 中的全部群
+    chat_registry.replace(config.chat_ids)
+    if config.bot.multi_chat:
+        for chat_id in await settings_service.load_all():
+            chat_registry.add(chat_id)
+    logging.info("Serving %s chats", len(chat_registry))
+
+    warmed = await run_for_chats(chat_registry, checkin_service.warm_dedupe_cache, config.bot.chat_job_concurrency)
+    if dedupe_cache:
+        logging.info("Check-in dedupe cache warmed with %s users", sum(v for v in warmed.values() if isinstance(v, int)))
     prize_service = PrizeService(prize_repo)
-    lottery_service = LotteryService(lottery_repo, prize_repo, checkin_repo, settings_repo)
-    announce_service = AnnounceService(bot)
-    stats_service = StatsService(checkin_repo)
+    lottery_service = LotteryService(
+        lottery_repo,
+        prize_repo,
+        checkin_repo,
+        settings_repo,
+        checkin_buffer=checkin_buffer,
+        settings_service=settings_service,
+        prize_service=prize_service,
+    )
+    user_profile_service = UserProfileService(
+        telegram_user_repo,
+        bot,
+        lookup_concurrency=config.bot.profile_lookup_concurrency,
+    )
+    outbound_queue = OutboundQueue(
+        bot,
+        chat_rate_per_minute=config.bot.outbound_chat_rate_per_minute,
+        chat_burst=config.bot.outbound_chat_burst,
+        global_rate_per_second=config.bot.outbound_global_rate_per_second,
+    )
+    announce_service = AnnounceService(bot, profile_service=user_profile_service, outbound=outbound_queue)
+    stats_service = StatsService(checkin_repo, checkin_service=checkin_service)
+    retention_service = RetentionService(
+        checkin_repo,
+        checkin_service=checkin_service,
+        chunk_size=config.checkin.retention_chunk_size,
+        pause_seconds=config.checkin.retention_pause_seconds,
+    )
+
+    # 首次部署汇总表时，从历史打卡记录回填
+    async def backfill_rollups(chat_id: int) -> None:
+        if (
+            not await checkin_repo.has_rollups(chat_id)
+            or not await checkin_repo.has_week_attendance(chat_id)
+            or not await checkin_repo.has_first_checkin_dates(chat_id)
+        ):
+            rebuilt = await stats_service.rebuild_rollups(chat_id)
+            logging.info("Backfilled check-in rollups chat_id=%s for %s days", chat_id, rebuilt)
+
+    await run_for_chats(chat_registry, backfill_rollups, config.bot.chat_job_concurrency)
+
+    # 限制同时处理的 update 数量，命令走优先通道，避免打卡洪峰占满连接池
+    governor = ConcurrencyGovernor(
+        max_in_flight=config.concurrency.max_in_flight,
+        command_reserved=config.concurrency.command_reserved,
+        max_queue=config.concurrency.max_queue,
+    )
+    dp.update.outer_middleware(ConcurrencyMiddleware(governor))
+    dp.update.outer_middleware(UpdateMetricsMiddleware())
 
     # Log incoming commands with chat/user IDs (temporary helper)
     dp.message.middleware(LogCommandMiddleware(enabled=True))
 
-    dp.message.middleware(
-        ServiceMiddleware(
-            {
-                "checkin_service": checkin_service,
-                "settings_service": settings_service,
-                "prize_service": prize_service,
-                "lottery_service": lottery_service,
-                "announce_service": announce_service,
-                "stats_service": stats_service,
-                "admin_repo": admin_repo,
-                "checkin_repo": checkin_repo,
-            }
-        )
+    services = ServiceMiddleware(
+        {
+            "config": config,
+            "checkin_service": checkin_service,
+            "settings_service": settings_service,
+            "prize_service": prize_service,
+            "lottery_service": lottery_service,
+            "announce_service": announce_service,
+            "stats_service": stats_service,
+            "retention_service": retention_service,
+            "user_profile_service": user_profile_service,
+            "admin_repo": admin_repo,
+            "checkin_repo": checkin_repo,
+            "concurrency_governor": governor,
+            "outbound_queue": outbound_queue,
+        }
     )
+    dp.message.middleware(services)
+    # 机器人入群/退群事件也需要 settings_service 来登记新群
+    dp.my_chat_member.middleware(services)
 
     register_handlers(dp, config)
 
+    admin_cache.ttl_seconds = config.bot.admin_cache_ttl_seconds
+    admin_cache.start(bot, chat_registry)
+
+    register_pool_metrics(pool_stats)
+    register_component("db_pool", lambda: (pool_stats() or {}).get("gate"))
+    register_component("concurrency", governor.stats)
+    register_component("outbound", outbound_queue.stats)
+    register_component("dedupe_cache", checkin_service.get_dedupe_stats)
+    register_component("admin_cache", admin_cache.summary)
+
+    leader: Optional[LeaderElector] = None
     if scheduler:
+        if config.scheduler.leader_election and current_backend() == "sqlite":
+            logging.warning("Scheduler leader election needs MySQL named locks; ignored with the SQLite backend (single node)")
+        elif config.scheduler.leader_election:
+            leader = LeaderElector(
+                config.db,
+                lock_name=config.scheduler.lock_name,
+                check_interval=config.scheduler.leader_check_seconds,
+            )
+            leader.start()
         register_jobs(
             scheduler,
             bot,
@@ -82,11 +203,13 @@ async def _startup(config: Config) -> tuple[Bot, Dispatcher, SettingsService, Pr
             lottery_service=lottery_service,
             announce_service=announce_service,
             settings_service=settings_service,
+            retention_service=retention_service,
+            leader=leader,
         )
         scheduler.start()
         logging.info("Scheduler started")
 
-    return bot, dp, settings_service, prize_service
+    return bot, dp, announce_service, settings_service, prize_service, checkin_service, outbound_queue, leader
 
 
 async def main() -> None:
@@ -96,29 +219,62 @@ async def main() -> None:
     dp: Optional[Dispatcher] = None
     settings_service: Optional[SettingsService] = None
     prize_service: Optional[PrizeService] = None
+    checkin_service: Optional[CheckinService] = None
+    outbound_queue: Optional[OutboundQueue] = None
+    leader: Optional[LeaderElector] = None
+    metrics_runner = None
 
     try:
-        bot, dp, settings_service, prize_service = await _startup(config)
-        settings = await settings_service.get_settings(config.target_chat_id)
-        await set_bot_commands(
+        (
             bot,
-            config.target_chat_id,
-            weekly_enabled=bool(settings.get("weekly_enabled", 0)),
-        )
-        # Startup check: 确保本周奖池已配置，否则提醒管理员
-        if prize_service:
+            dp,
+            announce_service,
+            settings_service,
+            prize_service,
+            checkin_service,
+            outbound_queue,
+            leader,
+        ) = await _startup(config)
+        if config.metrics.enabled:
+            metrics_runner = await start_metrics_server(config.metrics.host, config.metrics.port, config.metrics.path)
+        await set_default_bot_commands(bot)
+
+        async def prepare_chat(chat_id: int) -> None:
+            settings = await settings_service.get_settings(chat_id)
+            await update_admin_bot_commands(bot, chat_id, weekly_enabled=bool(settings.get("weekly_enabled", 0)))
+            # Startup check: 确保本周奖池已配置，否则提醒管理员
             today = time_utils.get_today_beijing()
             week_start, week_end = time_utils.get_week_start_end(today)
-            prize_set = await prize_service.get_prize_set_for_week(config.target_chat_id, week_start, week_end)
+            prize_set = await prize_service.get_prize_set_for_week(chat_id, week_start, week_end)
             if not prize_set:
                 warn_text = (
                     "⚠️ 本周周奖池未设置。\n"
                     f"请管理员尽快为 {week_start} ~ {week_end} 配置奖品集，避免抽奖时无奖池可用。"
                 )
-                await bot.send_message(chat_id=config.target_chat_id, text=warn_text)
-        await dp.start_polling(bot)
+                await announce_service.send_notice(chat_id, warn_text)
+
+        await run_for_chats(chat_registry, prepare_chat, config.bot.chat_job_concurrency)
+        if config.webhook.enabled:
+            await run_webhook(bot, dp, config.webhook)
+        else:
+            # 从 webhook 模式切回轮询时需先删除已注册的 webhook，否则 getUpdates 会冲突
+            await bot.delete_webhook(drop_pending_updates=False)
+            await dp.start_polling(bot)
     finally:
-        await close_db_pool()
+        if metrics_runner:
+            await metrics_runner.cleanup()
+        await admin_cache.stop()
+        if leader:
+            await leader.stop()
+        if outbound_queue:
+            await outbound_queue.stop()
+        if checkin_service:
+            try:
+                await checkin_service.stop()
+            except Exception as e:
+                logging.exception("Failed to flush pending check-ins on shutdown: %s", e)
+        await slow_query_log.close()
+        await close_db()
         logging.info("Shutdown complete")
 
 
@@ -0,0 +1,62 @@
+"""
+Replay recorded Telegram updates against a locally running webhook server (BOT_MODE=webhook).
+Usage:
+    python send_test_update.py updates.json [--url http://127.0.0.1:8080/telegram/webhook] [--repeat 100] [--concurrency 10]
+The file may contain a single update object, a JSON array of updates, or one update per line (JSONL).
+URL and secret default to WEBHOOK_PORT / WEBHOOK_PATH / WEBHOOK_SECRET from the environment/.env.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import time
+
+import aiohttp
+from dotenv import load_dotenv
+
+
+def load_updates(path: str) -> list:
+    with open(path, encoding="utf-8") as f:
+        raw = f.read().strip()
+    if not raw:
+        return []
+    try:
+        data = json.loads(raw)
+    except json.JSONDecodeError:
+        return [json.loads(line) for line in raw.splitlines() if line.strip()]
+    return data if isinstance(data, list) else [data]
+
+
+async def main() -> None:
+    load_dotenv()
+    default_url = f"http://127.0.0.1:{os.getenv('WEBHOOK_PORT', '8080')}{os.getenv('WEBHOOK_PATH', '/telegram/webhook')}"
+    parser = argparse.ArgumentParser(description="POST recorded updates to the webhook endpoint")
+    parser.add_argument("file")
+    parser.add_argument("--url", default=default_url)
+    parser.add_argument("--secret", default=os.getenv("WEBHOOK_SECRET", ""))
+    parser.add_argument("--repeat", type=int, default=1, help="send the whole file this many times")
+    parser.add_argument("--concurrency", type=int, default=1)
+    args = parser.parse_args()
+
+    updates = load_updates(args.file) * max(1, args.repeat)
+    headers = {"X-Telegram-Bot-Api-Secret-Token": args.secret} if args.secret else {}
+    semaphore = asyncio.Semaphore(max(1, args.concurrency))
+    statuses: dict = {}
+
+    async with aiohttp.ClientSession(headers=headers) as session:
+
+        async def post(update: dict) -> None:
+            async with semaphore:
+                async with session.post(args.url, json=update) as resp:
+                    statuses[resp.status] = statuses.get(resp.status, 0) + 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(post(u) for u in updates))
+        elapsed = time.perf_counter() - started
+
+    print(f"sent {len(updates)} updates in {elapsed:.2f}s to {args.url}; status codes: {statuses}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
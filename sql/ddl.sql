@@ -22,6 +22,8 @@ CREATE TABLE IF NOT EXISTS `telegram_user` (
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 
 -- Daily check-ins (one row per user per Beijing date)
+-- Monthly RANGE partitions on checkin_date: retention drops whole months instantly, and the
+-- retention job keeps splitting pmax so upcoming months exist. p202412 also holds older history.
 CREATE TABLE IF NOT EXISTS `daily_checkins` (
   `id` BIGINT UNSIGNED NOT NULL AUTO_INCREMENT,
   `chat_id` BIGINT NOT NULL,
@@ -31,10 +33,71 @@ CREATE TABLE IF NOT EXISTS `daily_checkins` (
   `message_time` DATETIME NOT NULL,
   `created_at` DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
   `updated_at` DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
-  PRIMARY KEY (`id`),
+  PRIMARY KEY (`id`, `checkin_date`),
   UNIQUE KEY `uq_daily_checkins_chat_user_date` (`chat_id`, `user_id`, `checkin_date`),
   KEY `idx_daily_checkins_chat_date` (`chat_id`, `checkin_date`),
   KEY `idx_daily_checkins_user` (`user_id`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+PARTITION BY RANGE COLUMNS (`checkin_date`) (
+  PARTITION p202412 VALUES LESS THAN ('2025-01-01'),
+  PARTITION p202501 VALUES LESS THAN ('2025-02-01'),
+  PARTITION p202502 VALUES LESS THAN ('2025-03-01'),
+  PARTITION p202503 VALUES LESS THAN ('2025-04-01'),
+  PARTITION p202504 VALUES LESS THAN ('2025-05-01'),
+  PARTITION p202505 VALUES LESS THAN ('2025-06-01'),
+  PARTITION p202506 VALUES LESS THAN ('2025-07-01'),
+  PARTITION p202507 VALUES LESS THAN ('2025-08-01'),
+  PARTITION p202508 VALUES LESS THAN ('2025-09-01'),
+  PARTITION p202509 VALUES LESS THAN ('2025-10-01'),
+  PARTITION p202510 VALUES LESS THAN ('2025-11-01'),
+  PARTITION p202511 VALUES LESS THAN ('2025-12-01'),
+  PARTITION p202512 VALUES LESS THAN ('2026-01-01'),
+  PARTITION p202601 VALUES LESS THAN ('2026-02-01'),
+  PARTITION p202602 VALUES LESS THAN ('2026-03-01'),
+  PARTITION p202603 VALUES LESS THAN ('2026-04-01'),
+  PARTITION p202604 VALUES LESS THAN ('2026-05-01'),
+  PARTITION p202605 VALUES LESS THAN ('2026-06-01'),
+  PARTITION p202606 VALUES LESS THAN ('2026-07-01'),
+  PARTITION p202607 VALUES LESS THAN ('2026-08-01'),
+  PARTITION p202608 VALUES LESS THAN ('2026-09-01'),
+  PARTITION p202609 VALUES LESS THAN ('2026-10-01'),
+  PARTITION p202610 VALUES LESS THAN ('2026-11-01'),
+  PARTITION p202611 VALUES LESS THAN ('2026-12-01'),
+  PARTITION p202612 VALUES LESS THAN ('2027-01-01'),
+  PARTITION pmax VALUES LESS THAN (MAXVALUE)
+);
+
+-- First check-in date per user; survives retention / archiving of old daily_checkins rows,
+-- so rollup new_user_count does not count returning users as new again
+CREATE TABLE IF NOT EXISTS `user_first_checkins` (
+  `chat_id` BIGINT NOT NULL,
+  `user_id` BIGINT NOT NULL,
+  `first_date` DATE NOT NULL,
+  PRIMARY KEY (`chat_id`, `user_id`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- Daily check-in rollups (per chat per Beijing date), maintained incrementally on first check-in of the day
+CREATE TABLE IF NOT EXISTS `daily_checkin_rollups` (
+  `chat_id` BIGINT NOT NULL,
+  `checkin_date` DATE NOT NULL,
+  `user_count` INT NOT NULL DEFAULT 0,
+  `new_user_count` INT NOT NULL DEFAULT 0,
+  `message_count` BIGINT NOT NULL DEFAULT 0,
+  `updated_at` DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+  PRIMARY KEY (`chat_id`, `checkin_date`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- Per-user weekly attendance (week_start = Monday, Beijing date), maintained on first check-in of each day
+CREATE TABLE IF NOT EXISTS `user_week_attendance` (
+  `chat_id` BIGINT NOT NULL,
+  `user_id` BIGINT NOT NULL,
+  `week_start` DATE NOT NULL,
+  `days` TINYINT UNSIGNED NOT NULL DEFAULT 0,
+  `last_date` DATE NOT NULL,
+  `current_streak` TINYINT UNSIGNED NOT NULL DEFAULT 0,
+  `updated_at` DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+  PRIMARY KEY (`chat_id`, `user_id`, `week_start`),
+  KEY `idx_user_week_attendance_week` (`chat_id`, `week_start`)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 
 -- Settings (single row for the target chat, but schema allows more)
@@ -60,7 +123,7 @@ CREATE TABLE IF NOT EXISTS `prize_sets` (
   `chat_id` BIGINT NOT NULL,
   `set_type` ENUM('weekly', 'daily', 'custom') NOT NULL,
   `phase` ENUM('current', 'next', 'archived') NOT NULL DEFAULT 'current',
-  `title` VARCHAR(255) NOT NULL,
+  `title` VARCHAR(255) NOT NULL DEFAULT '',
   `description` TEXT NULL,
   `valid_from` DATE NULL,
   `valid_to` DATE NULL,
@@ -68,8 +131,7 @@ CREATE TABLE IF NOT EXISTS `prize_sets` (
   `created_at` DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
   `updated_at` DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
   PRIMARY KEY (`id`),
-  UNIQUE KEY `uq_prize_sets_chat_type_phase` (`chat_id`, `set_type`, `phase`),
-  KEY `idx_prize_sets_chat_type` (`chat_id`, `set_type`)
+  KEY `idx_prize_sets_chat_type` (`chat_id`, `set_type`, `valid_from`)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 
 -- Prize items under a prize set
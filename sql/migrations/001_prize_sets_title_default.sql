@@ -0,0 +1,8 @@
+-- prize_sets: one row per chat/type/week is written by insert_prize_set, which sets neither
+-- title nor phase. Give title a default and drop the per-phase unique key, which rejected
+-- the second week's set (cloning next week's prizes after a draw).
+ALTER TABLE `prize_sets`
+  MODIFY `title` VARCHAR(255) NOT NULL DEFAULT '',
+  DROP INDEX `uq_prize_sets_chat_type_phase`,
+  DROP INDEX `idx_prize_sets_chat_type`,
+  ADD KEY `idx_prize_sets_chat_type` (`chat_id`, `set_type`, `valid_from`);
@@ -0,0 +1,14 @@
+-- user_first_checkins: durable first check-in date per (chat, user). Rollup new_user_count reads it
+-- instead of MIN(checkin_date) over daily_checkins, which retention and archiving now trim.
+-- Run before the first retention / archive run: the backfill can only see rows that still exist.
+CREATE TABLE IF NOT EXISTS `user_first_checkins` (
+  `chat_id` BIGINT NOT NULL,
+  `user_id` BIGINT NOT NULL,
+  `first_date` DATE NOT NULL,
+  PRIMARY KEY (`chat_id`, `user_id`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+INSERT INTO `user_first_checkins` (`chat_id`, `user_id`, `first_date`)
+SELECT `chat_id`, `user_id`, MIN(`checkin_date`) FROM `daily_checkins`
+GROUP BY `chat_id`, `user_id`
+ON DUPLICATE KEY UPDATE `first_date` = LEAST(`first_date`, VALUES(`first_date`));